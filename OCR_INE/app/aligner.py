@@ -5,6 +5,8 @@ from __future__ import annotations
 import cv2
 import numpy as np
 
+from .roi_loader import to_pixel_box
+
 
 # Expected relative feature centres for each model (normalised 0..1)
 _EXPECTED_FEATURES: dict[str, tuple[float, float, float, float]] = {
@@ -93,15 +95,5 @@ def apply_alignment_to_roi(
 def crop_roi(image: np.ndarray, roi: list[float]) -> np.ndarray:
     """Crop a region from an image using normalised ROI coordinates."""
     h, w = image.shape[:2]
-    x1 = int(roi[0] * w)
-    y1 = int(roi[1] * h)
-    x2 = int(roi[2] * w)
-    y2 = int(roi[3] * h)
-
-    # Ensure valid bounds
-    x1 = max(0, min(x1, w - 1))
-    y1 = max(0, min(y1, h - 1))
-    x2 = max(x1 + 1, min(x2, w))
-    y2 = max(y1 + 1, min(y2, h))
-
+    x1, y1, x2, y2 = to_pixel_box(roi, w, h)
     return image[y1:y2, x1:x2]
@@ -3,39 +3,60 @@
 from __future__ import annotations
 
 import re
+from typing import Iterable
 
 import numpy as np
 
 from .aligner import apply_alignment_to_roi, compute_alignment, crop_roi
 from .classifier import classify
-from .extractor import ocr_region
+from . import glyph_ocr
+from .config import settings
+from .extractor import OcrRead, ocr_montage, read_region
+from .image_context import ImageContext, as_context
 from .models import FieldResult
 from .roi_loader import expand_roi, get_back_rois
+from .timing import timed
 from .curp_utils import find_curp_in_text
 
+_MRZ_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<"
+_CURP_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# Tesseract settings (psm, whitelist) per back crop.
+_ROI_OCR = {
+    "id_ine": (7, _MRZ_WHITELIST),
+    "curp": (6, _CURP_WHITELIST),
+}
+
 
 def parse_back(
-    rectified_back: np.ndarray,
+    rectified_back: np.ndarray | ImageContext,
     attempt: int = 1,
     model_id: str | None = None,
     feature_bboxes: list | None = None,
+    fields: Iterable[str] | None = None,
 ) -> dict:
     """Extract id_ine and CURP from the back of the INE.
 
     Args:
-        rectified_back: Rectified back image.
+        rectified_back: Rectified back image or its :class:`ImageContext`;
+            ROIs are cropped from its shared grayscale.
         attempt: 1-based attempt number.
         model_id: Pre-classified model (if None, will classify).
         feature_bboxes: Pre-detected feature bounding boxes.
+        fields: Only OCR these of ``"id_ine"`` / ``"curp"`` (default both);
+            fields left out are absent from the result.
 
     Returns:
-        dict with id_ine, curp, model_id, feature_bboxes, warnings.
+        dict with id_ine, curp, model_id, feature_bboxes, warnings, and
+        ocr_confidence (Tesseract's confidence per field found).
     """
+    fields = {"id_ine", "curp"} if fields is None else set(fields)
     warnings: list[str] = []
+    ctx = as_context(rectified_back)
 
     # Classify if needed
     if model_id is None:
-        model_id, feature_bboxes = classify(rectified_back)
+        model_id, feature_bboxes = classify(ctx)
         if feature_bboxes is None:
             feature_bboxes = []
 
@@ -45,7 +66,7 @@ def parse_back(
     # Get ROIs and compute alignment
     rois = get_back_rois(model_id)
     dx, dy, scale = compute_alignment(
-        rectified_back.shape, model_id, feature_bboxes or [],
+        ctx.shape, model_id, feature_bboxes or [],
     )
 
     if not feature_bboxes:
@@ -60,42 +81,86 @@ def parse_back(
         "warnings": warnings,
     }
 
-    # ── id_ine extraction ────────────────────────────────────────────────
+    # ── Crop the requested ROIs ──────────────────────────────────────────
+    crops: dict[str, np.ndarray] = {}
     mrz_key = next((k for k in rois if "mrz" in k or "fallback" in k), None)
-    if mrz_key:
+    if mrz_key and "id_ine" in fields:
         roi = rois[mrz_key]
         roi = apply_alignment_to_roi(roi, dx, dy, scale)
         if attempt > 1:
             roi = expand_roi(roi)
-        roi_img = crop_roi(rectified_back, roi)
-        raw = ocr_region(roi_img, attempt=attempt, psm=7,
-                         whitelist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<")
-        id_ine = _parse_id_ine(raw)
+        crops["id_ine"] = crop_roi(ctx.gray, roi)
+
+    curp_key = next((k for k in rois if "curp" in k), None)
+    if curp_key and "curp" in fields:
+        roi = rois[curp_key]
+        roi = apply_alignment_to_roi(roi, dx, dy, scale)
+        crops["curp"] = crop_roi(ctx.gray, roi)
+
+    reads = _ocr_crops(crops, attempt)
+    confidence: dict[str, float] = {}
+
+    # ── id_ine extraction ────────────────────────────────────────────────
+    if "id_ine" in crops:
+        id_ine = _parse_id_ine(reads["id_ine"].text)
         id_ine, ocr_corrections = _apply_ocr_corrections(id_ine)
 
         if ocr_corrections > 0:
             warnings.append("id_ine_corrected_chars")
 
         results["id_ine"] = id_ine
-    else:
+        if id_ine:
+            confidence["id_ine"] = reads["id_ine"].confidence(id_ine)
+    elif "id_ine" in fields:
         results["id_ine"] = None
 
     # ── CURP extraction ──────────────────────────────────────────────────
-    curp_key = next((k for k in rois if "curp" in k), None)
-    if curp_key:
-        roi = rois[curp_key]
-        roi = apply_alignment_to_roi(roi, dx, dy, scale)
-        roi_img = crop_roi(rectified_back, roi)
-        raw = ocr_region(roi_img, attempt=attempt, psm=6,
-                         whitelist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
-        curp = find_curp_in_text(raw)
+    if "curp" in crops:
+        curp = find_curp_in_text(reads["curp"].text)
         results["curp"] = curp
-    else:
+        if curp:
+            confidence["curp"] = reads["curp"].confidence(curp)
+    elif "curp" in fields:
         results["curp"] = None
 
+    results["ocr_confidence"] = {name: c for name, c in confidence.items() if c is not None}
+
     return results
 
 
+def _ocr_crops(crops: dict[str, np.ndarray], attempt: int) -> dict[str, OcrRead]:
+    """OCR the back crops.
+
+    On attempt 1, ROIs listed in ``FIXED_FONT_ROIS`` are tried with the
+    glyph-template recognizer first.  The rest go to Tesseract with their
+    own psm and whitelist: with ``OCR_MONTAGE``, crops that share both are
+    read in one montage call, and any other crop on its own.
+    """
+    reads: dict[str, OcrRead] = {}
+    if attempt == 1:
+        for name, crop in crops.items():
+            if glyph_ocr.enabled_for(name):
+                with timed(f"back_roi.{name}.glyphs"):
+                    read = glyph_ocr.recognise(crop)
+                if read is not None:
+                    reads[name] = read
+    crops = {name: crop for name, crop in crops.items() if name not in reads}
+
+    groups: dict[tuple[int, str], list[str]] = {}
+    for name in crops:
+        groups.setdefault(_ROI_OCR[name], []).append(name)
+    for (psm, whitelist), names in groups.items():
+        if settings.ocr_montage and len(names) > 1:
+            # Stacked crops are a block of lines, whatever each crop's own psm.
+            with timed("back_roi.montage"):
+                reads.update(ocr_montage({n: crops[n] for n in names}, attempt=attempt, psm=6, whitelist=whitelist))
+            continue
+        for name in names:
+            with timed(f"back_roi.{name}"):
+                reads[name] = read_region(crops[name], attempt=attempt, psm=psm, whitelist=whitelist)
+    return reads
+
+
 def _parse_id_ine(raw_text: str) -> str | None:
     """Parse id_ine from MRZ/IDMEX text.
 
@@ -0,0 +1,248 @@
+"""Batch extraction — many card pairs in, one NDJSON line out per pair.
+
+Pairs come either from multipart fields named ``front.<id>`` / ``back.<id>``
+or from a zip/tar archive with entries named ``<id>_front.jpg`` /
+``<id>_back.jpg`` (the layout of ``test_images/cropped``).  An archive
+upload is spooled to disk (tar members by one forward pass) and its image
+bytes are only read once a pair gets a processing slot, so memory stays
+bounded by the concurrency limit rather than by the size of the batch.
+Multipart fields are spooled by Starlette only above 1 MB, so a multipart
+batch of phone photos can sit in memory whole; large batches should use
+the archive form.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import IO, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+
+from .config import settings
+from .models import BatchItemResult, ErrorResponse, OcrResponse
+from .uploads import UploadRejected, check_content_type, check_size
+from .worker_pool import PoolBusy
+
+logger = logging.getLogger(__name__)
+
+SIDES = ("front", "back")
+
+_ARCHIVE_ENTRY = re.compile(
+    r"(?:.*/)?(?P<id>[^/]+?)[_.-](?P<side>front|back)\.(?P<ext>jpe?g|png)$", re.IGNORECASE,
+)
+_EXT_TYPES = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+@dataclass
+class Entry:
+    """One side of a pair: metadata known up front, bytes read on demand."""
+    size: int | None
+    content_type: str | None
+    read: Callable[[], bytes]
+
+
+@dataclass
+class BatchItem:
+    item_id: str
+    front: Entry | None
+    back: Entry | None
+
+
+# ── Sources ──────────────────────────────────────────────────────────────────
+def items_from_form(form) -> list[BatchItem]:
+    """Pair ``front.<id>`` / ``back.<id>`` file fields of a multipart form."""
+    pairs: dict[str, dict[str, Entry]] = {}
+    for key, value in form.multi_items():
+        side, _, item_id = key.partition(".")
+        if side not in SIDES or not item_id or isinstance(value, str):
+            continue
+        pairs.setdefault(item_id, {})[side] = Entry(
+            size=value.size,
+            content_type=value.content_type,
+            read=_spooled_reader(value.file),
+        )
+    return [BatchItem(item_id, sides.get("front"), sides.get("back")) for item_id, sides in pairs.items()]
+
+
+def items_from_archive(fileobj: IO[bytes]) -> list[BatchItem]:
+    """Pair ``<id>_front.<ext>`` / ``<id>_back.<ext>`` entries of a zip or tar.
+
+    Blocking (reads the whole tar); call it off the event loop.
+
+    Raises:
+        UploadRejected: if the file is neither a zip nor a tar archive, or holds
+            more than BATCH_MAX_ITEMS pairs or BATCH_MAX_ARCHIVE_MB of images.
+    """
+    fileobj.seek(0)
+    members = _zip_members(fileobj) if zipfile.is_zipfile(fileobj) else _tar_members(fileobj)
+
+    pairs: dict[str, dict[str, Entry]] = {}
+    total = 0
+    for name, size, load in members:
+        match = _ARCHIVE_ENTRY.match(name)
+        if match is None:
+            continue
+        total += size
+        if match["id"] not in pairs and len(pairs) >= settings.batch_max_items:
+            raise _archive_too_large(f"at most {settings.batch_max_items} pairs")
+        if total > settings.batch_max_archive_mb * 1024 * 1024:
+            raise _archive_too_large(f"at most {settings.batch_max_archive_mb}MB of images")
+        content_type = _EXT_TYPES[match["ext"].lower()]
+        pairs.setdefault(match["id"], {})[match["side"].lower()] = Entry(size, content_type, load())
+    return [BatchItem(item_id, sides.get("front"), sides.get("back")) for item_id, sides in pairs.items()]
+
+
+_Member = tuple[str, int, Callable[[], Callable[[], bytes]]]
+
+
+def _zip_members(fileobj: IO[bytes]) -> Iterator[_Member]:
+    """Zip entries are random access: readers go straight to the archive."""
+    fileobj.seek(0)
+    archive = zipfile.ZipFile(fileobj)
+    for info in archive.infolist():
+        if not info.is_dir():
+            yield info.filename, info.file_size, lambda info=info: lambda: archive.read(info)
+
+
+def _tar_members(fileobj: IO[bytes]) -> Iterator[_Member]:
+    """Tar entries in stream order; ``load`` copies the current one to a spool file.
+
+    A compressed tar can only be read forwards cheaply, so each kept member
+    is copied out while the stream is positioned on it and later read back
+    from the spool (with ``pread``, safe from concurrent threads).
+    """
+    fileobj.seek(0)
+    try:
+        tar = tarfile.open(fileobj=fileobj, mode="r:*")
+    except tarfile.TarError:
+        raise UploadRejected(415, ErrorResponse(
+            error_code="UNSUPPORTED_MEDIA_TYPE",
+            message="archive must be a zip or tar file",
+        ))
+    spool = tempfile.TemporaryFile()
+
+    def load(member: tarfile.TarInfo) -> Callable[[], bytes]:
+        offset = spool.seek(0, os.SEEK_END)
+        shutil.copyfileobj(tar.extractfile(member), spool)
+        spool.flush()
+        return lambda: os.pread(spool.fileno(), member.size, offset)
+
+    with tar:
+        for member in tar:
+            if member.isfile():
+                yield member.name, member.size, lambda member=member: load(member)
+
+
+def _archive_too_large(limit: str) -> UploadRejected:
+    return UploadRejected(422, ErrorResponse(
+        error_code="INVALID_BATCH",
+        message=f"Batch archive must hold {limit}",
+    ))
+
+
+def _spooled_reader(file: IO[bytes]) -> Callable[[], bytes]:
+    def read() -> bytes:
+        file.seek(0)
+        return file.read()
+    return read
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+async def run_batch(
+    items: Iterable[BatchItem],
+    process: Callable[[bytes, bytes], Awaitable[OcrResponse]],
+    concurrency: int,
+) -> AsyncIterator[str]:
+    """Process pairs concurrently and yield one NDJSON line per pair, as each finishes.
+
+    At most ``concurrency`` pairs are loaded or running at any time; a slow
+    reader of the stream applies back-pressure to the producer.
+    """
+    concurrency = max(1, concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue[BatchItemResult | None] = asyncio.Queue(maxsize=concurrency)
+    running: set[asyncio.Task] = set()
+
+    async def one(item: BatchItem) -> None:
+        try:
+            line = await _process_item(item, process)
+            await results.put(line)  # hold the slot until the reader has room
+        finally:
+            slots.release()
+
+    async def produce() -> None:
+        try:
+            for item in items:
+                await slots.acquire()
+                task = asyncio.create_task(one(item))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            if running:
+                await asyncio.gather(*running)
+        finally:
+            await results.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (line := await results.get()) is not None:
+            yield line.model_dump_json() + "\n"
+        await producer
+    finally:
+        # Client went away or the stream ended: stop whatever is left.
+        producer.cancel()
+        for task in list(running):
+            task.cancel()
+
+
+async def _process_item(item: BatchItem, process) -> BatchItemResult:
+    try:
+        front_bytes, back_bytes = await asyncio.to_thread(_load_pair, item)
+    except UploadRejected as e:
+        return BatchItemResult(item_id=item.item_id, status="error", error=e.error)
+    except Exception as e:
+        logger.error("Batch item %s: failed to read images: %s", item.item_id, e)
+        return BatchItemResult(item_id=item.item_id, status="error", error=ErrorResponse(
+            error_code="IMAGE_DECODE_FAILED",
+            message="Failed to read uploaded images",
+        ))
+
+    while True:
+        try:
+            result = await process(front_bytes, back_bytes)
+        except PoolBusy as e:
+            # Shared pool is saturated by other traffic: wait our turn.
+            await asyncio.sleep(e.retry_after)
+            continue
+        except Exception as e:
+            logger.exception("Batch item %s: OCR pipeline error: %s", item.item_id, e)
+            return BatchItemResult(item_id=item.item_id, status="error", error=ErrorResponse(
+                error_code="OCR_INTERNAL_ERROR",
+                message="Internal OCR processing error",
+            ))
+        return BatchItemResult(item_id=item.item_id, status="ok", result=result)
+
+
+def _load_pair(item: BatchItem) -> tuple[bytes, bytes]:
+    """Validate and read both sides of a pair."""
+    data = {}
+    for side, entry in zip(SIDES, (item.front, item.back)):
+        which = f"{side}_image"
+        if entry is None:
+            raise UploadRejected(422, ErrorResponse(
+                error_code="MISSING_IMAGE",
+                message=f"{which} missing for item '{item.item_id}'",
+                details={"which": which},
+            ))
+        check_content_type(which, entry.content_type)
+        if entry.size is not None:
+            check_size(which, entry.size)  # before reading anything
+        data[side] = entry.read()
+        check_size(which, len(data[side]))
+    return data["front"], data["back"]
+
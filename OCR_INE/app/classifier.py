@@ -2,39 +2,61 @@
 
 from __future__ import annotations
 
+import re
+from typing import NamedTuple
+
 import cv2
 import numpy as np
 
+from .curp_utils import has_valid_check_digit, is_valid_curp
+from .image_context import ImageContext, as_context
+from .timing import timed
+
+try:  # optional PDF417 decoder
+    import zxingcpp
+except ImportError:  # pragma: no cover - depends on the build environment
+    zxingcpp = None
+
 
 # ── Model IDs ────────────────────────────────────────────────────────────────
 MODEL_QR = "MODEL_QRHD_2019_PRESENT"
 MODEL_PDF417 = "MODEL_PDF417_2017_2018"
 MODEL_UNKNOWN = "MODEL_UNKNOWN"
 
+# Both detectors run on one grayscale downscale no larger than this.
+_DETECT_MAX_DIM = 1024
 
-def classify(back_image: np.ndarray) -> tuple[str, list[np.ndarray]]:
+
+def classify(back_image: np.ndarray | ImageContext) -> tuple[str, list[np.ndarray]]:
     """Classify the back of the INE and return (model_id, feature_bboxes).
 
+    Args:
+        back_image: BGR image or its :class:`ImageContext`.
+
     Returns:
         (model_id, feature_bboxes) where feature_bboxes is a list of
         bounding-box arrays that can be used for alignment.
     """
+    ctx = as_context(back_image)
+
     # Try QR detection first (2019+ model has 2 large QRs)
-    model_id, bboxes = _detect_qr(back_image)
+    with timed("classify.qr"):
+        model_id, bboxes = _detect_qr(ctx)
     if model_id == MODEL_QR:
         return model_id, bboxes
 
     # Try PDF417 detection (2017-2018 model)
-    model_id, bboxes = _detect_pdf417(back_image)
+    with timed("classify.pdf417"):
+        model_id, bboxes = _detect_pdf417(ctx)
     if model_id == MODEL_PDF417:
         return model_id, bboxes
 
     return MODEL_UNKNOWN, []
 
 
-def _detect_qr(image: np.ndarray) -> tuple[str, list[np.ndarray]]:
+def _detect_qr(ctx: ImageContext) -> tuple[str, list[np.ndarray]]:
     """Detect QR codes using OpenCV's QRCodeDetector."""
-    resized, scale = _resize_if_needed(image)
+    resized, scale = ctx.downscaled(_DETECT_MAX_DIM)
     detector = cv2.QRCodeDetector()
 
     try:
@@ -54,10 +76,9 @@ def _detect_qr(image: np.ndarray) -> tuple[str, list[np.ndarray]]:
     return MODEL_UNKNOWN, []
 
 
-def _detect_pdf417(image: np.ndarray) -> tuple[str, list[np.ndarray]]:
+def _detect_pdf417(ctx: ImageContext) -> tuple[str, list[np.ndarray]]:
     """Detect PDF417 barcode using morphological operations."""
-    resized, scale = _resize_if_needed(image, max_dim=1200)
-    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY) if len(resized.shape) == 3 else resized
+    gray, scale = ctx.downscaled(_DETECT_MAX_DIM)
     h, w = gray.shape[:2]
 
     # Compute horizontal gradient (Scharr)
@@ -100,14 +121,82 @@ def _detect_pdf417(image: np.ndarray) -> tuple[str, list[np.ndarray]]:
     return MODEL_UNKNOWN, []
 
 
-def _resize_if_needed(image: np.ndarray, max_dim: int = 1000) -> tuple[np.ndarray, float]:
-    """Resize image if larger than max_dim, preserving aspect ratio."""
-    h, w = image.shape[:2]
-    if max(h, w) <= max_dim:
-        return image, 1.0
+# ── Payloads ─────────────────────────────────────────────────────────────────
+_TOKEN = re.compile(r"(?<![A-Z0-9])[A-Z0-9]{16,20}(?![A-Z0-9])")
+_INE_QR_URL = re.compile(r"^HTTPS?://QR\.INE\.MX/(?P<id>[A-Z0-9]{16,20})(?:[/?#]|$)")
+
+
+class BarcodeValue(NamedTuple):
+    """An identifier decoded from a barcode payload."""
+    value: str
+    verified: bool  # in a known INE layout: safe to take over the OCR read
+
+
+def read_barcodes(back_image: np.ndarray | ImageContext, model_id: str) -> dict[str, BarcodeValue]:
+    """Decode the back's barcodes and return the identifiers they carry.
 
-    scale = max_dim / max(h, w)
-    new_w = int(w * scale)
-    new_h = int(h * scale)
-    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
-    return resized, scale
+    QR codes are decoded on every back (a QR card misread as PDF417 still
+    yields its payload); PDF417 only when ``zxingcpp`` is installed.
+
+    Returns:
+        dict with ``id_ine`` and/or ``curp``; empty when nothing decoded.
+        A verified value wins over an unverified one from another payload.
+    """
+    ctx = as_context(back_image)
+    with timed("classify.decode_qr"):
+        payloads = _decode_qr(ctx.gray)
+    if model_id == MODEL_PDF417 and zxingcpp is not None:
+        with timed("classify.decode_pdf417"):
+            payloads += _decode_pdf417(ctx.gray)
+
+    identifiers: dict[str, BarcodeValue] = {}
+    for payload in payloads:
+        for field, decoded in parse_payload(payload).items():
+            known = identifiers.get(field)
+            if known is None or (decoded.verified and not known.verified):
+                identifiers[field] = decoded
+    return identifiers
+
+
+def parse_payload(payload: str) -> dict[str, BarcodeValue]:
+    """id_ine / CURP found in one decoded payload (a URL or plain text).
+
+    Verified values come from known INE layouts: the id_ine path segment of
+    a ``qr.ine.mx`` URL and a CURP whose check digit is right.  Other tokens
+    that only look like one — a CURP-shaped token, or any 16–20 character
+    token with at least ten digits (18 preferred) — are returned unverified:
+    enough to cross-check the OCR read, not to replace it.
+    """
+    text = payload.strip().upper()
+    found: dict[str, BarcodeValue] = {}
+    url = _INE_QR_URL.match(text)
+    if url and sum(c.isdigit() for c in url["id"]) >= 10:
+        found["id_ine"] = BarcodeValue(url["id"], True)
+
+    candidates = []
+    for token in _TOKEN.findall(text):
+        if len(token) == 18 and is_valid_curp(token):
+            if "curp" not in found or (has_valid_check_digit(token) and not found["curp"].verified):
+                found["curp"] = BarcodeValue(token, has_valid_check_digit(token))
+        elif sum(c.isdigit() for c in token) >= 10:
+            candidates.append(token)
+    if candidates and "id_ine" not in found:
+        found["id_ine"] = BarcodeValue(min(candidates, key=lambda token: abs(len(token) - 18)), False)
+    return found
+
+
+def _decode_qr(gray: np.ndarray) -> list[str]:
+    """Payloads of every QR code decoded at full resolution."""
+    try:
+        ok, texts, _, _ = cv2.QRCodeDetectorAruco().detectAndDecodeMulti(gray)
+    except cv2.error:
+        return []
+    return [text for text in texts if text] if ok else []
+
+
+def _decode_pdf417(gray: np.ndarray) -> list[str]:
+    try:
+        results = zxingcpp.read_barcodes(gray, formats=zxingcpp.BarcodeFormat.PDF417)
+    except (RuntimeError, ValueError):
+        return []
+    return [result.text for result in results if result.text]
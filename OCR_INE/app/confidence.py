@@ -5,16 +5,27 @@ from __future__ import annotations
 from .models import FieldResult
 
 
+# Tesseract word confidence (0–1) below which a read is not trusted whatever its shape.
+OCR_CONFIDENCE_FLOOR = 0.6
+
+
 def score_field(
     value: str | None,
     pattern_score: float,
     quality_score: float,
     context_score: float,
+    ocr_confidence: float | None = None,
 ) -> FieldResult:
     """Calculate confidence for a field and return a FieldResult.
 
     Formula: confidence = 0.55*pattern + 0.25*quality + 0.20*context
 
+    When Tesseract's own confidence for the words of the value is known
+    (``ocr_confidence``, 0–1) it replaces most of the image-level quality:
+        confidence = 0.45*pattern + 0.30*ocr + 0.10*quality + 0.15*context
+    and a read below ``OCR_CONFIDENCE_FLOOR`` always requires review, so a
+    well-shaped but shaky read is retried and a solid one is not.
+
     Thresholds:
         HIGH >= 0.85
         MED  0.65–0.84
@@ -23,10 +34,18 @@ def score_field(
     if not value:
         return FieldResult(value=None, confidence=0.0, requires_review=True)
 
-    confidence = 0.55 * pattern_score + 0.25 * quality_score + 0.20 * context_score
+    if ocr_confidence is None:
+        confidence = 0.55 * pattern_score + 0.25 * quality_score + 0.20 * context_score
+    else:
+        confidence = (
+            0.45 * pattern_score + 0.30 * ocr_confidence
+            + 0.10 * quality_score + 0.15 * context_score
+        )
     confidence = max(0.0, min(1.0, confidence))
 
-    requires_review = confidence < 0.65
+    requires_review = confidence < 0.65 or (
+        ocr_confidence is not None and ocr_confidence < OCR_CONFIDENCE_FLOOR
+    )
 
     return FieldResult(
         value=value,
@@ -1,19 +1,64 @@
 """Application settings loaded from environment variables."""
 
+import os
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     api_key: str = "change-me-in-production"
     tesseract_cmd: str = "tesseract"
+    ocr_engine: str = "auto"  # auto | tesserocr | subprocess
+    ocr_pool_size: int = 0  # 0 = one engine per CPU
+    tessdata_path: str = ""
+    fixed_font_rois: str = ""  # ROIs read by glyph templates first, e.g. "id_ine,seccion"
+    fixed_font_path: str = ""  # OCR-B TTF the glyph templates are rendered from; empty = recognizer off
+    ocr_montage: bool = False  # OCR all ROIs of a side in one Tesseract call instead of one call each
     max_image_size_mb: int = 5
-    time_budget_ms: int = 9500
+    time_budget_ms: int = 9500  # default request deadline; X-Deadline-Ms may only shorten it
+    deadline_calibrate: bool = True  # time optional steps at startup to seed their expected cost
     max_retries: int = 2
+    quality_gate: bool = False  # answer "retake_photo" right after the quality check when a side can't be read
+    quality_gate_min_blur: float = 0.05
+    quality_gate_max_glare: float = 0.5
+    quality_gate_min_exposure: float = 0.1
+    barcode_first: bool = True  # decode the back's QR / PDF417 payloads; a verified id_ine skips the OCR retries
+    speculative_id_ine: bool = False  # OCR id_ine with every preprocessing variant at once, first good wins
+    speculative_slots: int = 0  # spare cores shared by speculative variants, 0 = CPUs - 1
+    speculative_per_request: int = 2  # extra variants one request may run at once
+    card_width: int = 1012  # canonical rectified card size (px)
+    card_height: int = 638
+    decode_target_px: int = 1600  # JPEGs are decoded scaled down to just above this long side
+    worker_mode: str = "thread"  # thread | process
+    workers: int = 0  # 0 = one worker per CPU
+    process_cpus: int = 0  # CPUs to size the pools for, 0 = all; each process-mode worker gets its share
+    worker_queue_size: int = 4
+    busy_retry_after_s: int = 2
+    batch_concurrency: int = 0  # pairs in flight per batch request, 0 = one per worker
+    batch_max_items: int = 500  # pairs per batch, multipart or archive
+    batch_max_archive_mb: int = 1024  # total size of the images inside a zip/tar batch
+    stage_workers: int = 0  # threads running independent pipeline stages, 0 = one per CPU
+    cache_backend: str = "memory"  # memory | redis | none
+    cache_ttl_s: int = 72 * 3600
+    cache_max_entries: int = 1024
+    redis_url: str = "redis://localhost:6379/0"
+    job_broker: str = "none"  # none | sqlite | redis; the job API is off unless a broker is set
+    job_db_path: str = "data/jobs.sqlite3"
+    job_workers: int = 0  # jobs processed at once per container, 0 = one per worker
+    job_lease_s: int = 300  # a job not finished within its lease is handed out again
+    job_max_attempts: int = 3
+    job_ttl_s: int = 72 * 3600
+    job_poll_interval_s: float = 1.0
+    job_callback_hosts: str = ""  # hosts a job may POST its result to, e.g. "app.example.com"; empty = no callbacks
     host: str = "0.0.0.0"
     port: int = 8001
     log_level: str = "info"
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
+    def cpus(self) -> int:
+        """CPUs the per-process pools (engines, stage threads, speculative slots) are sized for."""
+        return self.process_cpus or (os.cpu_count() or 1)
+
 
 settings = Settings()
@@ -24,6 +24,24 @@ def is_valid_curp(curp: str) -> bool:
     return bool(CURP_REGEX.match(curp.strip().upper()))
 
 
+_CHECK_ALPHABET = "0123456789ABCDEFGHIJKLMNÑOPQRSTUVWXYZ"
+
+
+def curp_check_digit(curp: str) -> str | None:
+    """RENAPO check digit (the 18th character) for the first 17 characters."""
+    curp = curp.strip().upper()
+    if len(curp) < 17 or any(c not in _CHECK_ALPHABET for c in curp[:17]):
+        return None
+    total = sum(_CHECK_ALPHABET.index(c) * (18 - i) for i, c in enumerate(curp[:17]))
+    return str((10 - total % 10) % 10)
+
+
+def has_valid_check_digit(curp: str) -> bool:
+    """Check a full CURP's format and its check digit (stricter than is_valid_curp)."""
+    curp = curp.strip().upper()
+    return is_valid_curp(curp) and curp[17] == curp_check_digit(curp)
+
+
 def extract_fecha_nacimiento(curp: str) -> str | None:
     """Extract birth date from CURP as YYYY-MM-DD string.
 
@@ -0,0 +1,196 @@
+"""Request deadlines propagated to every pipeline stage through a context variable.
+
+A :class:`Deadline` is created when a request arrives (``TIME_BUDGET_MS``,
+or less if the client sends ``X-Deadline-Ms``) and travels with the run:
+graph nodes copy the context, and worker processes receive it pickled
+(``time.monotonic`` is system-wide on the hosts we run on).  Stages use it
+two ways:
+
+* optional work — field retries on either side, attempt 3's denoise, the deskew fallback,
+  Tesseract OSD — runs only if :func:`allows` finds its expected cost
+  still fits;
+* OCR calls get the remaining time as a hard timeout.
+
+Expected costs start from :func:`calibrate` (run at startup) and follow
+what each step actually costs on this machine afterwards.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Expected ms per optional step; conservative until calibrated or observed.
+_DEFAULT_COSTS = {
+    "back_attempt_2": 1500.0,
+    "back_attempt_3": 2500.0,
+    "denoise": 300.0,
+    "deskew": 150.0,
+    "front_attempt_2": 800.0,
+    "front_attempt_3": 1200.0,
+    "osd": 1000.0,
+}
+_EWMA_ALPHA = 0.2
+
+_costs: dict[str, float] = dict(_DEFAULT_COSTS)
+_costs_lock = threading.Lock()
+
+
+class Deadline:
+    """Point in time by which a run must finish."""
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000
+        self.exceeded = False  # set once any work was skipped or cut short
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000)
+
+    def remaining_s(self) -> float:
+        return self.remaining_ms() / 1000
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def cancel(self) -> None:
+        """Expire now: OCR not yet started under this deadline is skipped."""
+        self.expires_at = min(self.expires_at, time.monotonic())
+
+    def allows(self, step: str) -> bool:
+        """Whether ``step``'s expected cost still fits; records the skip if not."""
+        if self.remaining_ms() >= expected_ms(step):
+            return True
+        self.exceeded = True
+        return False
+
+
+_current: contextvars.ContextVar[Deadline | None] = contextvars.ContextVar("ocr_deadline", default=None)
+
+
+@contextmanager
+def running(deadline: Deadline) -> Iterator[Deadline]:
+    """Make ``deadline`` the one every stage of this run sees."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current() -> Deadline | None:
+    return _current.get()
+
+
+def allows(step: str) -> bool:
+    """``Deadline.allows`` for the current run; always True outside one."""
+    deadline = _current.get()
+    return deadline is None or deadline.allows(step)
+
+
+# ── Step costs ───────────────────────────────────────────────────────────────
+def expected_ms(step: str) -> float:
+    with _costs_lock:
+        return _costs.get(step, 0.0)
+
+
+def observe(step: str, elapsed_ms: float) -> None:
+    """Fold one measured run of ``step`` into its expected cost."""
+    with _costs_lock:
+        previous = _costs.get(step)
+        _costs[step] = elapsed_ms if previous is None else (
+            (1 - _EWMA_ALPHA) * previous + _EWMA_ALPHA * elapsed_ms
+        )
+
+
+@contextmanager
+def measured(step: str) -> Iterator[None]:
+    """Observe the duration of the block as a cost sample for ``step``."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(step, (time.perf_counter() - t0) * 1000)
+
+
+def costs() -> dict[str, float]:
+    with _costs_lock:
+        return {step: round(ms, 1) for step, ms in _costs.items()}
+
+
+def load_costs(step_costs: dict[str, float]) -> None:
+    """Adopt costs measured elsewhere, e.g. the parent's calibration in a worker process."""
+    with _costs_lock:
+        _costs.update(step_costs)
+
+
+def reset_costs() -> None:
+    with _costs_lock:
+        _costs.clear()
+        _costs.update(_DEFAULT_COSTS)
+
+
+def calibrate() -> dict[str, float]:
+    """Time each optional step once on synthetic cards and use that as its cost.
+
+    The cards carry text in every ROI: Tesseract returns almost at once on
+    blank input, which would seed costs far below a real read's.
+    """
+    import cv2
+    import numpy as np
+
+    from .back_parser import parse_back
+    from .classifier import MODEL_QR
+    from .config import settings
+    from .front_parser import parse_front_roi
+    from .orientation import _osd_orientation
+    from .rectifier import _deskew
+    from .roi_loader import get_back_rois, get_front_rois, to_pixel_box
+
+    front = _text_card(settings.card_width, settings.card_height, get_front_rois().values(), to_pixel_box)
+    back = _text_card(settings.card_width, settings.card_height, get_back_rois(MODEL_QR).values(), to_pixel_box)
+    # The back as photographed: tilted a few degrees on a darker background.
+    photo = np.full((1200, 1600, 3), 90, dtype=np.uint8)
+    photo[281:281 + back.shape[0], 294:294 + back.shape[1]] = back
+    photo = cv2.warpAffine(photo, cv2.getRotationMatrix2D((800, 600), 4, 1.0), (1600, 1200),
+                           borderValue=(90, 90, 90))
+    x1, y1, x2, y2 = to_pixel_box(get_front_rois()["domicilio"], front.shape[1], front.shape[0])
+    roi = cv2.resize(cv2.cvtColor(front[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY), None, fx=1.5, fy=1.5)
+
+    steps = {
+        "denoise": lambda: cv2.fastNlMeansDenoising(roi, h=10),
+        "deskew": lambda: _deskew(photo),
+        "osd": lambda: _osd_orientation(photo),
+        "back_attempt_2": lambda: parse_back(back, attempt=2, model_id=MODEL_QR, feature_bboxes=[]),
+        "back_attempt_3": lambda: parse_back(back, attempt=3, model_id=MODEL_QR, feature_bboxes=[]),
+        "front_attempt_2": lambda: parse_front_roi(front, "domicilio", attempt=2),
+        "front_attempt_3": lambda: parse_front_roi(front, "domicilio", attempt=3),
+    }
+    measured_ms = {}
+    for step, fn in steps.items():
+        t0 = time.perf_counter()
+        fn()
+        measured_ms[step] = (time.perf_counter() - t0) * 1000
+    with _costs_lock:
+        _costs.update(measured_ms)
+    return costs()
+
+
+def _text_card(width: int, height: int, rois, to_pixel_box):
+    """Light card with dark capitals and digits filling each ROI, line by line."""
+    import cv2
+    import numpy as np
+
+    card = np.full((height, width, 3), 235, dtype=np.uint8)
+    text = "IDMEX<1234567890123456<< GARCIA LOPEZ MARIA 0234 CALLE 5 DE MAYO 12"
+    for roi in rois:
+        x1, y1, x2, y2 = to_pixel_box(roi, width, height)
+        line_h = max(12, min(36, y2 - y1))
+        scale = line_h / 40
+        for y in range(y1 + line_h - 4, y2, line_h):
+            cv2.putText(card, text, (x1 + 2, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (25, 25, 30),
+                        max(1, round(scale * 2)), cv2.LINE_AA)
+    return card
@@ -2,11 +2,45 @@
 
 from __future__ import annotations
 
+import re
+from typing import Any, Callable, NamedTuple, TypeVar
+
 import cv2
 import numpy as np
 import pytesseract
 
-from .config import settings
+from . import deadline
+from .ocr_engine import EngineUnavailable, OcrTimeout, Word, get_engine_pool
+
+T = TypeVar("T")
+
+# Names and addresses (block mode).
+BLOCK_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,-/#"
+
+
+class OcrRead(NamedTuple):
+    """Recognised text plus the words (and Tesseract confidences) it came from."""
+
+    text: str
+    words: list[Word]
+
+    def confidence(self, value: str | None = None) -> float | None:
+        """Mean confidence (0–1) of the words that make up ``value``.
+
+        Falls back to every word when none match (e.g. after character
+        corrections); None when nothing was recognised.
+        """
+        words = [w for w in self.words if w.conf >= 0]
+        key = _alnum(value or "")
+        if key:
+            words = [w for w in words if _alnum(w.text) and (_alnum(w.text) in key or key in _alnum(w.text))] or words
+        if not words:
+            return None
+        return round(sum(w.conf for w in words) / len(words) / 100, 3)
+
+
+def _alnum(text: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", text.upper())
 
 
 def ocr_region(
@@ -26,7 +60,8 @@ def ocr_region(
         lang: Tesseract language.
 
     Returns:
-        Raw OCR text (uppercase, trimmed).
+        Raw OCR text (uppercase, trimmed); empty if the run's deadline
+        passed before or during recognition.
     """
     if roi_image is None or roi_image.size == 0:
         return ""
@@ -34,15 +69,30 @@ def ocr_region(
     gray = cv2.cvtColor(roi_image, cv2.COLOR_BGR2GRAY) if len(roi_image.shape) == 3 else roi_image
     processed = _preprocess(gray, attempt)
 
-    config = f"--oem 1 --psm {psm} -c tessedit_char_whitelist={whitelist}"
+    text = _recognise(
+        lang, lambda engine, timeout: engine.image_to_string(processed, psm=psm, whitelist=whitelist, timeout=timeout),
+    )
+    return _normalise(text, whitelist) if text is not None else ""
 
-    try:
-        pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
-        text = pytesseract.image_to_string(processed, lang=lang, config=config)
-    except (pytesseract.TesseractError, FileNotFoundError, OSError):
-        return ""
 
-    return _normalise(text, whitelist)
+def read_region(
+    roi_image: np.ndarray,
+    attempt: int = 1,
+    psm: int = 7,
+    whitelist: str = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<",
+    lang: str = "spa",
+) -> OcrRead:
+    """:func:`ocr_region` that also keeps Tesseract's words and their confidences."""
+    if roi_image is None or roi_image.size == 0:
+        return OcrRead("", [])
+
+    gray = cv2.cvtColor(roi_image, cv2.COLOR_BGR2GRAY) if len(roi_image.shape) == 3 else roi_image
+    processed = _preprocess(gray, attempt)
+
+    words = _recognise(
+        lang, lambda engine, timeout: engine.image_to_data(processed, psm=psm, whitelist=whitelist, timeout=timeout),
+    ) or []
+    return OcrRead(_normalise(_join_words(words), whitelist), words)
 
 
 def ocr_block(
@@ -54,8 +104,107 @@ def ocr_block(
 
     Uses a broader whitelist suitable for names and addresses.
     """
-    whitelist = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,-/#"
-    return ocr_region(roi_image, attempt=attempt, psm=6, whitelist=whitelist, lang=lang)
+    return ocr_region(roi_image, attempt=attempt, psm=6, whitelist=BLOCK_WHITELIST, lang=lang)
+
+
+def ocr_montage(
+    crops: dict[str, np.ndarray],
+    attempt: int = 1,
+    psm: int = 6,
+    whitelist: str = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<",
+    lang: str = "spa",
+) -> dict[str, OcrRead]:
+    """OCR several ROI crops of one side with a single Tesseract call.
+
+    The preprocessed crops are stacked into one image, separated by blank
+    bands of ``_MONTAGE_GAP`` rows; each recognised word goes back to the
+    crop its vertical centre falls in.  Tesseract's fixed per-call cost
+    (process start, or page setup in-process) is paid once per side.
+
+    Returns:
+        A read per crop name, its text normalised as :func:`ocr_region`
+        does (lines kept); empty if the run's deadline cut the call short.
+    """
+    parts = {
+        name: _preprocess(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if len(crop.shape) == 3 else crop, attempt)
+        for name, crop in crops.items()
+        if crop is not None and crop.size
+    }
+    reads = {name: OcrRead("", []) for name in crops}
+    if not parts:
+        return reads
+
+    montage, spans = _build_montage(parts)
+    words = _recognise(
+        lang, lambda engine, timeout: engine.image_to_data(montage, psm=psm, whitelist=whitelist, timeout=timeout),
+    )
+    for name, crop_words in _split_words(words or [], spans).items():
+        reads[name] = OcrRead(_normalise(_join_words(crop_words), whitelist), crop_words)
+    return reads
+
+
+def _recognise(lang: str, call: Callable[[Any, float], T]) -> T | None:
+    """Run ``call(engine, timeout)`` on a pooled engine within the run's deadline.
+
+    Returns None if the deadline passed before or during recognition, or
+    no engine could run it.
+    """
+    run_deadline = deadline.current()
+    timeout = 0.0
+    if run_deadline is not None:
+        timeout = run_deadline.remaining_s()
+        if timeout <= 0:
+            run_deadline.exceeded = True
+            return None
+
+    try:
+        with get_engine_pool(lang).borrow(timeout=timeout or None) as engine:
+            return call(engine, timeout)
+    except (OcrTimeout, EngineUnavailable, pytesseract.TesseractError, OSError):
+        if run_deadline is not None and run_deadline.expired():
+            run_deadline.exceeded = True  # timed out, or waited out the deadline for an engine
+        return None
+
+
+# ── Montage ──────────────────────────────────────────────────────────────────
+_MONTAGE_GAP = 40  # blank rows between crops (and around the montage)
+
+
+def _build_montage(parts: dict[str, np.ndarray]) -> tuple[np.ndarray, dict[str, tuple[int, int]]]:
+    """Stack binarised crops top to bottom on white; return it and each crop's row span."""
+    width = max(part.shape[1] for part in parts.values()) + 2 * _MONTAGE_GAP
+    height = sum(part.shape[0] for part in parts.values()) + (len(parts) + 1) * _MONTAGE_GAP
+    montage = np.full((height, width), 255, dtype=np.uint8)
+
+    spans: dict[str, tuple[int, int]] = {}
+    y = _MONTAGE_GAP
+    for name, part in parts.items():
+        h, w = part.shape[:2]
+        montage[y:y + h, _MONTAGE_GAP:_MONTAGE_GAP + w] = part
+        spans[name] = (y, y + h)
+        y += h + _MONTAGE_GAP
+    return montage, spans
+
+
+def _split_words(words: list[Word], spans: dict[str, tuple[int, int]]) -> dict[str, list[Word]]:
+    """Hand each montage word to the crop whose row span holds its vertical centre."""
+    by_crop: dict[str, list[Word]] = {name: [] for name in spans}
+    half_gap = _MONTAGE_GAP / 2
+    for word in words:
+        centre = word.top + word.height / 2
+        for name, (top, bottom) in spans.items():
+            if top - half_gap <= centre < bottom + half_gap:
+                by_crop[name].append(word)
+                break
+    return by_crop
+
+
+def _join_words(words: list[Word]) -> str:
+    """Text of ``words``: one line per Tesseract line, words separated by spaces."""
+    lines: dict[tuple[int, int, int], list[str]] = {}
+    for word in words:
+        lines.setdefault(word.line, []).append(word.text)
+    return "\n".join(" ".join(texts) for texts in lines.values())
 
 
 def _preprocess(gray: np.ndarray, attempt: int) -> np.ndarray:
@@ -79,8 +228,10 @@ def _preprocess(gray: np.ndarray, attempt: int) -> np.ndarray:
         h, w = gray.shape[:2]
         upscaled = cv2.resize(gray, (int(w * 1.5), int(h * 1.5)),
                               interpolation=cv2.INTER_CUBIC)
-        denoised = cv2.fastNlMeansDenoising(upscaled, h=10)
-        _, binary = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        if deadline.allows("denoise"):  # the slowest filter; dropped when time is short
+            with deadline.measured("denoise"):
+                upscaled = cv2.fastNlMeansDenoising(upscaled, h=10)
+        _, binary = cv2.threshold(upscaled, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
         return binary
 
 
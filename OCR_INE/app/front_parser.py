@@ -6,57 +6,126 @@ import re
 
 import numpy as np
 
+from . import glyph_ocr
 from .aligner import crop_roi
-from .extractor import ocr_block
+from .config import settings
+from .extractor import BLOCK_WHITELIST, OcrRead, ocr_montage, read_region
+from .image_context import ImageContext, as_context
 from .models import FieldResult
 from .roi_loader import get_front_rois
+from .timing import timed
 
 
 def parse_front(
-    rectified_front: np.ndarray,
+    rectified_front: np.ndarray | ImageContext,
     attempt: int = 1,
 ) -> dict:
-    """Extract all front-side fields from a rectified INE front image.
+    """Extract all front-side fields from a rectified INE front image (or its context).
 
     Returns:
         dict with keys: nombre, apellido_paterno, apellido_materno,
-        domicilio_calle, domicilio_colonia, domicilio_codigo_postal, seccional
+        domicilio_calle, domicilio_colonia, domicilio_codigo_postal, seccional,
+        and ocr_confidence (Tesseract's confidence per non-empty field)
     """
-    rois = get_front_rois()
+    if settings.ocr_montage:
+        return parse_front_montage(rectified_front, list(get_front_rois()), attempt=attempt)
+    ctx = as_context(rectified_front)
     results: dict = {}
+    for roi_name in get_front_rois():
+        merge_fields(results, parse_front_roi(ctx, roi_name, attempt=attempt))
+    return results
+
+
+def parse_front_roi(
+    rectified_front: np.ndarray | ImageContext,
+    roi_name: str,
+    attempt: int = 1,
+) -> dict:
+    """Extract the fields held by a single front ROI.
 
-    # ── Apellidos ────────────────────────────────────────────────────────
-    if "apellidos" in rois:
-        roi_img = crop_roi(rectified_front, rois["apellidos"])
-        raw = ocr_block(roi_img, attempt=attempt)
-        ap, am = _split_apellidos(raw)
-        results["apellido_paterno"] = ap
-        results["apellido_materno"] = am
-
-    # ── Nombre ───────────────────────────────────────────────────────────
-    if "nombre" in rois:
-        roi_img = crop_roi(rectified_front, rois["nombre"])
-        raw = ocr_block(roi_img, attempt=attempt)
-        results["nombre"] = _clean_name(raw)
-
-    # ── Domicilio ────────────────────────────────────────────────────────
-    if "domicilio" in rois:
-        roi_img = crop_roi(rectified_front, rois["domicilio"])
-        raw = ocr_block(roi_img, attempt=attempt)
-        calle, colonia, cp = _parse_domicilio(raw)
-        results["domicilio_calle"] = calle
-        results["domicilio_colonia"] = colonia
-        results["domicilio_codigo_postal"] = cp
-
-    # ── Sección electoral ────────────────────────────────────────────────
-    if "seccion" in rois:
-        roi_img = crop_roi(rectified_front, rois["seccion"])
-        raw = ocr_block(roi_img, attempt=attempt)
-        results["seccional"] = _parse_seccion(raw)
+    Each ROI is independent, so the pipeline can OCR them concurrently;
+    given the side's :class:`ImageContext` they all crop one grayscale.
+    Unknown ROI names yield an empty dict.
+    """
+    rois = get_front_rois()
+    parser = _ROI_PARSERS.get(roi_name)
+    if parser is None or roi_name not in rois:
+        return {}
 
+    roi_img = crop_roi(as_context(rectified_front).gray, rois[roi_name])
+    read = _read_fixed_font(roi_name, roi_img, attempt)
+    if read is None:
+        read = read_region(roi_img, attempt=attempt, psm=6, whitelist=BLOCK_WHITELIST)
+    return _with_confidence(parser(read.text), read)
+
+
+def parse_front_montage(
+    rectified_front: np.ndarray | ImageContext,
+    roi_names: list[str],
+    attempt: int = 1,
+) -> dict:
+    """Extract the fields of several front ROIs with one OCR call (``OCR_MONTAGE``)."""
+    rois = get_front_rois()
+    names = [name for name in roi_names if name in _ROI_PARSERS and name in rois]
+    gray = as_context(rectified_front).gray
+    crops = {name: crop_roi(gray, rois[name]) for name in names}
+    reads = {name: _read_fixed_font(name, crop, attempt) for name, crop in crops.items()}
+    reads = {name: read for name, read in reads.items() if read is not None}
+    reads.update(ocr_montage(
+        {name: crop for name, crop in crops.items() if name not in reads},
+        attempt=attempt, psm=6, whitelist=BLOCK_WHITELIST,
+    ))
+    results: dict = {}
+    for name in names:
+        merge_fields(results, _with_confidence(_ROI_PARSERS[name](reads[name].text), reads[name]))
     return results
 
 
+def merge_fields(fields: dict, part: dict) -> None:
+    """Add one ROI's fields to ``fields``, merging their ``ocr_confidence`` maps."""
+    part = dict(part)
+    confidence = part.pop("ocr_confidence", {})
+    fields.update(part)
+    if confidence:
+        fields.setdefault("ocr_confidence", {}).update(confidence)
+
+
+def _read_fixed_font(roi_name: str, roi_img: np.ndarray, attempt: int) -> OcrRead | None:
+    """Glyph-template read of a ``FIXED_FONT_ROIS`` ROI on attempt 1; None means use Tesseract."""
+    if attempt != 1 or not glyph_ocr.enabled_for(roi_name):
+        return None
+    with timed(f"front_roi.{roi_name}.glyphs"):
+        return glyph_ocr.recognise(roi_img)
+
+
+def _with_confidence(fields: dict, read: OcrRead) -> dict:
+    confidence = {name: read.confidence(value) for name, value in fields.items() if value}
+    fields["ocr_confidence"] = {name: c for name, c in confidence.items() if c is not None}
+    return fields
+
+
+def _fields_apellidos(raw: str) -> dict:
+    ap, am = _split_apellidos(raw)
+    return {"apellido_paterno": ap, "apellido_materno": am}
+
+
+def _fields_nombre(raw: str) -> dict:
+    return {"nombre": _clean_name(raw)}
+
+
+def _fields_domicilio(raw: str) -> dict:
+    calle, colonia, cp = _parse_domicilio(raw)
+    return {
+        "domicilio_calle": calle,
+        "domicilio_colonia": colonia,
+        "domicilio_codigo_postal": cp,
+    }
+
+
+def _fields_seccion(raw: str) -> dict:
+    return {"seccional": _parse_seccion(raw)}
+
+
 def _split_apellidos(text: str) -> tuple[str, str]:
     """Split OCR text into apellido_paterno and apellido_materno.
 
@@ -139,3 +208,11 @@ def _parse_seccion(text: str) -> str:
         num = match.group(1)
         return num.zfill(4)  # pad to 4 digits
     return ""
+
+
+_ROI_PARSERS = {
+    "apellidos": _fields_apellidos,
+    "nombre": _fields_nombre,
+    "domicilio": _fields_domicilio,
+    "seccion": _fields_seccion,
+}
@@ -0,0 +1,223 @@
+"""Template-matching recognizer for ROIs printed in a fixed font (MRZ, sección).
+
+Glyphs are segmented with connected components, scaled to a common cell
+and classified against templates rendered once from the font in
+``FIXED_FONT_PATH`` (an OCR-B TTF for the INE) with one
+normalised-correlation matrix product per ROI.  A read is only returned
+when every glyph matches clearly; otherwise the caller falls back to
+Tesseract.  No font is bundled: with ``FIXED_FONT_PATH`` unset the
+recognizer is off and every ROI goes to Tesseract.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .config import settings
+from .extractor import OcrRead
+from .ocr_engine import Word
+
+logger = logging.getLogger(__name__)
+
+CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ<"
+_CELL = (20, 28)  # (w, h) every glyph is scaled to before matching
+_MIN_SCORE = 0.6  # correlation (after the aspect penalty) a glyph needs
+_MIN_MARGIN = 0.04  # over the runner-up
+_ASPECT_WEIGHT = 0.3
+_DESCENDER = 0.25  # of the cap height, kept below the baseline (the tail of Q)
+# Pairs that differ by a stroke in most fixed fonts; a slim margin between them
+# is left to the field parsers' digit-context corrections instead of rejected.
+_CONFUSABLE = {frozenset(pair) for pair in ("O0", "I1", "S5", "B8")}
+
+
+class _Templates:
+    """Normalised template matrix (chars × cell pixels) and each glyph's aspect ratio."""
+
+    def __init__(self, font_path: str, size: int = 96):
+        font = ImageFont.truetype(font_path, size)
+        _, cap_top, _, baseline = _ink_box(_render("H", font))
+        cap = baseline - cap_top
+        vectors, aspects = [], []
+        for char in CHARSET:
+            img = _render(char, font)
+            x0, _, x1, _ = _ink_box(img)
+            glyph = img[cap_top:baseline + round(_DESCENDER * cap), x0:x1]
+            vectors.append(_vector(glyph))
+            aspects.append((x1 - x0) / cap)
+        self.matrix = np.stack(vectors)
+        self.log_aspects = np.log(np.array(aspects))
+        self.max_aspect = max(aspects)
+
+
+_templates: _Templates | None = None
+_templates_loaded = False
+_templates_lock = threading.Lock()
+
+
+def get_templates() -> _Templates | None:
+    """Templates for ``settings.fixed_font_path``, rendered on first use; None if unset or it won't load."""
+    global _templates, _templates_loaded
+    if not _templates_loaded:
+        with _templates_lock:
+            if not _templates_loaded and settings.fixed_font_path:
+                try:
+                    _templates = _Templates(settings.fixed_font_path)
+                except OSError as e:
+                    logger.warning("Fixed-font recognizer disabled: cannot load %s (%s)", settings.fixed_font_path, e)
+                _templates_loaded = True
+    return _templates
+
+
+def reset_templates() -> None:
+    global _templates, _templates_loaded
+    with _templates_lock:
+        _templates = None
+        _templates_loaded = False
+
+
+def enabled_for(roi: str) -> bool:
+    """Whether ``roi`` is listed in ``FIXED_FONT_ROIS`` and a ``FIXED_FONT_PATH`` is configured."""
+    if not settings.fixed_font_path:
+        return False
+    return roi in {name.strip() for name in settings.fixed_font_rois.split(",") if name.strip()}
+
+
+def recognise(roi_image: np.ndarray) -> OcrRead | None:
+    """Read a fixed-font ROI; None when any glyph is unclear (use Tesseract then).
+
+    The read has one :class:`Word` per run of glyphs, its confidence the
+    weakest glyph score of the run (0–100).
+    """
+    if roi_image is None or roi_image.size == 0:
+        return None
+    gray = cv2.cvtColor(roi_image, cv2.COLOR_BGR2GRAY) if roi_image.ndim == 3 else roi_image
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+    templates = get_templates()
+    lines = _lines(ink)
+    if templates is None or not lines:
+        return None
+    # Blank rows below the crop, so cells of a line cut at its baseline still get their descender area.
+    padded = np.pad(ink, ((0, ink.shape[0]), (0, 0)))
+
+    words: list[Word] = []
+    for line_no, (top, bottom) in enumerate(lines, start=1):
+        boxes = _glyph_boxes(ink[top:bottom])
+        if not boxes:
+            return None
+        cap_top = int(np.median([b[1] for b in boxes]))
+        cap_bottom = int(np.median([b[3] for b in boxes]))
+        height = cap_bottom - cap_top
+        if height < 6:
+            return None
+
+        aspects = np.array([(x1 - x0) / height for x0, _, x1, _ in boxes])
+        if aspects.max() > 1.5 * templates.max_aspect:
+            return None  # touching glyphs
+        cell_bottom = top + cap_bottom + round(_DESCENDER * height)
+        cells = np.stack([_vector(padded[top + cap_top:cell_bottom, x0:x1], ink=True) for x0, _, x1, _ in boxes])
+        scores = cells @ templates.matrix.T
+        scores -= _ASPECT_WEIGHT * np.abs(np.log(aspects)[:, None] - templates.log_aspects[None, :])
+
+        order = np.argsort(scores, axis=1)
+        first, second = order[:, -1], order[:, -2]
+        best = np.take_along_axis(scores, first[:, None], axis=1)[:, 0]
+        margin = best - np.take_along_axis(scores, second[:, None], axis=1)[:, 0]
+        if best.min() < _MIN_SCORE:
+            return None
+        for i in np.nonzero(margin < _MIN_MARGIN)[0]:
+            if frozenset((CHARSET[first[i]], CHARSET[second[i]])) not in _CONFUSABLE:
+                return None
+        chars = [CHARSET[i] for i in first]
+
+        for start, end in _runs(boxes, height):
+            x0, x1 = boxes[start][0], boxes[end - 1][2]
+            words.append(Word(
+                text="".join(chars[start:end]), left=int(x0), top=top + cap_top,
+                width=int(x1 - x0), height=height, conf=round(float(best[start:end].min()) * 100, 1),
+                line=(1, 1, line_no),
+            ))
+
+    text = "\n".join(
+        " ".join(w.text for w in words if w.line[2] == n) for n in range(1, len(lines) + 1)
+    )
+    return OcrRead(text, words)
+
+
+# ── Segmentation ─────────────────────────────────────────────────────────────
+def _lines(ink: np.ndarray) -> list[tuple[int, int]]:
+    """Row bands holding text, dropping slivers of neighbouring lines cut by the crop."""
+    rows = ink.sum(axis=1) > max(2, ink.shape[1] * 0.005)
+    bands, start = [], None
+    for y, on in enumerate([*rows, False]):
+        if on and start is None:
+            start = y
+        elif not on and start is not None:
+            bands.append((start, y))
+            start = None
+    if not bands:
+        return []
+    tallest = max(b - a for a, b in bands)
+    # A band touching the crop edge is a cut sliver only if it is shorter than
+    # the full lines; a tightly cropped line touches both edges and is kept.
+    return [
+        (a, b) for a, b in bands
+        if b - a >= 0.5 * tallest and (b - a >= 0.9 * tallest or (a > 0 and b < ink.shape[0]))
+    ]
+
+
+def _glyph_boxes(band: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """(x0, y0, x1, y1) per glyph, left to right; pieces overlapping in x are merged."""
+    count, _, stats, _ = cv2.connectedComponentsWithStats(band.astype(np.uint8), connectivity=8)
+    height = band.shape[0]
+    boxes = sorted(
+        (x, y, x + w, y + h)
+        for x, y, w, h, area in stats[1:count]
+        if h >= 0.3 * height and area >= 0.02 * height * height
+    )
+    merged: list[list[int]] = []
+    for x0, y0, x1, y1 in boxes:
+        if merged and x0 < merged[-1][2] - 0.5 * (x1 - x0):
+            last = merged[-1]
+            last[:] = [min(last[0], x0), min(last[1], y0), max(last[2], x1), max(last[3], y1)]
+        else:
+            merged.append([x0, y0, x1, y1])
+    return [tuple(box) for box in merged]
+
+
+def _runs(boxes: list[tuple[int, int, int, int]], height: int) -> list[tuple[int, int]]:
+    """Index ranges of glyphs separated by less than a word gap."""
+    runs, start = [], 0
+    for i in range(1, len(boxes)):
+        if boxes[i][0] - boxes[i - 1][2] > 0.6 * height:
+            runs.append((start, i))
+            start = i
+    runs.append((start, len(boxes)))
+    return runs
+
+
+# ── Cells ────────────────────────────────────────────────────────────────────
+def _vector(glyph: np.ndarray, ink: bool = False) -> np.ndarray:
+    """Zero-mean, unit-norm cell of a glyph (ink = 1) for normalised correlation."""
+    cell = glyph.astype(np.float32) if ink else (glyph < 128).astype(np.float32)
+    cell = cv2.resize(cell, _CELL, interpolation=cv2.INTER_AREA).ravel()
+    cell -= cell.mean()
+    norm = np.linalg.norm(cell)
+    return cell / norm if norm else cell
+
+
+def _render(char: str, font: ImageFont.FreeTypeFont) -> np.ndarray:
+    size = int(font.size * 1.6)
+    img = Image.new("L", (size, size), 255)
+    ImageDraw.Draw(img).text((font.size // 4, font.size // 8), char, fill=0, font=font)
+    return np.asarray(img)
+
+
+def _ink_box(img: np.ndarray) -> tuple[int, int, int, int]:
+    ys, xs = np.nonzero(img < 128)
+    return int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
@@ -0,0 +1,94 @@
+"""Per-image analysis context — derived buffers computed once and shared by the stages."""
+
+from __future__ import annotations
+
+import threading
+from functools import partial
+from typing import Callable, TypeVar
+
+import cv2
+import numpy as np
+
+T = TypeVar("T")
+
+
+class ImageContext:
+    """One BGR image and the buffers derived from it.
+
+    Grayscale, the pyrDown pyramid, area downscales, the histogram and
+    Canny edge maps are each computed on first use and memoised, so the
+    stages that need the same buffer (quality, corner detection, deskew,
+    both barcode detectors, every ROI crop) share a single copy.  Safe to
+    use from the concurrent ROI stages.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self.computed: dict[tuple, int] = {}  # buffer key → bytes, for the benchmarks
+        self._memo: dict[tuple, object] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.image.shape
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Full-resolution grayscale."""
+        return self._get(("gray",), lambda: (
+            cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY) if self.image.ndim == 3 else self.image
+        ))
+
+    def pyramid(self, max_dim: int) -> tuple[np.ndarray, float]:
+        """Grayscale halved (pyrDown) until its long side is <= max_dim.
+
+        Returns:
+            (level, scale) where scale = level size / original size.
+        """
+        level, scale, index = self.gray, 1.0, 0
+        while max(level.shape[:2]) > max_dim:
+            index += 1
+            level = self._get(("pyramid", index), partial(cv2.pyrDown, level))
+            scale /= 2.0
+        return level, scale
+
+    def downscaled(self, max_dim: int) -> tuple[np.ndarray, float]:
+        """Grayscale resized (INTER_AREA) so its long side is at most max_dim."""
+        gray = self.gray
+        h, w = gray.shape[:2]
+        if max(h, w) <= max_dim:
+            return gray, 1.0
+        scale = max_dim / max(h, w)
+        resized = self._get(("downscaled", max_dim), lambda: cv2.resize(
+            gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA,
+        ))
+        return resized, scale
+
+    def histogram(self, max_dim: int | None = None) -> np.ndarray:
+        """256-bin histogram (float32 counts) of the grayscale, or of its :meth:`downscaled` ``max_dim``."""
+        def compute() -> np.ndarray:
+            gray = self.gray if max_dim is None else self.downscaled(max_dim)[0]
+            return cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        return self._get(("histogram", max_dim), compute)
+
+    def edges(self, max_dim: int, blur: bool = False) -> np.ndarray:
+        """Canny(50, 150) of :meth:`pyramid` level ``max_dim``, optionally after a 5×5 Gaussian blur."""
+        def compute() -> np.ndarray:
+            level, _ = self.pyramid(max_dim)
+            if blur:
+                level = cv2.GaussianBlur(level, (5, 5), 0)
+            return cv2.Canny(level, 50, 150, apertureSize=3)
+        return self._get(("edges", max_dim, blur), compute)
+
+    def _get(self, key: tuple, compute: Callable[[], T]) -> T:
+        with self._lock:
+            if key not in self._memo:
+                value = compute()
+                self._memo[key] = value
+                self.computed[key] = value.nbytes if value is not self.image else 0
+            return self._memo[key]
+
+
+def as_context(image: np.ndarray | ImageContext) -> ImageContext:
+    """``image`` itself if already a context, else a fresh one around it."""
+    return image if isinstance(image, ImageContext) else ImageContext(image)
@@ -0,0 +1,513 @@
+"""Asynchronous extraction jobs backed by a pluggable broker.
+
+A job stores the two images as a payload plus a small status record.
+Workers lease jobs from the broker. A lease that is not completed in
+time, because the worker died or hung, becomes leasable again, so every
+job is delivered at least once. The payload is deleted as soon as the job
+reaches a final state. Status records expire after JOB_TTL_S.
+
+Brokers:
+    sqlite  one file, shared by every process on a single node.
+    redis   any Redis-protocol server, shared by several OCR containers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config import settings
+from .models import JobStatus
+from .resp import RespClient
+from .worker_pool import PoolBusy, get_worker_pool
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_PURGE_INTERVAL_S = 60  # how often a broker sweeps expired records / leases
+
+_LEASE_EXPIRED = {
+    "error_code": "JOB_LEASE_EXPIRED",
+    "message": "Job did not finish within its lease on any attempt",
+}
+
+
+@dataclass
+class Lease:
+    job_id: str
+    front: bytes
+    back: bytes
+    attempts: int
+
+
+def _new_job(job_id: str, callback_url: str | None, now: float) -> dict:
+    return {
+        "job_id": job_id, "status": QUEUED, "attempts": 0,
+        "created_at": now, "updated_at": now, "callback_url": callback_url,
+        "result": None, "error": None,
+    }
+
+
+# ── SQLite ───────────────────────────────────────────────────────────────────
+class SqliteBroker:
+    """Job queue in a SQLite file; leases are claimed under BEGIN IMMEDIATE."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            lease_until REAL,
+            callback_url TEXT,
+            result TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+        CREATE TABLE IF NOT EXISTS payloads (
+            job_id TEXT PRIMARY KEY,
+            front BLOB NOT NULL,
+            back BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, lease_s: int, max_attempts: int, ttl_s: int):
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.ttl_s = ttl_s
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(self._SCHEMA)
+
+    def submit(self, front: bytes, back: bytes, callback_url: str | None = None) -> str:
+        job = _new_job(uuid.uuid4().hex, callback_url, time.time())
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO jobs (job_id, status, attempts, created_at, updated_at, callback_url)"
+                " VALUES (:job_id, :status, :attempts, :created_at, :updated_at, :callback_url)",
+                job,
+            )
+            db.execute("INSERT INTO payloads VALUES (?, ?, ?)", (job["job_id"], front, back))
+        return job["job_id"]
+
+    def lease(self) -> Lease | None:
+        now = time.time()
+        self._maybe_purge(now)
+        self._fail_exhausted(now)
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT job_id, attempts FROM jobs"
+                " WHERE status = ? OR (status = ? AND lease_until < ? AND attempts < ?)"
+                " ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now, self.max_attempts),
+            ).fetchone()
+            if row is None:
+                return None
+            attempts = row["attempts"] + 1
+            db.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, lease_until = ?, updated_at = ?"
+                " WHERE job_id = ?",
+                (RUNNING, attempts, now + self.lease_s, now, row["job_id"]),
+            )
+            payload = db.execute(
+                "SELECT front, back FROM payloads WHERE job_id = ?", (row["job_id"],),
+            ).fetchone()
+        if payload is None:
+            self._finish(row["job_id"], FAILED, error={
+                "error_code": "JOB_PAYLOAD_MISSING", "message": "Job images are no longer available",
+            })
+            return None
+        return Lease(row["job_id"], bytes(payload["front"]), bytes(payload["back"]), attempts)
+
+    def renew(self, job_id: str) -> None:
+        """Extend a running job's lease by another JOB_LEASE_S."""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (now + self.lease_s, now, job_id, RUNNING),
+            )
+
+    def complete(self, job_id: str, result: dict) -> None:
+        self._finish(job_id, DONE, result=result)
+
+    def fail(self, job_id: str, error: dict) -> str:
+        """Requeue the job, or mark it failed once it has used all attempts."""
+        with self._transaction() as db:
+            row = db.execute("SELECT attempts FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is not None and row["attempts"] < self.max_attempts:
+                db.execute(
+                    "UPDATE jobs SET status = ?, lease_until = NULL, error = ?, updated_at = ?"
+                    " WHERE job_id = ?",
+                    (QUEUED, json.dumps(error), time.time(), job_id),
+                )
+                return QUEUED
+        self._finish(job_id, FAILED, error=error)
+        return FAILED
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT job_id, status, attempts, created_at, updated_at, callback_url, result, error"
+                " FROM jobs WHERE job_id = ?", (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["error"] = json.loads(job["error"]) if job["error"] else None
+        return job
+
+    def has_payload(self, job_id: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM payloads WHERE job_id = ?", (job_id,),
+            ).fetchone() is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Serialise writers across threads (lock) and processes (BEGIN IMMEDIATE)."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _finish(self, job_id: str, status: str, result: dict | None = None, error: dict | None = None) -> None:
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, lease_until = NULL, result = ?, error = ?, updated_at = ?"
+                " WHERE job_id = ?",
+                (status, json.dumps(result) if result else None,
+                 json.dumps(error) if error else None, time.time(), job_id),
+            )
+            db.execute("DELETE FROM payloads WHERE job_id = ?", (job_id,))
+
+    def _fail_exhausted(self, now: float) -> None:
+        """Mark jobs whose last allowed lease expired as failed."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT job_id FROM jobs WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (RUNNING, now, self.max_attempts),
+            ).fetchall()
+        for row in rows:
+            self._finish(row["job_id"], FAILED, error=_LEASE_EXPIRED)
+
+    def _maybe_purge(self, now: float) -> None:
+        if now - self._purged_at < _PURGE_INTERVAL_S:
+            return
+        self._purged_at = now
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, now - self.ttl_s),
+            )
+
+
+# ── Redis ────────────────────────────────────────────────────────────────────
+class RedisBroker:
+    """Job queue in a Redis-protocol server.
+
+    ``queue`` holds waiting ids and RPOPLPUSH moves one atomically into
+    ``processing``. Ids left in ``processing`` with an expired lease
+    are pushed back by whichever worker sweeps first, and LREM makes sure
+    only one does. Every key carries a TTL, so nothing outlives JOB_TTL_S.
+    """
+
+    def __init__(self, client: RespClient, lease_s: int, max_attempts: int, ttl_s: int,
+                 prefix: str = "ocr-ine:jobs:"):
+        self.client = client
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.ttl_s = ttl_s
+        self.prefix = prefix
+        self._queue = prefix + "queue"
+        self._processing = prefix + "processing"
+        self._swept_at = 0.0
+
+    def submit(self, front: bytes, back: bytes, callback_url: str | None = None) -> str:
+        job = _new_job(uuid.uuid4().hex, callback_url, time.time())
+        job_id = job["job_id"]
+        self.client.execute("SET", self._key("front", job_id), front, "EX", self.ttl_s)
+        self.client.execute("SET", self._key("back", job_id), back, "EX", self.ttl_s)
+        self._save(job)
+        self.client.execute("LPUSH", self._queue, job_id)
+        return job_id
+
+    def lease(self) -> Lease | None:
+        now = time.time()
+        self._maybe_sweep(now)
+        while True:
+            raw_id = self.client.execute("RPOPLPUSH", self._queue, self._processing)
+            if raw_id is None:
+                return None
+            job_id = raw_id.decode("utf-8")
+            job = self.get(job_id)
+            front = self.client.execute("GET", self._key("front", job_id))
+            back = self.client.execute("GET", self._key("back", job_id))
+            if job is None or job["status"] in (DONE, FAILED) or front is None or back is None:
+                # Expired, or a duplicate delivery of a job that already finished.
+                self.client.execute("LREM", self._processing, 0, job_id)
+                continue
+            job.update(status=RUNNING, attempts=job["attempts"] + 1,
+                       lease_until=now + self.lease_s, updated_at=now)
+            self._save(job)
+            return Lease(job_id, front, back, job["attempts"])
+
+    def renew(self, job_id: str) -> None:
+        """Extend a running job's lease by another JOB_LEASE_S."""
+        job = self.get(job_id)
+        if job is not None and job["status"] == RUNNING:
+            now = time.time()
+            job.update(lease_until=now + self.lease_s, updated_at=now)
+            self._save(job)
+
+    def complete(self, job_id: str, result: dict) -> None:
+        self._finish(job_id, DONE, result=result)
+
+    def fail(self, job_id: str, error: dict) -> str:
+        """Requeue the job, or mark it failed once it has used all attempts."""
+        job = self.get(job_id)
+        if job is not None and job["attempts"] < self.max_attempts:
+            job.update(status=QUEUED, error=error, lease_until=None, updated_at=time.time())
+            self._save(job)
+            if self.client.execute("LREM", self._processing, 0, job_id):
+                self.client.execute("LPUSH", self._queue, job_id)
+            return QUEUED
+        self._finish(job_id, FAILED, error=error)
+        return FAILED
+
+    def get(self, job_id: str) -> dict | None:
+        raw = self.client.execute("GET", self._key("meta", job_id))
+        return json.loads(raw) if raw is not None else None
+
+    def has_payload(self, job_id: str) -> bool:
+        return self.client.execute("GET", self._key("front", job_id)) is not None
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _finish(self, job_id: str, status: str, result: dict | None = None, error: dict | None = None) -> None:
+        job = self.get(job_id)
+        if job is not None:
+            job.update(status=status, result=result, error=error, lease_until=None, updated_at=time.time())
+            self._save(job)
+        self.client.execute("DEL", self._key("front", job_id), self._key("back", job_id))
+        self.client.execute("LREM", self._processing, 0, job_id)
+
+    def _save(self, job: dict) -> None:
+        payload = json.dumps(job, separators=(",", ":"))
+        self.client.execute("SET", self._key("meta", job["job_id"]), payload, "EX", self.ttl_s)
+
+    def _key(self, kind: str, job_id: str) -> str:
+        return f"{self.prefix}{kind}:{job_id}"
+
+    def _maybe_sweep(self, now: float) -> None:
+        """Push ids whose lease expired back onto the queue, or fail them once out of attempts."""
+        if now - self._swept_at < min(_PURGE_INTERVAL_S, self.lease_s):
+            return
+        self._swept_at = now
+        for raw_id in self.client.execute("LRANGE", self._processing, 0, -1) or []:
+            job_id = raw_id.decode("utf-8")
+            job = self.get(job_id)
+            if job is None or job["status"] in (DONE, FAILED):
+                self.client.execute("LREM", self._processing, 0, job_id)
+                continue
+            # A queued job here was popped by a worker that died before leasing it.
+            deadline = job.get("lease_until") or job["updated_at"] + self.lease_s
+            if deadline >= now:
+                continue
+            if job["status"] == RUNNING and job["attempts"] >= self.max_attempts:
+                self._finish(job_id, FAILED, error=_LEASE_EXPIRED)
+            elif self.client.execute("LREM", self._processing, 0, job_id):
+                self.client.execute("LPUSH", self._queue, job_id)
+
+
+# ── Runner ───────────────────────────────────────────────────────────────────
+class JobRunner:
+    """Background tasks that lease jobs and run them on the worker pool."""
+
+    def __init__(self, broker, concurrency: int = 1, poll_interval_s: float = 1.0):
+        self.broker = broker
+        self.concurrency = max(1, concurrency)
+        self.poll_interval_s = poll_interval_s
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_once(self) -> bool:
+        """Process one job if one is waiting. Returns True if a job was leased.
+
+        Nothing is leased while the worker pool is full, so a job's lease
+        does not tick away behind interactive traffic.
+        """
+        if not get_worker_pool().has_capacity():
+            return False
+        lease = await asyncio.to_thread(self.broker.lease)
+        if lease is None:
+            return False
+
+        try:
+            result = await self._process(lease)
+        except PoolBusy:
+            logger.warning("Job %s: worker pool stayed full (attempt %d)", lease.job_id, lease.attempts)
+            status = await asyncio.to_thread(self.broker.fail, lease.job_id, {
+                "error_code": "SERVICE_BUSY", "message": "OCR workers stayed busy for the whole lease",
+            })
+        except Exception as e:
+            logger.exception("Job %s failed (attempt %d): %s", lease.job_id, lease.attempts, e)
+            status = await asyncio.to_thread(self.broker.fail, lease.job_id, {
+                "error_code": "OCR_INTERNAL_ERROR", "message": "Internal OCR processing error",
+            })
+        else:
+            await asyncio.to_thread(self.broker.complete, lease.job_id, result.model_dump())
+            status = DONE
+        logger.info("Job %s: %s (attempt %d)", lease.job_id, status, lease.attempts)
+
+        if status in (DONE, FAILED):
+            job = await asyncio.to_thread(self.broker.get, lease.job_id)
+            if job and job.get("callback_url"):
+                await notify_callback(job)
+        return True
+
+    async def _process(self, lease: Lease):
+        """Run the leased job, renewing its lease while the pool is full.
+
+        Gives up with :class:`PoolBusy` after one lease's worth of waiting.
+        """
+        give_up_at = time.monotonic() + self.broker.lease_s
+        while True:
+            try:
+                result, _wait_ms = await get_worker_pool().process(lease.front, lease.back)
+                return result
+            except PoolBusy as e:
+                # Interactive traffic took the pool after the lease; keep the job ours meanwhile.
+                if time.monotonic() + e.retry_after > give_up_at:
+                    raise
+                await asyncio.to_thread(self.broker.renew, lease.job_id)
+                await asyncio.sleep(e.retry_after)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                leased = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Job broker unavailable: %s", e)
+                leased = False
+            if not leased:
+                await asyncio.sleep(self.poll_interval_s)
+
+
+def callback_hosts() -> set[str]:
+    """Hosts allowed as callback targets (JOB_CALLBACK_HOSTS); empty = callbacks off."""
+    return {h.strip().lower() for h in settings.job_callback_hosts.split(",") if h.strip()}
+
+
+def callback_allowed(url: str) -> bool:
+    """True if ``url`` is http(s) to an allowed host that resolves only to public addresses.
+
+    The result carries CURP, name and address, so it must never reach an
+    internal service: loopback, private, link-local and reserved ranges
+    are refused even for an allowed host name.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return False
+    if parts.hostname.lower() not in callback_hosts():
+        return False
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = _resolve(parts.hostname, port)
+    except (OSError, ValueError):
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(a.split("%")[0]).is_global for a in addresses)
+
+
+def _resolve(host: str, port: int) -> list[str]:
+    return [info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+
+
+async def notify_callback(job: dict, attempts: int = 3) -> bool:
+    """POST the final job status to its callback URL, retrying with backoff."""
+    if not await asyncio.to_thread(callback_allowed, job["callback_url"]):
+        logger.warning("Job %s callback skipped: %s is not an allowed target", job["job_id"], job["callback_url"])
+        return False
+    body = JobStatus(**job).model_dump(mode="json")
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        for attempt in range(attempts):
+            try:
+                r = await client.post(job["callback_url"], json=body)
+                if r.status_code < 500:
+                    return r.is_success
+            except httpx.HTTPError as e:
+                logger.warning("Job %s callback failed: %s", job["job_id"], e)
+            if attempt + 1 < attempts:
+                await asyncio.sleep(2 ** attempt)
+    return False
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_job_broker():
+    """Return the configured broker, or None when JOB_BROKER=none."""
+    global _broker
+    if _broker is None and settings.job_broker != "none":
+        with _broker_lock:
+            if _broker is None:
+                _broker = _build_broker()
+    return _broker
+
+
+def reset_job_broker() -> None:
+    global _broker
+    with _broker_lock:
+        if _broker is not None:
+            _broker.close()
+        _broker = None
+
+
+def _build_broker():
+    options = dict(lease_s=settings.job_lease_s, max_attempts=settings.job_max_attempts,
+                   ttl_s=settings.job_ttl_s)
+    if settings.job_broker == "redis":
+        return RedisBroker(RespClient(settings.redis_url), **options)
+    return SqliteBroker(settings.job_db_path, **options)
@@ -2,15 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, File, Header, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, Header, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
+from .batch import items_from_archive, items_from_form, run_batch
 from .config import settings
-from .models import ErrorResponse, OcrResponse
-from .pipeline import process_ine
+from .jobs import JobRunner, callback_allowed, callback_hosts, get_job_broker, reset_job_broker
+from .models import ErrorResponse, JobStatus, OcrResponse, PreflightResponse
+from .preflight import SIDES, preflight
+from . import deadline, metrics, orientation
+from .result_cache import content_key, get_result_cache
+from .singleflight import SingleFlight
+from .timing import server_timing_header
+from .uploads import UploadRejected, check_content_type, check_size
+from .worker_pool import PoolBusy, get_worker_pool, shutdown_worker_pool
 
 # ── Logging ──────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -19,11 +29,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Responses a retry should recompute rather than replay for the client_request_id's TTL.
+_UNCACHEABLE_WARNINGS = {"image_decode_failed", "retake_photo", "time_budget_exceeded"}
+
 # ── App ──────────────────────────────────────────────────────────────────────
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if settings.deadline_calibrate:
+        costs = await asyncio.to_thread(deadline.calibrate)
+        logger.info("Deadline step costs (ms): %s", costs)
+    runner = None
+    broker = get_job_broker()
+    if broker is not None:
+        runner = JobRunner(
+            broker,
+            concurrency=settings.job_workers or get_worker_pool().workers,
+            poll_interval_s=settings.job_poll_interval_s,
+        )
+        runner.start()
+    yield
+    if runner is not None:
+        await runner.stop()
+    reset_job_broker()
+    shutdown_worker_pool()
+
+
 app = FastAPI(
     title="OCR INE Service",
     version="1.0.0",
     description="Extracts data from Mexican INE cards using OCR.",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -33,13 +68,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-MAX_SIZE = settings.max_image_size_mb * 1024 * 1024  # bytes
+# Concurrent extractions of the same image pair share one pipeline run.
+inflight = SingleFlight()
 
 
 # ── Health ───────────────────────────────────────────────────────────────────
 @app.get("/health")
 async def health():
-    return {"status": "ok", "service": "ocr-ine"}
+    cache = get_result_cache()
+    return {
+        "status": "ok",
+        "service": "ocr-ine",
+        "workers": get_worker_pool().stats(),
+        "inflight": inflight.stats(),
+        "orientation": orientation.stats.snapshot(),
+        "deadline_costs_ms": deadline.costs(),
+        "cache": cache.stats() if cache is not None else None,
+    }
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+def _worker_gauges() -> list[str]:
+    stats = get_worker_pool().stats()
+    return [
+        *metrics.sample("ocr_ine_workers_running", "Extractions running now.", stats["running"]),
+        *metrics.sample("ocr_ine_queue_depth", "Extractions waiting for a worker.", stats["queue_depth"]),
+        *metrics.sample("ocr_ine_rejected_total", "Requests answered 503 because the queue was full.",
+                        stats["rejected"], kind="counter"),
+    ]
+
+
+metrics.registry.add_collector(_worker_gauges)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of latencies, counters and worker gauges."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # ── Extract ──────────────────────────────────────────────────────────────────
@@ -47,108 +112,309 @@ async def health():
 async def extract_ine(
     front_image: UploadFile = File(..., description="Front side of the INE card"),
     back_image: UploadFile = File(..., description="Back side of the INE card"),
+    client_request_id: str | None = Form(None, description="Idempotency key"),
+    timings: bool = Query(False, description="Include the per-stage timing breakdown"),
     x_api_key: str | None = Header(None, alias="X-Api-Key"),
+    x_deadline_ms: int | None = Header(
+        None, alias="X-Deadline-Ms", gt=0, description="Answer within this many ms (capped at TIME_BUDGET_MS)",
+    ),
 ):
-    """Extract data from INE images (front + back)."""
+    """Extract data from INE images (front + back).
+
+    Every computed response carries a ``Server-Timing`` header; with
+    ``?timings=true`` the body also includes the full ``timings`` object.
+    The deadline starts now, so time spent queued for a worker counts.
+    """
+    run_deadline = deadline.Deadline(min(x_deadline_ms or settings.time_budget_ms, settings.time_budget_ms))
 
     # ── Auth ─────────────────────────────────────────────────────────────
-    if settings.api_key != "change-me-in-production":
-        if x_api_key != settings.api_key:
-            raise HTTPException(status_code=401, detail="Invalid API key")
+    _check_api_key(x_api_key)
 
     # ── Validate content types ───────────────────────────────────────────
-    allowed_types = {"image/jpeg", "image/png", "image/jpg"}
+    try:
+        check_content_type("front_image", front_image.content_type)
+        check_content_type("back_image", back_image.content_type)
+    except UploadRejected as e:
+        return _rejected(e)
 
-    if front_image.content_type and front_image.content_type not in allowed_types:
+    # ── Read files ───────────────────────────────────────────────────────
+    try:
+        front_bytes = await front_image.read()
+        back_bytes = await back_image.read()
+    except Exception as e:
+        logger.error("Failed to read uploaded files: %s", e)
         return JSONResponse(
-            status_code=415,
+            status_code=422,
             content=ErrorResponse(
-                error_code="UNSUPPORTED_MEDIA_TYPE",
-                message=f"front_image type '{front_image.content_type}' not supported",
+                error_code="IMAGE_DECODE_FAILED",
+                message="Failed to read uploaded images",
             ).model_dump(),
         )
 
-    if back_image.content_type and back_image.content_type not in allowed_types:
+    # ── Size validation ──────────────────────────────────────────────────
+    try:
+        check_size("front_image", len(front_bytes))
+        check_size("back_image", len(back_bytes))
+    except UploadRejected as e:
+        return _rejected(e)
+
+    # ── Idempotency ──────────────────────────────────────────────────────
+    cache = get_result_cache() if client_request_id else None
+    if cache is not None:
+        # The id is only a replay key for the same pair of photos.
+        pair_key = _pair_key(front_bytes, back_bytes)
+        cached = cache.get("request", client_request_id)
+        if cached is not None and cached.get("content") == pair_key:
+            logger.info("OCR replayed from cache: client_request_id=%s", client_request_id)
+            return JSONResponse(content=cached["result"], headers={"Server-Timing": 'cache;desc="replay"'})
+        if cached is not None and "content" in cached:
+            return JSONResponse(
+                status_code=409,
+                content=ErrorResponse(
+                    error_code="CLIENT_REQUEST_ID_CONFLICT",
+                    message="client_request_id was already used with different images",
+                ).model_dump(),
+            )
+
+    # ── Process ──────────────────────────────────────────────────────────
+    try:
+        (result, wait_ms), shared = await _process_pair(front_bytes, back_bytes, run_deadline)
+        logger.info(
+            "OCR completed: client_request_id=%s, model=%s, attempts=%d, ms=%d, wait_ms=%d, shared=%s, warnings=%s",
+            client_request_id,
+            result.model_id,
+            result.attempts,
+            result.processing_ms,
+            wait_ms,
+            shared,
+            result.warnings,
+        )
+        if cache is not None and not _UNCACHEABLE_WARNINGS & set(result.warnings):
+            cache.set("request", client_request_id, {"content": pair_key, "result": result.model_dump(mode="json")})
+
+        content = result.model_dump(mode="json")
+        headers = {}
+        if result.timings is not None:
+            headers["Server-Timing"] = server_timing_header(result.timings)
+            if timings:
+                content["timings"] = result.timings.model_dump(mode="json")
+        return JSONResponse(content=content, headers=headers)
+    except PoolBusy as e:
+        logger.warning("OCR workers saturated: queue_depth=%d", e.queue_depth)
+        return JSONResponse(
+            status_code=503,
+            headers={"Retry-After": str(e.retry_after)},
+            content=ErrorResponse(
+                error_code="SERVICE_BUSY",
+                message="OCR workers are busy, retry later",
+                details={"queue_depth": e.queue_depth},
+            ).model_dump(),
+        )
+    except Exception as e:
+        logger.exception("OCR pipeline error: %s", e)
+        return JSONResponse(
+            status_code=500,
+            content=ErrorResponse(
+                error_code="OCR_INTERNAL_ERROR",
+                message="Internal OCR processing error",
+            ).model_dump(),
+        )
+
+
+# ── Preflight ────────────────────────────────────────────────────────────────
+@app.post("/v1/ine/preflight", response_model=PreflightResponse)
+async def preflight_side(
+    image: UploadFile = File(..., description="One side of the INE card"),
+    side: str = Form(..., description="front | back"),
+    x_api_key: str | None = Header(None, alias="X-Api-Key"),
+):
+    """Quality metrics, card contour and (back) model of one photo, without OCR.
+
+    Meant for live capture: gate the ``/v1/ine/extract`` call on ``usable``.
+    Runs outside the extraction worker pool, so it answers even when that is busy.
+    """
+    _check_api_key(x_api_key)
+
+    if side not in SIDES:
         return JSONResponse(
-            status_code=415,
+            status_code=422,
             content=ErrorResponse(
-                error_code="UNSUPPORTED_MEDIA_TYPE",
-                message=f"back_image type '{back_image.content_type}' not supported",
+                error_code="INVALID_SIDE",
+                message="side must be 'front' or 'back'",
             ).model_dump(),
         )
 
-    # ── Read files ───────────────────────────────────────────────────────
     try:
-        front_bytes = await front_image.read()
-        back_bytes = await back_image.read()
-    except Exception as e:
-        logger.error("Failed to read uploaded files: %s", e)
+        check_content_type("image", image.content_type)
+        raw_bytes = await image.read()
+        check_size("image", len(raw_bytes))
+    except UploadRejected as e:
+        return _rejected(e)
+
+    result = await asyncio.to_thread(preflight, raw_bytes, side)
+    if result is None:
         return JSONResponse(
             status_code=422,
             content=ErrorResponse(
                 error_code="IMAGE_DECODE_FAILED",
-                message="Failed to read uploaded images",
+                message="image could not be decoded",
             ).model_dump(),
         )
+    metrics.preflight_seconds.observe(result.processing_ms / 1000, side)
+    return result
 
-    # ── Size validation ──────────────────────────────────────────────────
-    if len(front_bytes) > MAX_SIZE:
+
+# ── Batch ────────────────────────────────────────────────────────────────────
+@app.post("/v1/ine/extract-batch")
+async def extract_ine_batch(
+    request: Request,
+    x_api_key: str | None = Header(None, alias="X-Api-Key"),
+):
+    """Extract many card pairs; streams one NDJSON line per pair as it finishes.
+
+    Multipart body with ``front.<id>`` / ``back.<id>`` file fields, or a
+    single ``archive`` field holding a zip/tar of ``<id>_front.jpg`` /
+    ``<id>_back.jpg`` entries.
+    """
+    _check_api_key(x_api_key)
+
+    try:
+        form = await request.form(
+            max_files=settings.batch_max_items * 2 + 1,
+            max_fields=settings.batch_max_items * 2 + 1,
+        )
+    except Exception as e:
+        logger.warning("Failed to parse batch upload: %s", e)
         return JSONResponse(
             status_code=422,
             content=ErrorResponse(
-                error_code="IMAGE_TOO_LARGE",
-                message=f"front_image exceeds {settings.max_image_size_mb}MB limit",
-                details={"which": "front_image"},
+                error_code="INVALID_BATCH",
+                message=f"Batch must be multipart with at most {settings.batch_max_items} pairs",
             ).model_dump(),
         )
 
-    if len(back_bytes) > MAX_SIZE:
+    archive = form.get("archive")
+    try:
+        if archive is not None and not isinstance(archive, str):
+            items = await asyncio.to_thread(items_from_archive, archive.file)
+        else:
+            items = items_from_form(form)
+    except UploadRejected as e:
+        await form.close()
+        return _rejected(e)
+
+    concurrency = settings.batch_concurrency or get_worker_pool().workers
+    logger.info("Batch started: items=%d, concurrency=%d", len(items), concurrency)
+
+    async def process(front_bytes: bytes, back_bytes: bytes) -> OcrResponse:
+        (result, _wait_ms), _shared = await _process_pair(front_bytes, back_bytes)
+        return result
+
+    async def stream():
+        try:
+            async for line in run_batch(items, process, concurrency):
+                yield line
+        finally:
+            await form.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ── Jobs ─────────────────────────────────────────────────────────────────────
+@app.post("/v1/ine/jobs", response_model=JobStatus, status_code=202)
+async def create_job(
+    front_image: UploadFile = File(..., description="Front side of the INE card"),
+    back_image: UploadFile = File(..., description="Back side of the INE card"),
+    callback_url: str | None = Form(None, description="POSTed the final job status"),
+    x_api_key: str | None = Header(None, alias="X-Api-Key"),
+):
+    """Queue an extraction; poll ``GET /v1/ine/jobs/{job_id}`` or wait for the callback."""
+    _check_api_key(x_api_key)
+
+    broker = get_job_broker()
+    if broker is None:
         return JSONResponse(
-            status_code=422,
+            status_code=404,
             content=ErrorResponse(
-                error_code="IMAGE_TOO_LARGE",
-                message=f"back_image exceeds {settings.max_image_size_mb}MB limit",
-                details={"which": "back_image"},
+                error_code="JOBS_DISABLED",
+                message="Asynchronous jobs are disabled on this service",
             ).model_dump(),
         )
 
-    if len(front_bytes) < 1000:
+    if callback_url and not callback_hosts():
         return JSONResponse(
             status_code=422,
             content=ErrorResponse(
-                error_code="IMAGE_TOO_SMALL",
-                message="front_image is too small — likely not a valid image",
-                details={"which": "front_image"},
+                error_code="CALLBACKS_DISABLED",
+                message="Job callbacks are disabled on this service; poll the job instead",
             ).model_dump(),
         )
-
-    if len(back_bytes) < 1000:
+    if callback_url and not await asyncio.to_thread(callback_allowed, callback_url):
         return JSONResponse(
             status_code=422,
             content=ErrorResponse(
-                error_code="IMAGE_TOO_SMALL",
-                message="back_image is too small — likely not a valid image",
-                details={"which": "back_image"},
+                error_code="INVALID_CALLBACK_URL",
+                message="callback_url must be an http(s) URL on an allowed, public host",
             ).model_dump(),
         )
 
-    # ── Process ──────────────────────────────────────────────────────────
     try:
-        result = process_ine(front_bytes, back_bytes)
-        logger.info(
-            "OCR completed: model=%s, attempts=%d, ms=%d, warnings=%s",
-            result.model_id,
-            result.attempts,
-            result.processing_ms,
-            result.warnings,
-        )
-        return result
-    except Exception as e:
-        logger.exception("OCR pipeline error: %s", e)
+        check_content_type("front_image", front_image.content_type)
+        check_content_type("back_image", back_image.content_type)
+        front_bytes = await front_image.read()
+        back_bytes = await back_image.read()
+        check_size("front_image", len(front_bytes))
+        check_size("back_image", len(back_bytes))
+    except UploadRejected as e:
+        return _rejected(e)
+
+    job_id = await asyncio.to_thread(broker.submit, front_bytes, back_bytes, callback_url)
+    logger.info("Job queued: job_id=%s, callback=%s", job_id, bool(callback_url))
+    return JobStatus(**await asyncio.to_thread(broker.get, job_id))
+
+
+@app.get("/v1/ine/jobs/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: str,
+    x_api_key: str | None = Header(None, alias="X-Api-Key"),
+):
+    """Status of a job, with its result once done."""
+    _check_api_key(x_api_key)
+
+    broker = get_job_broker()
+    job = await asyncio.to_thread(broker.get, job_id) if broker is not None else None
+    if job is None:
         return JSONResponse(
-            status_code=500,
+            status_code=404,
             content=ErrorResponse(
-                error_code="OCR_INTERNAL_ERROR",
-                message="Internal OCR processing error",
+                error_code="JOB_NOT_FOUND",
+                message=f"Job '{job_id}' not found or expired",
             ).model_dump(),
         )
+    return JobStatus(**job)
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+def _check_api_key(x_api_key: str | None) -> None:
+    if settings.api_key != "change-me-in-production":
+        if x_api_key != settings.api_key:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+
+
+async def _process_pair(front_bytes: bytes, back_bytes: bytes, run_deadline: deadline.Deadline | None = None):
+    """Run one pair on the worker pool, sharing identical in-flight pairs.
+
+    Callers that join an in-flight run get the result of the first caller's
+    deadline.
+    """
+    return await inflight.do(
+        _pair_key(front_bytes, back_bytes), lambda: get_worker_pool().process(front_bytes, back_bytes, run_deadline=run_deadline),
+    )
+
+
+def _pair_key(front_bytes: bytes, back_bytes: bytes) -> str:
+    return f"{content_key(front_bytes)}:{content_key(back_bytes)}"
+
+
+def _rejected(e: UploadRejected) -> JSONResponse:
+    return JSONResponse(status_code=e.status_code, content=e.error.model_dump())
@@ -0,0 +1,223 @@
+"""Prometheus metrics — a minimal registry rendered in the text exposition format.
+
+Only counters and histograms with a fixed label set are needed, so this
+avoids a client-library dependency.  Observations happen in the API
+process: workers (threads or child processes) return each run's timings
+on the result and :func:`record_extraction` folds them in.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+from typing import Callable, Iterable
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Seconds; spans a 5 ms ROI up to the 10 s time budget.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {} if labels else {(): 0.0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_num(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return series[2] if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    labels = _labels(self.labels + ("le",), label_values + (_num(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _labels(self.labels + ("le",), label_values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                base = _labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{base} {_num(total)}")
+                lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Add a callback producing exposition lines at scrape time (gauges)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# ── Service metrics ──────────────────────────────────────────────────────────
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    "ocr_ine_stage_duration_seconds", "Wall-clock time per pipeline stage.", ("stage",),
+))
+extraction_seconds = registry.register(Histogram(
+    "ocr_ine_extraction_duration_seconds", "Wall-clock time of a full pipeline run.",
+))
+queue_wait_seconds = registry.register(Histogram(
+    "ocr_ine_queue_wait_seconds", "Time a request waited for a free worker.",
+))
+extractions_total = registry.register(Counter(
+    "ocr_ine_extractions_total", "Pipeline runs by detected card model.", ("model_id",),
+))
+warnings_total = registry.register(Counter(
+    "ocr_ine_warnings_total", "Warnings attached to responses.", ("warning",),
+))
+retries_total = registry.register(Counter(
+    "ocr_ine_back_retries_total", "Extra back-side OCR attempts taken for missing or weak fields.",
+))
+preflight_seconds = registry.register(Histogram(
+    "ocr_ine_preflight_duration_seconds", "Wall-clock time of a preflight check.", ("side",),
+))
+budget_exceeded_total = registry.register(Counter(
+    "ocr_ine_time_budget_exceeded_total", "Runs cut short by their deadline (TIME_BUDGET_MS or X-Deadline-Ms).",
+))
+
+# Cumulative CPU seconds reported by worker processes (their own plus their
+# Tesseract children), keyed by pid.
+_child_cpu: dict[int, float] = {}
+_child_cpu_lock = threading.Lock()
+
+
+def child_cpu_seconds(include_self: bool = False) -> float:
+    """CPU time (user + system) of this process's terminated children.
+
+    Worker processes pass ``include_self`` since they are themselves OCR
+    children of the API process.
+    """
+    if resource is None:
+        return 0.0
+    usages = [resource.getrusage(resource.RUSAGE_CHILDREN)]
+    if include_self:
+        usages.append(resource.getrusage(resource.RUSAGE_SELF))
+    return sum(u.ru_utime + u.ru_stime for u in usages)
+
+
+def record_extraction(result, wait_ms: float, worker_pid: int | None = None,
+                      worker_child_cpu_s: float | None = None) -> None:
+    """Fold one finished pipeline run (an OcrResponse with timings) into the service metrics."""
+    retries = 0
+    for stage in result.timings.stages if result.timings else ():
+        stage_seconds.observe(stage.ms / 1000, stage.name)
+        retries += _is_back_retry(stage.name)
+    extraction_seconds.observe(result.processing_ms / 1000)
+    queue_wait_seconds.observe(wait_ms / 1000)
+    extractions_total.inc(1, result.model_id)
+    for warning in result.warnings:
+        warnings_total.inc(1, warning)
+        if warning == "time_budget_exceeded":
+            budget_exceeded_total.inc()
+    if retries:
+        retries_total.inc(retries)
+    if worker_pid is not None and worker_pid != os.getpid() and worker_child_cpu_s is not None:
+        with _child_cpu_lock:
+            _child_cpu[worker_pid] = worker_child_cpu_s
+
+
+def _is_back_retry(stage: str) -> bool:
+    """``back_attempt_N`` with N >= 2 — ``attempts`` also counts speculative and barcode passes."""
+    prefix, _, attempt = stage.rpartition("_")
+    return prefix == "back_attempt" and attempt.isdigit() and int(attempt) >= 2
+
+
+def sample(name: str, help: str, value: float, kind: str = "gauge") -> list[str]:
+    """Exposition lines for a single unlabelled value read at scrape time."""
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_num(round(value, 3))}"]
+
+
+def _collect_child_cpu() -> list[str]:
+    with _child_cpu_lock:
+        total = child_cpu_seconds() + sum(_child_cpu.values())
+    return sample(
+        "ocr_ine_ocr_child_cpu_seconds_total",
+        "CPU time of OCR child processes (Tesseract subprocesses, worker processes).",
+        total, kind="counter",
+    )
+
+
+registry.add_collector(_collect_child_cpu)
+
+
+def render() -> str:
+    return registry.render()
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class FieldResult(BaseModel):
@@ -46,6 +46,20 @@ class DomicilioFields(BaseModel):
     seccional: FieldResult = FieldResult()
 
 
+class StageTiming(BaseModel):
+    """Wall-clock time of one stage, ROI or attempt."""
+    name: str
+    ms: float
+    parent: str | None = None  # enclosing stage, e.g. back_attempt_2 for a back ROI
+
+
+class Timings(BaseModel):
+    """Where the time of one extraction went."""
+    total_ms: int = 0
+    queue_ms: int = 0
+    stages: list[StageTiming] = []
+
+
 class OcrResponse(BaseModel):
     """Full OCR extraction response."""
     model_id: str = "MODEL_UNKNOWN"
@@ -55,6 +69,20 @@ class OcrResponse(BaseModel):
     warnings: list[str] = []
     processing_ms: int = 0
     attempts: int = 1
+    # Opt-in (``?timings=true``); never serialised, cached or sent to jobs/batches.
+    timings: Timings | None = Field(default=None, exclude=True)
+
+
+class PreflightResponse(BaseModel):
+    """Quick capture check of one side, before paying for an extraction."""
+    side: str  # front | back
+    quality: QualitySide = QualitySide()
+    card_detected: bool = False
+    card_corners: list[list[float]] | None = None  # TL, TR, BR, BL as (x, y) fractions of the photo
+    model_id: str | None = None  # back only
+    usable: bool = False  # no metric past the QUALITY_GATE_* limits
+    warnings: list[str] = []
+    processing_ms: int = 0
 
 
 class ErrorResponse(BaseModel):
@@ -62,3 +90,23 @@ class ErrorResponse(BaseModel):
     error_code: str
     message: str
     details: dict | None = None
+
+
+class BatchItemResult(BaseModel):
+    """One NDJSON line of a batch extraction."""
+    item_id: str
+    status: str  # ok | error
+    result: OcrResponse | None = None
+    error: ErrorResponse | None = None
+
+
+class JobStatus(BaseModel):
+    """State of an asynchronous extraction job."""
+    job_id: str
+    status: str  # queued | running | done | failed
+    attempts: int = 0
+    created_at: float
+    updated_at: float
+    callback_url: str | None = None
+    result: OcrResponse | None = None
+    error: ErrorResponse | None = None
@@ -0,0 +1,300 @@
+"""Pool of long-lived Tesseract engines shared by the OCR stages.
+
+Uses the in-process ``tesserocr`` binding when installed, otherwise falls
+back to the ``pytesseract`` subprocess backend (configured once per pool).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+from pytesseract import Output
+
+from .config import settings
+
+try:  # optional native binding
+    import tesserocr
+except ImportError:  # pragma: no cover - depends on the build environment
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+
+class EngineUnavailable(RuntimeError):
+    """Raised when a Tesseract engine cannot be initialised."""
+
+
+class OcrTimeout(RuntimeError):
+    """Raised when recognition did not finish within its timeout."""
+
+
+class Word(NamedTuple):
+    """One recognised word with its box in image pixels."""
+
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+    conf: float  # 0–100, as reported by Tesseract
+    line: tuple[int, int, int]  # (block, paragraph, line) it belongs to
+
+
+def _words(data: dict) -> list[Word]:
+    """Words (level 5 rows) from Tesseract's TSV columns."""
+    return [
+        Word(
+            text=str(data["text"][i]), left=int(data["left"][i]), top=int(data["top"][i]),
+            width=int(data["width"][i]), height=int(data["height"][i]), conf=float(data["conf"][i]),
+            line=(int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i])),
+        )
+        for i in range(len(data["level"]))
+        if int(data["level"][i]) == 5 and str(data["text"][i]).strip()
+    ]
+
+
+_TSV_COLUMNS = (
+    "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+    "left", "top", "width", "height", "conf", "text",
+)
+
+
+class _TesserocrEngine:
+    """In-process engine backed by the Tesseract C API (via tesserocr)."""
+
+    backend = "tesserocr"
+
+    def __init__(self, lang: str, tessdata: str | None):
+        self._lang = lang
+        self._tessdata = tessdata
+        self._osd_api = None
+        try:
+            self._api = self._new_api(lang, tesserocr.PSM.SINGLE_LINE)
+        except RuntimeError as e:
+            raise EngineUnavailable(str(e)) from e
+
+    def _new_api(self, lang: str, psm: int):
+        kwargs = {"lang": lang, "psm": psm, "oem": tesserocr.OEM.LSTM_ONLY}
+        if self._tessdata:
+            kwargs["path"] = self._tessdata
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    def image_to_string(self, image: np.ndarray, psm: int, whitelist: str, timeout: float = 0) -> str:
+        api = self._api
+        api.SetPageSegMode(psm)
+        api.SetVariable("tessedit_char_whitelist", whitelist)
+        api.SetImage(Image.fromarray(image))
+        try:
+            # Recognize() polls its cancel deadline between words (0 = none).
+            if timeout and not api.Recognize(max(1, int(timeout * 1000))):
+                raise OcrTimeout(f"recognition exceeded {timeout:.2f}s")
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def image_to_data(self, image: np.ndarray, psm: int, whitelist: str, timeout: float = 0) -> list[Word]:
+        api = self._api
+        api.SetPageSegMode(psm)
+        api.SetVariable("tessedit_char_whitelist", whitelist)
+        api.SetImage(Image.fromarray(image))
+        try:
+            if timeout and not api.Recognize(max(1, int(timeout * 1000))):
+                raise OcrTimeout(f"recognition exceeded {timeout:.2f}s")
+            rows = [line.split("\t") for line in api.GetTSVText(0).splitlines()]
+        finally:
+            api.Clear()
+        rows = [row + [""] * (len(_TSV_COLUMNS) - len(row)) for row in rows]
+        return _words({col: [row[i] for row in rows] for i, col in enumerate(_TSV_COLUMNS)})
+
+    def orientation(self, image: np.ndarray, timeout: float = 0) -> int:
+        """Return the clockwise rotation (0/90/180/270) that uprights the text.
+
+        DetectOrientationScript cannot be cancelled, so ``timeout`` is not
+        enforced here; callers skip OSD when the deadline is too close.
+        """
+        if self._osd_api is None:
+            try:
+                self._osd_api = self._new_api("osd", tesserocr.PSM.OSD_ONLY)
+            except RuntimeError as e:
+                raise EngineUnavailable(str(e)) from e
+        api = self._osd_api
+        api.SetImage(Image.fromarray(image))
+        try:
+            osd = api.DetectOrientationScript()
+        finally:
+            api.Clear()
+        if not osd:
+            return 0
+        return (360 - int(osd["orient_deg"])) % 360
+
+    def close(self) -> None:
+        self._api.End()
+        if self._osd_api is not None:
+            self._osd_api.End()
+
+
+class _SubprocessEngine:
+    """Fallback engine that shells out to the ``tesseract`` binary."""
+
+    backend = "subprocess"
+
+    def __init__(self, lang: str, tessdata: str | None):
+        self._lang = lang
+        self._tessdata_config = f'--tessdata-dir "{tessdata}" ' if tessdata else ""
+
+    def image_to_string(self, image: np.ndarray, psm: int, whitelist: str, timeout: float = 0) -> str:
+        config = (
+            f"{self._tessdata_config}--oem 1 --psm {psm} "
+            f"-c tessedit_char_whitelist={whitelist}"
+        )
+        with _subprocess_timeout(timeout):
+            return pytesseract.image_to_string(image, lang=self._lang, config=config, timeout=timeout)
+
+    def image_to_data(self, image: np.ndarray, psm: int, whitelist: str, timeout: float = 0) -> list[Word]:
+        config = (
+            f"{self._tessdata_config}--oem 1 --psm {psm} "
+            f"-c tessedit_char_whitelist={whitelist}"
+        )
+        with _subprocess_timeout(timeout):
+            data = pytesseract.image_to_data(
+                image, lang=self._lang, config=config, output_type=Output.DICT, timeout=timeout,
+            )
+        return _words(data)
+
+    def orientation(self, image: np.ndarray, timeout: float = 0) -> int:
+        """Return the clockwise rotation (0/90/180/270) that uprights the text."""
+        with _subprocess_timeout(timeout):
+            results = pytesseract.image_to_osd(
+                image, config=self._tessdata_config.strip(), output_type=Output.DICT, timeout=timeout,
+            )
+        return int(results["rotate"])
+
+    def close(self) -> None:
+        pass
+
+
+@contextmanager
+def _subprocess_timeout(timeout: float) -> Iterator[None]:
+    """Translate pytesseract's kill-on-timeout RuntimeError into OcrTimeout."""
+    try:
+        yield
+    except RuntimeError as e:
+        if timeout and "timeout" in str(e).lower():
+            raise OcrTimeout(f"tesseract killed after {timeout:.2f}s") from e
+        raise
+
+
+class EnginePool:
+    """Thread-safe pool of initialised engines.
+
+    Engines are created lazily up to ``size`` and handed out with
+    :meth:`borrow`.  A borrower that finds the pool exhausted blocks until
+    another thread returns an engine.
+    """
+
+    def __init__(self, factory, size: int):
+        self._factory = factory
+        self._size = max(1, size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @contextmanager
+    def borrow(self, timeout: float | None = None) -> Iterator:
+        """Borrow an engine for the duration of the ``with`` block."""
+        engine = self._acquire(timeout)
+        try:
+            yield engine
+        finally:
+            self._idle.put(engine)
+
+    def _acquire(self, timeout: float | None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self._size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise EngineUnavailable("no OCR engine became available in time") from None
+
+    def stats(self) -> dict:
+        return {"size": self._size, "created": self._created, "idle": self._idle.qsize()}
+
+    def close(self) -> None:
+        """Shut down every idle engine (borrowed engines are left alone)."""
+        while True:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            engine.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools: dict[str, EnginePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_engine_pool(lang: str = "spa") -> EnginePool:
+    """Return the process-wide engine pool for ``lang``, creating it on first use."""
+    pool = _pools.get(lang)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(lang)
+            if pool is None:
+                pool = _pools[lang] = _build_pool(lang)
+    return pool
+
+
+def reset_engine_pools() -> None:
+    """Close every process-wide pool (used after fork and in tests)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+def _build_pool(lang: str) -> EnginePool:
+    backend = settings.ocr_engine
+    if backend == "auto":
+        backend = "tesserocr" if tesserocr is not None else "subprocess"
+    if backend == "tesserocr" and tesserocr is None:
+        logger.warning("OCR_ENGINE=tesserocr but tesserocr is not installed; using subprocess")
+        backend = "subprocess"
+
+    tessdata = settings.tessdata_path or None
+    if backend == "tesserocr":
+        engine_cls = _TesserocrEngine
+    else:
+        engine_cls = _SubprocessEngine
+        pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
+
+    size = settings.ocr_pool_size or settings.cpus()
+    logger.info("OCR engine pool: lang=%s, backend=%s, size=%d", lang, backend, size)
+    return EnginePool(lambda: engine_cls(lang, tessdata), size)
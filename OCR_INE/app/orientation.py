@@ -0,0 +1,219 @@
+"""Tiered orientation detection — cheap cues first, Tesseract OSD last.
+
+Tiers, in order:
+    exif       the decoder already applied an EXIF rotation and the result
+               is landscape, as an upright card must be.  The structural
+               cues still run to catch a card held upside down (180°).
+    structure  aspect ratio picks 0/180 vs 90/270; the flip is decided by
+               where the classifier finds the QR/PDF417 on the back, or by
+               the text-line projection profile on the front.
+    osd        Tesseract OSD on a downscaled grayscale image (skipped when
+               the run's deadline cannot afford it).
+    none       nothing was conclusive — assume upright.
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from . import deadline
+from .classifier import MODEL_PDF417, MODEL_QR, classify
+from .ocr_engine import get_engine_pool
+
+TIERS = ("exif", "structure", "osd", "none")
+
+_WORK_DIM = 800  # long side of the image used by the structural cues
+_OSD_DIM = 1200  # long side of the image handed to OSD
+_MIN_MARGIN = 0.08  # feature centre must clear the card midline by this much
+_TEXT_BANDS = 10  # vertical bands for the front text-line profile
+_MIN_TEXT_OFFSET = 0.02  # text-line centroid must clear the card midline by this much
+_MIN_PHOTO_CONTRAST = 0.03  # photo third must be this much darker than the far third
+
+_EXIF_ORIENTATION_TAG = 0x0112
+
+
+class _TierStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {tier: {"attempts": 0, "hits": 0, "total_ms": 0.0} for tier in TIERS}
+
+    def record(self, tier: str, hit: bool, elapsed_ms: float) -> None:
+        with self._lock:
+            entry = self._data[tier]
+            entry["attempts"] += 1
+            entry["hits"] += int(hit)
+            entry["total_ms"] += elapsed_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                tier: {
+                    "attempts": d["attempts"],
+                    "hits": d["hits"],
+                    "hit_rate": round(d["hits"] / d["attempts"], 3) if d["attempts"] else 0.0,
+                    "avg_ms": round(d["total_ms"] / d["attempts"], 2) if d["attempts"] else 0.0,
+                }
+                for tier, d in self._data.items()
+            }
+
+
+stats = _TierStats()
+
+
+def exif_orientation(raw_bytes: bytes) -> int | None:
+    """Read the EXIF orientation tag (1..8) from the image header, if any."""
+    try:
+        with Image.open(io.BytesIO(raw_bytes)) as img:
+            value = img.getexif().get(_EXIF_ORIENTATION_TAG)
+    except Exception:
+        return None
+    return int(value) if value else None
+
+
+def detect_orientation(
+    image: np.ndarray,
+    side: str | None = None,
+    exif: int | None = None,
+) -> tuple[int, str]:
+    """Return (rotate, tier): the clockwise rotation that uprights the card.
+
+    Args:
+        image: Decoded BGR image (EXIF rotation already applied by OpenCV).
+        side: "front", "back" or None when unknown (skips structural cues).
+        exif: EXIF orientation tag of the source file.
+    """
+    h, w = image.shape[:2]
+
+    t0 = time.perf_counter()
+    exif_hit = exif is not None and exif != 1 and w >= h
+    stats.record("exif", exif_hit, _ms(t0))
+
+    t0 = time.perf_counter()
+    rotate = _structural_orientation(image, side) if side else None
+    stats.record("structure", rotate is not None, _ms(t0))
+    if exif_hit:
+        # EXIF only fixes 90° turns; the structure can still see a flip.
+        return (180, "structure") if rotate == 180 else (0, "exif")
+    if rotate is not None:
+        return rotate, "structure"
+
+    if deadline.allows("osd"):
+        t0 = time.perf_counter()
+        with deadline.measured("osd"):
+            rotate = _osd_orientation(image)
+        stats.record("osd", rotate is not None, _ms(t0))
+        if rotate is not None:
+            return rotate, "osd"
+
+    stats.record("none", True, 0.0)
+    return 0, "none"
+
+
+def apply_rotation(image: np.ndarray, rotate: int) -> np.ndarray:
+    """Rotate clockwise by 0/90/180/270 degrees."""
+    if rotate == 90:
+        return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+    if rotate == 180:
+        return cv2.rotate(image, cv2.ROTATE_180)
+    if rotate == 270:
+        return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return image
+
+
+def _structural_orientation(image: np.ndarray, side: str) -> int | None:
+    small = _downscale(image, _WORK_DIM)
+    h, w = small.shape[:2]
+    base = 0 if w >= h else 90  # a card is landscape
+    landscape = apply_rotation(small, base)
+
+    if side == "back":
+        upright = _back_is_upright(landscape)
+    elif side == "front":
+        upright = _front_is_upright(landscape)
+    else:
+        upright = None
+
+    if upright is None:
+        return None
+    return base if upright else (base + 180) % 360
+
+
+def _back_is_upright(landscape: np.ndarray) -> bool | None:
+    """QR cluster sits in the upper half on 2019+ backs, PDF417 in the lower."""
+    model_id, bboxes = classify(landscape)
+    if not bboxes:
+        return None
+    points = np.vstack(bboxes).reshape(-1, 2)
+    cy = float(points[:, 1].mean()) / landscape.shape[0]
+    if abs(cy - 0.5) < _MIN_MARGIN:
+        return None
+    if model_id == MODEL_QR:
+        return cy < 0.5
+    if model_id == MODEL_PDF417:
+        return cy > 0.5
+    return None
+
+
+def _front_is_upright(landscape: np.ndarray) -> bool | None:
+    """Two votes that must agree on an upright front.
+
+    Text lines sit right of centre (the ROIs span x 0.35–0.95) and the
+    photo — the darkest region — sits in the left third.
+    """
+    gray = cv2.cvtColor(landscape, cv2.COLOR_BGR2GRAY) if landscape.ndim == 3 else landscape
+    ink = cv2.adaptiveThreshold(
+        gray, 1, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 10,
+    )
+    bands = np.array_split(ink, _TEXT_BANDS, axis=1)
+    scores = np.array([_line_structure(band) for band in bands])
+    centres = (np.arange(_TEXT_BANDS) + 0.5) / _TEXT_BANDS
+    text_vote = float((scores * centres).sum() / scores.sum()) - 0.5
+
+    w = gray.shape[1]
+    third = w // 3
+    photo_vote = (float(gray[:, w - third:].mean()) - float(gray[:, :third].mean())) / 255.0
+
+    if text_vote > _MIN_TEXT_OFFSET and photo_vote > _MIN_PHOTO_CONTRAST:
+        return True
+    if text_vote < -_MIN_TEXT_OFFSET and photo_vote < -_MIN_PHOTO_CONTRAST:
+        return False
+    return None
+
+
+def _line_structure(ink: np.ndarray) -> float:
+    """How strongly the horizontal projection profile alternates (text lines)."""
+    if ink.size == 0:
+        return 0.0
+    profile = ink.mean(axis=1, dtype=np.float32)
+    return float(np.abs(np.diff(profile)).mean()) + 1e-6 if len(profile) > 1 else 1e-6
+
+
+def _osd_orientation(image: np.ndarray) -> int | None:
+    small = _downscale(image, _OSD_DIM)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    run_deadline = deadline.current()
+    timeout = run_deadline.remaining_s() if run_deadline is not None else 0.0
+    try:
+        with get_engine_pool().borrow(timeout=timeout or None) as engine:
+            rotate = engine.orientation(gray, timeout=timeout)
+    except Exception:
+        return None  # OSD failed or Tesseract unavailable
+    return rotate if rotate in (0, 90, 180, 270) else None
+
+
+def _downscale(image: np.ndarray, max_dim: int) -> np.ndarray:
+    h, w = image.shape[:2]
+    if max(h, w) <= max_dim:
+        return image
+    scale = max_dim / max(h, w)
+    return cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def _ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000
@@ -2,25 +2,39 @@
 
 from __future__ import annotations
 
+import io
 import time
 import logging
+from functools import lru_cache, partial
 
 import cv2
 import numpy as np
+from PIL import Image
 
+from . import deadline
 from .config import settings
 from .models import (
     BeneficiarioFields,
     DomicilioFields,
-    FieldResult,
     OcrResponse,
     QualityMetrics,
+    QualitySide,
+    StageTiming,
+    Timings,
 )
-from .quality import assess_quality, get_quality_warnings
+from .quality import assess_quality, gate_warnings, get_quality_warnings
 from .rectifier import rectify
-from .classifier import classify
-from .front_parser import parse_front
+from .classifier import BarcodeValue, classify, read_barcodes
+from .image_context import ImageContext
+from .front_parser import merge_fields, parse_front_montage, parse_front_roi
 from .back_parser import parse_back
+from .result_cache import content_key, get_result_cache
+from .retry_planner import BACK_ROI_FIELDS, FRONT_ROI_FIELDS, RetryPlan
+from .orientation import exif_orientation
+from .roi_loader import get_front_rois
+from .speculative import Race
+from .stage_graph import Stage, StageGraph, get_stage_executor
+from .timing import recording, timed
 from .curp_utils import extract_fecha_nacimiento, extract_sexo, is_valid_curp
 from .confidence import (
     context_score,
@@ -36,92 +50,357 @@ from .confidence import (
 logger = logging.getLogger(__name__)
 
 
-def process_ine(front_bytes: bytes, back_bytes: bytes) -> OcrResponse:
+class ImageDecodeError(ValueError):
+    """Raised by a decode stage when the payload is not a valid image."""
+
+
+class RetakePhoto(Exception):
+    """Raised by the quality gate when a side is too poor to be read (``QUALITY_GATE``)."""
+
+    def __init__(self, quality: dict[str, QualitySide], warnings: list[str]):
+        super().__init__("retake_photo")
+        self.quality = quality
+        self.warnings = warnings
+
+
+def process_ine(
+    front_bytes: bytes,
+    back_bytes: bytes,
+    run_deadline: deadline.Deadline | None = None,
+) -> OcrResponse:
     """Full OCR pipeline for an INE card.
 
+    The stages run as a DAG (see ``_build_graph``), so front and back
+    processing overlap and the four front ROIs are OCR'd concurrently.
+    A side whose image bytes were already processed within the cache TTL
+    is taken from the result cache and its branch is skipped.
+
     Args:
         front_bytes: Raw bytes of the front image.
         back_bytes: Raw bytes of the back image.
+        run_deadline: When the run must be done; defaults to
+            ``TIME_BUDGET_MS`` from now.  Optional work that no longer fits
+            is skipped and OCR calls are cut off at the deadline.
 
     Returns:
-        OcrResponse with all extracted fields.
+        OcrResponse with all extracted fields; ``timings`` holds the
+        per-stage breakdown of this run.
     """
+    run_deadline = run_deadline or deadline.Deadline(settings.time_budget_ms)
+    with recording() as recorder, deadline.running(run_deadline):
+        result = _process(front_bytes, back_bytes)
+    if run_deadline.exceeded and "time_budget_exceeded" not in result.warnings:
+        result.warnings.append("time_budget_exceeded")
+    result.timings = Timings(
+        total_ms=result.processing_ms,
+        stages=[StageTiming(name=n, ms=ms, parent=parent) for n, ms, parent in recorder.entries],
+    )
+    return result
+
+
+def _process(front_bytes: bytes, back_bytes: bytes) -> OcrResponse:
     t0 = time.monotonic()
-    warnings: list[str] = []
 
-    # ── Decode images ────────────────────────────────────────────────────
-    front_img = _decode_image(front_bytes)
-    back_img = _decode_image(back_bytes)
+    cache = get_result_cache()
+    inputs: dict = {"front_bytes": front_bytes, "back_bytes": back_bytes}
+    keys = {"front": content_key(front_bytes), "back": content_key(back_bytes)}
+    if cache is not None:
+        for side, key in keys.items():
+            cached = cache.get(side, key)
+            if cached is not None:
+                inputs[side] = cached
 
-    if front_img is None or back_img is None:
+    try:
+        run = _build_graph(
+            "front" not in inputs, "back" not in inputs, settings.ocr_montage, settings.quality_gate,
+        ).run(inputs, executor=get_stage_executor())
+    except ImageDecodeError:
         return OcrResponse(
             warnings=["image_decode_failed"],
             processing_ms=_elapsed_ms(t0),
         )
+    except RetakePhoto as e:
+        return OcrResponse(
+            quality=QualityMetrics(**e.quality),
+            warnings=["retake_photo", *e.warnings],
+            processing_ms=_elapsed_ms(t0),
+        )
 
-    # ── Quality assessment ───────────────────────────────────────────────
-    front_quality = assess_quality(front_img)
-    back_quality = assess_quality(back_img)
-    warnings.extend(get_quality_warnings(front_quality, "front"))
-    warnings.extend(get_quality_warnings(back_quality, "back"))
+    logger.debug("Stage timings (ms): %s", run.timings)
 
-    # ── Rectify both sides ───────────────────────────────────────────────
-    rect_front, front_persp_ok = rectify(front_img)
-    rect_back, back_persp_ok = rectify(back_img)
+    # A run cut short by its deadline may hold incomplete fields: never cache it.
+    if cache is not None and not deadline.current().exceeded:
+        for side in ("front", "back"):
+            if side in run.timings:
+                cache.set(side, keys[side], run.results[side])
 
-    front_quality.perspective_ok = front_persp_ok
-    back_quality.perspective_ok = back_persp_ok
+    result: OcrResponse = run.results["score"]
+    result.processing_ms = _elapsed_ms(t0)
+    return result
 
-    if not back_persp_ok:
-        warnings.append("back_perspective_failed")
 
-    # ── Classify back side ───────────────────────────────────────────────
-    model_id, feature_bboxes = classify(rect_back)
-    ctx_score = context_score(model_id, back_persp_ok)
+# ── Stages ───────────────────────────────────────────────────────────────────
+# Each side ends in a summary node ("front" / "back") holding only parsed,
+# JSON-serialisable results; those summaries are what the result cache stores.
+# Images travel between stages wrapped in an ImageContext, so grayscale,
+# pyramid levels, histogram and edge maps are derived once per image.
+def _stage_decode(raw_bytes: bytes) -> ImageContext:
+    img = decode_image(raw_bytes)
+    if img is None:
+        raise ImageDecodeError("image_decode_failed")
+    return ImageContext(img)
 
-    # ── Process FRONT ────────────────────────────────────────────────────
-    front_data = parse_front(rect_front, attempt=1)
+
+def _stage_quality_gate(sides: tuple[str, ...], *qualities: QualitySide) -> None:
+    """Stop the run before rectification when a side can't be read."""
+    warnings = [w for side, q in zip(sides, qualities) for w in gate_warnings(q, side)]
+    if warnings:
+        raise RetakePhoto(dict(zip(sides, qualities)), warnings)
+
+
+def _stage_rectify(side: str):
+    def run(image: ImageContext, raw_bytes: bytes, *_gate) -> tuple[ImageContext, bool]:
+        rectified, perspective_ok = rectify(image, side=side, exif=exif_orientation(raw_bytes))
+        return ImageContext(rectified), perspective_ok
+    return run
+
+
+def _stage_classify(rectified_back: tuple[ImageContext, bool]) -> tuple[str, list]:
+    return classify(rectified_back[0])
+
+
+def _stage_barcode(
+    rectified_back: tuple[ImageContext, bool], classification: tuple[str, list],
+) -> dict[str, BarcodeValue]:
+    """Identifiers decoded from the back's barcodes (``BARCODE_FIRST``)."""
+    if not settings.barcode_first:
+        return {}
+    return read_barcodes(rectified_back[0], classification[0])
+
+
+def _stage_front_roi(roi_name: str):
+    def run(rectified_front: tuple[ImageContext, bool], front_quality: QualitySide) -> dict:
+        return _read_front(
+            rectified_front, front_quality, [roi_name],
+            lambda image, _names, attempt: parse_front_roi(image, roi_name, attempt=attempt),
+        )
+    return run
+
+
+def _stage_front_montage(rectified_front: tuple[ImageContext, bool], front_quality: QualitySide) -> dict:
+    """Every front ROI in one OCR call per attempt (``OCR_MONTAGE``)."""
+    return _read_front(rectified_front, front_quality, list(get_front_rois()), parse_front_montage)
+
+
+def _read_front(
+    rectified_front: tuple[ImageContext | np.ndarray, bool],
+    front_quality: QualitySide,
+    rois: list[str],
+    read,
+) -> dict:
+    """Read ``rois`` with ``read(image, roi_names, attempt)``, re-reading weak ones with the next variant."""
+    image, perspective_ok = rectified_front
     q_front = (front_quality.blur + (1.0 - front_quality.glare) + front_quality.exposure) / 3.0
+    # The model is only known from the back; plan as if it was recognised.
+    plan = RetryPlan(
+        {name: FRONT_ROI_FIELDS.get(name, {}) for name in rois}, q_front, context_score("", perspective_ok),
+    )
+    plan.offer(read(image, rois, 1))
+    for attempt in range(2, settings.max_retries + 2):
+        step = f"front_attempt_{attempt}"
+        pending = plan.pending()
+        if not pending or not deadline.allows(step):
+            break
+        with timed(step), deadline.measured(step):
+            plan.offer(read(image, pending, attempt))
+    return plan.values()
+
+
+def _stage_front(
+    front_quality: QualitySide,
+    rectified_front: tuple[ImageContext, bool],
+    *front_parts: dict,
+) -> dict:
+    fields: dict = {}
+    for part in front_parts:
+        merge_fields(fields, part)
+    return {
+        "quality": front_quality.model_dump(),
+        "perspective_ok": rectified_front[1],
+        "fields": fields,
+    }
+
+
+def _stage_back_ocr(
+    rectified_back: tuple[ImageContext | np.ndarray, bool],
+    classification: tuple[str, list],
+    back_quality: QualitySide,
+    barcode: dict[str, BarcodeValue] | None = None,
+) -> dict:
+    """Back side with field-level retries.
+
+    Each retry re-OCRs only the ROIs whose field is still missing or below
+    the review threshold (a valid CURP is never read twice), and the best
+    value per field across attempts wins.  When the barcode payload gave a
+    verified id_ine, only attempt 1 runs; payload values cross-check what
+    OCR read and, when verified, override it.
+
+    Returns:
+        dict with best_back, attempts (OCR passes run over the back,
+        speculative variants included) and warnings.
+    """
+    rect_back, back_persp_ok = rectified_back
+    model_id, feature_bboxes = classification
+    ctx_score = context_score(model_id, back_persp_ok)
+    q_back = (back_quality.blur + (1.0 - back_quality.glare) + back_quality.exposure) / 3.0
 
-    # ── Process BACK (with retries for id_ine) ───────────────────────────
-    best_back: dict = {}
-    best_id_ine_conf = 0.0
+    barcode = barcode or {}
+    barcode_id = barcode.get("id_ine")
+    trusted_id = barcode_id is not None and barcode_id.verified
+    warnings: list[str] = []
+    plan = RetryPlan(BACK_ROI_FIELDS, q_back, ctx_score)
+    tried: dict[str, set[int]] = {}  # field → attempts already run for it speculatively
     attempts = 0
 
+    run_deadline = deadline.current()
     for attempt in range(1, settings.max_retries + 2):  # 1..max_retries+1
-        if _elapsed_ms(t0) > settings.time_budget_ms:
+        pending = plan.pending()
+        if not pending or (attempt > 1 and trusted_id):
+            break
+        fields = [f for f in pending if attempt not in tried.get(f, ())]
+        if not fields:
+            continue
+        # Retries run only if their expected cost still fits the deadline.
+        step = f"back_attempt_{attempt}"
+        if run_deadline.expired() or (attempt > 1 and not run_deadline.allows(step)):
+            run_deadline.exceeded = True
             warnings.append("time_budget_exceeded")
             break
 
-        attempts = attempt
-        back_data = parse_back(
-            rect_back,
-            attempt=attempt,
-            model_id=model_id,
-            feature_bboxes=feature_bboxes,
-        )
+        with timed(step), deadline.measured(step):
+            if attempt == 1 and settings.speculative_id_ine and "id_ine" in fields and not trusted_id:
+                results, passes = _race_id_ine(plan, rect_back, model_id, feature_bboxes, fields, tried)
+                attempts += passes
+            else:
+                attempts += 1
+                results = [parse_back(
+                    rect_back,
+                    attempt=attempt,
+                    model_id=model_id,
+                    feature_bboxes=feature_bboxes,
+                    fields=fields,
+                )]
+                plan.offer(results[0])
 
         # Merge warnings from back parser
-        for w in back_data.get("warnings", []):
-            if w not in warnings:
-                warnings.append(w)
-
-        # Evaluate id_ine quality
-        id_ine = back_data.get("id_ine")
-        if id_ine:
-            p_score = pattern_score_id_ine(id_ine)
-            q_back = (back_quality.blur + (1.0 - back_quality.glare) + back_quality.exposure) / 3.0
-            conf = 0.55 * p_score + 0.25 * q_back + 0.20 * ctx_score
-        else:
-            conf = 0.0
+        for back_data in results:
+            for w in back_data.get("warnings", []):
+                if w not in warnings:
+                    warnings.append(w)
 
-        if conf > best_id_ine_conf:
-            best_id_ine_conf = conf
-            best_back = back_data
+    best_back = plan.values()
+    _cross_check(best_back, barcode, warnings)
+    return {"best_back": best_back, "attempts": attempts, "warnings": warnings}
 
-        # Stop retrying if confidence is sufficient
-        if conf >= 0.65:
-            break
+
+def _cross_check(best_back: dict, barcode: dict[str, BarcodeValue], warnings: list[str]) -> None:
+    """Warn where OCR and the barcode disagree; verified barcode values replace the OCR read.
+
+    A decoded payload is error-corrected, so a value in a known INE layout
+    is taken as certain (``ocr_confidence`` 1.0).  An unverified one may be
+    some other token of an unexpected payload, so the OCR value and its
+    confidence stay.
+    """
+    for field, decoded in barcode.items():
+        read = best_back.get(field)
+        if read and read != decoded.value:
+            warnings.append(f"{field}_barcode_mismatch")
+        if decoded.verified:
+            best_back[field] = decoded.value
+            best_back.setdefault("ocr_confidence", {})[field] = 1.0
+
+
+def _race_id_ine(
+    plan: RetryPlan,
+    rect_back: ImageContext | np.ndarray,
+    model_id: str,
+    feature_bboxes: list,
+    fields: list[str],
+    tried: dict[str, set[int]],
+) -> tuple[list[dict], int]:
+    """Attempt 1 raced against the id_ine ROI under every retry variant (``SPECULATIVE_ID_INE``).
+
+    Stops at the first read that clears the review threshold and cancels
+    the rest; variants that found no spare core are left to later retries.
+
+    Returns:
+        (results, passes) where passes counts the tasks that actually started.
+    """
+    run_deadline = deadline.current()
+    variants = [
+        attempt for attempt in range(2, settings.max_retries + 2)
+        if run_deadline.remaining_ms() >= deadline.expected_ms(f"back_attempt_{attempt}")
+    ]
+    tasks = [partial(parse_back, rect_back, attempt=1, model_id=model_id,
+                     feature_bboxes=feature_bboxes, fields=fields)]
+    tasks += [partial(parse_back, rect_back, attempt=attempt, model_id=model_id,
+                      feature_bboxes=feature_bboxes, fields=["id_ine"]) for attempt in variants]
+
+    results: list[dict] = []
+    with Race(tasks) as race:
+        for _, back_data in race:
+            results.append(back_data)
+            plan.offer(back_data)
+            if "id_ine" not in plan.pending():
+                break
+    tried["id_ine"] = {1, *(variants[index - 1] for index in race.launched if index)}
+    return results, len(race.started)
+
+
+def _stage_back(
+    back_quality: QualitySide,
+    rectified_back: tuple[ImageContext, bool],
+    classification: tuple[str, list],
+    back_ocr: dict,
+) -> dict:
+    best_back = back_ocr["best_back"]
+    return {
+        "quality": back_quality.model_dump(),
+        "perspective_ok": rectified_back[1],
+        "model_id": classification[0],
+        "fields": {
+            "id_ine": best_back.get("id_ine"),
+            "curp": best_back.get("curp"),
+            "ocr_confidence": best_back.get("ocr_confidence", {}),
+        },
+        "attempts": back_ocr["attempts"],
+        "warnings": back_ocr["warnings"],
+    }
+
+
+def _stage_score(front: dict, back: dict) -> OcrResponse:
+    """Merge both side summaries into the final scored response."""
+    front_quality = QualitySide(**{**front["quality"], "perspective_ok": front["perspective_ok"]})
+    back_quality = QualitySide(**{**back["quality"], "perspective_ok": back["perspective_ok"]})
+
+    warnings: list[str] = []
+    warnings.extend(get_quality_warnings(front_quality, "front"))
+    warnings.extend(get_quality_warnings(back_quality, "back"))
+
+    back_persp_ok = back_quality.perspective_ok
+    if not back_persp_ok:
+        warnings.append("back_perspective_failed")
+
+    model_id = back["model_id"]
+    ctx_score = context_score(model_id, back_persp_ok)
+
+    front_data = front["fields"]
+    q_front = (front_quality.blur + (1.0 - front_quality.glare) + front_quality.exposure) / 3.0
+
+    for w in back["warnings"]:
+        if w not in warnings:
+            warnings.append(w)
+    best_back = back["fields"]
 
     if not best_back.get("id_ine"):
         warnings.append("id_ine_not_found")
@@ -137,21 +416,25 @@ def process_ine(front_bytes: bytes, back_bytes: bytes) -> OcrResponse:
         fecha_val = extract_fecha_nacimiento(curp_val)
         sexo_val = extract_sexo(curp_val)
 
+    # Tesseract's confidence per field (absent in summaries cached before it was kept).
+    front_ocr = front_data.get("ocr_confidence", {})
+    back_ocr = best_back.get("ocr_confidence", {})
+
     beneficiarios = BeneficiarioFields(
-        nombre=score_field(front_data.get("nombre"), pattern_score_name(front_data.get("nombre", "")), q_front, ctx_score),
-        apellido_paterno=score_field(front_data.get("apellido_paterno"), pattern_score_name(front_data.get("apellido_paterno", "")), q_front, ctx_score),
-        apellido_materno=score_field(front_data.get("apellido_materno"), pattern_score_name(front_data.get("apellido_materno", "")), q_front, ctx_score),
-        curp=score_field(curp_val, pattern_score_curp(curp_val or ""), q_back_avg, ctx_score),
-        fecha_nacimiento=score_field(fecha_val, 1.0 if fecha_val else 0.0, q_back_avg, ctx_score),
-        sexo=score_field(sexo_val, 1.0 if sexo_val else 0.0, q_back_avg, ctx_score),
-        id_ine=score_field(best_back.get("id_ine"), pattern_score_id_ine(best_back.get("id_ine", "")), q_back_avg, ctx_score),
+        nombre=score_field(front_data.get("nombre"), pattern_score_name(front_data.get("nombre", "")), q_front, ctx_score, front_ocr.get("nombre")),
+        apellido_paterno=score_field(front_data.get("apellido_paterno"), pattern_score_name(front_data.get("apellido_paterno", "")), q_front, ctx_score, front_ocr.get("apellido_paterno")),
+        apellido_materno=score_field(front_data.get("apellido_materno"), pattern_score_name(front_data.get("apellido_materno", "")), q_front, ctx_score, front_ocr.get("apellido_materno")),
+        curp=score_field(curp_val, pattern_score_curp(curp_val or ""), q_back_avg, ctx_score, back_ocr.get("curp")),
+        fecha_nacimiento=score_field(fecha_val, 1.0 if fecha_val else 0.0, q_back_avg, ctx_score, back_ocr.get("curp")),
+        sexo=score_field(sexo_val, 1.0 if sexo_val else 0.0, q_back_avg, ctx_score, back_ocr.get("curp")),
+        id_ine=score_field(best_back.get("id_ine"), pattern_score_id_ine(best_back.get("id_ine") or ""), q_back_avg, ctx_score, back_ocr.get("id_ine")),
     )
 
     domicilio = DomicilioFields(
-        calle=score_field(front_data.get("domicilio_calle"), pattern_score_address(front_data.get("domicilio_calle", "")), q_front, ctx_score),
-        colonia=score_field(front_data.get("domicilio_colonia"), pattern_score_address(front_data.get("domicilio_colonia", "")), q_front, ctx_score),
-        codigo_postal=score_field(front_data.get("domicilio_codigo_postal"), pattern_score_cp(front_data.get("domicilio_codigo_postal", "")), q_front, ctx_score),
-        seccional=score_field(front_data.get("seccional"), pattern_score_seccion(front_data.get("seccional", "")), q_front, ctx_score),
+        calle=score_field(front_data.get("domicilio_calle"), pattern_score_address(front_data.get("domicilio_calle", "")), q_front, ctx_score, front_ocr.get("domicilio_calle")),
+        colonia=score_field(front_data.get("domicilio_colonia"), pattern_score_address(front_data.get("domicilio_colonia", "")), q_front, ctx_score, front_ocr.get("domicilio_colonia")),
+        codigo_postal=score_field(front_data.get("domicilio_codigo_postal"), pattern_score_cp(front_data.get("domicilio_codigo_postal", "")), q_front, ctx_score, front_ocr.get("domicilio_codigo_postal")),
+        seccional=score_field(front_data.get("seccional"), pattern_score_seccion(front_data.get("seccional", "")), q_front, ctx_score, front_ocr.get("seccional")),
     )
 
     return OcrResponse(
@@ -160,21 +443,115 @@ def process_ine(front_bytes: bytes, back_bytes: bytes) -> OcrResponse:
         domicilio=domicilio,
         quality=QualityMetrics(front=front_quality, back=back_quality),
         warnings=warnings,
-        processing_ms=_elapsed_ms(t0),
-        attempts=attempts,
+        attempts=back["attempts"],
     )
 
 
-def _decode_image(raw_bytes: bytes) -> np.ndarray | None:
-    """Decode raw bytes into an OpenCV BGR image."""
+@lru_cache(maxsize=None)
+def _build_graph(
+    with_front: bool = True,
+    with_back: bool = True,
+    montage: bool = False,
+    gate: bool = False,
+) -> StageGraph:
+    """decode → quality / rectify → classify → barcode → per-ROI OCR → score.
+
+    A side built without its branch expects its summary ("front"/"back")
+    as a run input instead (a cache hit).  With ``montage`` the front ROIs
+    are OCR'd together by one node instead of one node each.  With ``gate``
+    rectification waits for a "quality_gate" node over both quality
+    results, which ends the run with :class:`RetakePhoto` when a side
+    can't be read.
+    """
+    sides = tuple(side for side, built in (("front", with_front), ("back", with_back)) if built)
+    gate_deps = ("quality_gate",) if gate and sides else ()
+    stages: list[Stage] = []
+    if gate_deps:
+        stages.append(_node(
+            "quality_gate", partial(_stage_quality_gate, sides), tuple(f"quality_{side}" for side in sides),
+        ))
+    if with_front:
+        if montage:
+            front_roi_stages = [_node("front_rois", _stage_front_montage, ("rectify_front", "quality_front"))]
+        else:
+            front_roi_stages = [
+                _node(f"front_{name}", _stage_front_roi(name), ("rectify_front", "quality_front"))
+                for name in get_front_rois()
+            ]
+        stages += [
+            _node("decode_front", _stage_decode, ("front_bytes",)),
+            _node("quality_front", assess_quality, ("decode_front",)),
+            _node("rectify_front", _stage_rectify("front"), ("decode_front", "front_bytes", *gate_deps)),
+            *front_roi_stages,
+            _node("front", _stage_front, (
+                "quality_front", "rectify_front", *(stage.name for stage in front_roi_stages),
+            )),
+        ]
+    if with_back:
+        stages += [
+            _node("decode_back", _stage_decode, ("back_bytes",)),
+            _node("quality_back", assess_quality, ("decode_back",)),
+            _node("rectify_back", _stage_rectify("back"), ("decode_back", "back_bytes", *gate_deps)),
+            _node("classify", _stage_classify, ("rectify_back",)),
+            _node("barcode", _stage_barcode, ("rectify_back", "classify")),
+            _node("back_ocr", _stage_back_ocr, ("rectify_back", "classify", "quality_back", "barcode")),
+            _node("back", _stage_back, ("quality_back", "rectify_back", "classify", "back_ocr")),
+        ]
+    stages.append(_node("score", _stage_score, ("front", "back")))
+    return StageGraph(stages)
+
+
+def _node(name: str, fn, deps: tuple[str, ...]) -> Stage:
+    """A graph stage whose run (and any ``timed`` block inside it) is recorded under ``name``."""
+    def run(*args):
+        with timed(name):
+            return fn(*args)
+    return Stage(name, run, deps)
+
+
+# Enough to reach the JPEG SOF marker past EXIF/ICC segments.
+_HEADER_BYTES = 256 * 1024
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def decode_image(raw_bytes: bytes, target_px: int | None = None) -> np.ndarray | None:
+    """Decode raw bytes into an OpenCV BGR image.
+
+    JPEGs larger than needed are decoded with libjpeg's DCT scaling
+    (1/2, 1/4 or 1/8), picking the strongest reduction that keeps the long
+    side at or above ``target_px`` (default ``settings.decode_target_px``).
+    """
     try:
         arr = np.frombuffer(raw_bytes, dtype=np.uint8)
-        img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        img = cv2.imdecode(arr, _decode_flag(raw_bytes, target_px))
         return img
     except Exception:
         return None
 
 
+def _decode_flag(raw_bytes: bytes, target_px: int | None = None) -> int:
+    """Choose the imdecode flag from the image header alone."""
+    target_px = target_px or settings.decode_target_px
+    try:
+        with Image.open(io.BytesIO(raw_bytes[:_HEADER_BYTES])) as header:
+            fmt = header.format
+            long_side = max(header.size)
+    except Exception:
+        return cv2.IMREAD_COLOR
+
+    if fmt != "JPEG":
+        return cv2.IMREAD_COLOR
+    for factor, flag in _REDUCED_FLAGS:
+        if long_side // factor >= target_px:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
 def _elapsed_ms(t0: float) -> int:
     """Milliseconds since t0."""
     return int((time.monotonic() - t0) * 1000)
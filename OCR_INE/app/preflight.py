@@ -0,0 +1,55 @@
+"""Preflight — fast capture feedback for one side, without OCR.
+
+Reuses the quality check, the card-contour detection and (for backs) the
+classifier on an image decoded straight to about the quality work size,
+so a capture app can ask "will this photo work?" in well under 150 ms
+and only then call ``/v1/ine/extract``.
+"""
+
+from __future__ import annotations
+
+import time
+
+from .classifier import classify
+from .image_context import ImageContext
+from .models import PreflightResponse
+from .pipeline import decode_image
+from .quality import WORK_DIM, assess_quality, gate_warnings, get_quality_warnings
+from .rectifier import find_card_corners, order_points
+
+SIDES = ("front", "back")
+
+
+def preflight(raw_bytes: bytes, side: str) -> PreflightResponse | None:
+    """Quality, card contour and (back) model of one photo; None if it can't be decoded."""
+    t0 = time.monotonic()
+    image = decode_image(raw_bytes, target_px=WORK_DIM)
+    if image is None:
+        return None
+    ctx = ImageContext(image)
+
+    quality = assess_quality(ctx)
+    corners = find_card_corners(ctx)
+    quality.perspective_ok = corners is not None
+    model_id = classify(ctx)[0] if side == "back" else None
+
+    # A card filling the frame has no contour but still extracts (deskew fallback).
+    usable = not gate_warnings(quality, side)
+    warnings = [] if usable else ["retake_photo"]
+    warnings += get_quality_warnings(quality, side)
+    if corners is None:
+        warnings.append(f"{side}_perspective_failed")
+
+    h, w = image.shape[:2]
+    return PreflightResponse(
+        side=side,
+        quality=quality,
+        card_detected=corners is not None,
+        card_corners=None if corners is None else [
+            [round(float(x) / w, 4), round(float(y) / h, 4)] for x, y in order_points(corners)
+        ],
+        model_id=model_id,
+        usable=usable,
+        warnings=warnings,
+        processing_ms=int((time.monotonic() - t0) * 1000),
+    )
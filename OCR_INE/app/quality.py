@@ -5,23 +5,32 @@ from __future__ import annotations
 import cv2
 import numpy as np
 
+from .config import settings
+from .image_context import ImageContext, as_context
 from .models import QualitySide
 
+# Metrics are measured on a downscale with this long side: blur is judged
+# near the scale the rectified card is OCR'd at (CARD_WIDTH), the same for
+# every photo resolution, and the cost no longer grows with the photo.
+WORK_DIM = 1024
 
-def assess_quality(image: np.ndarray) -> QualitySide:
+
+def assess_quality(image: np.ndarray | ImageContext) -> QualitySide:
     """Evaluate image quality and return metrics.
 
     Args:
-        image: BGR image (OpenCV format).
+        image: BGR image (OpenCV format) or its :class:`ImageContext`.
 
     Returns:
         QualitySide with blur, glare, exposure scores (0..1) and a grade.
     """
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    ctx = as_context(image)
+    small, _ = ctx.downscaled(WORK_DIM)
+    hist = ctx.histogram(WORK_DIM)  # one pass gives both glare and exposure
 
-    blur = _blur_score(gray)
-    glare = _glare_score(gray)
-    exposure = _exposure_score(gray)
+    blur = _blur_score(small)
+    glare = _glare_score(hist)
+    exposure = _exposure_score(hist)
 
     # Overall grade
     avg = (blur + (1.0 - glare) + exposure) / 3.0
@@ -43,21 +52,20 @@ def assess_quality(image: np.ndarray) -> QualitySide:
 def _blur_score(gray: np.ndarray) -> float:
     """Sharpness via variance of Laplacian. Higher = sharper."""
     lap_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-    # Normalise: typical sharp image ~500+, blurry <100
+    # Normalise (at WORK_DIM): typical sharp image ~500+, blurry <100
     score = min(lap_var / 500.0, 1.0)
     return float(score)
 
 
-def _glare_score(gray: np.ndarray) -> float:
+def _glare_score(hist: np.ndarray) -> float:
     """Fraction of near-white (saturated) pixels. Lower = less glare."""
-    total = gray.size
-    saturated = int(np.sum(gray > 240))
-    return float(saturated / total) if total > 0 else 0.0
+    total = float(hist.sum())
+    saturated = float(hist[241:].sum())
+    return saturated / total if total > 0 else 0.0
 
 
-def _exposure_score(gray: np.ndarray) -> float:
+def _exposure_score(hist: np.ndarray) -> float:
     """How well-distributed the histogram is. 1.0 = well exposed."""
-    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).flatten()
     hist = hist / hist.sum()  # normalise
 
     # Measure spread — a well-exposed image uses the full range
@@ -79,3 +87,15 @@ def get_quality_warnings(q: QualitySide, side: str = "back") -> list[str]:
     if q.exposure < 0.3:
         warnings.append(f"{side}_bad_exposure")
     return warnings
+
+
+def gate_warnings(q: QualitySide, side: str = "back") -> list[str]:
+    """Warning codes for the metrics past the ``QUALITY_GATE_*`` limits (the capture can't be read)."""
+    warnings: list[str] = []
+    if q.blur < settings.quality_gate_min_blur:
+        warnings.append(f"{side}_low_blur")
+    if q.glare > settings.quality_gate_max_glare:
+        warnings.append(f"{side}_high_glare")
+    if q.exposure < settings.quality_gate_min_exposure:
+        warnings.append(f"{side}_bad_exposure")
+    return warnings
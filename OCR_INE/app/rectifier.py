@@ -2,33 +2,81 @@
 
 from __future__ import annotations
 
-import cv2
 import cv2
 import numpy as np
-import pytesseract
-from pytesseract import Output
 
+from . import deadline
+from .config import settings
+from .image_context import ImageContext, as_context
+from .orientation import apply_rotation, detect_orientation
+from .timing import timed
+
+
+# Every rectified card is warped once to this size, so downstream stages
+# (crop_roi, classify, OCR) always see the same, bounded pixel count.
+CARD_SIZE: tuple[int, int] = (settings.card_width, settings.card_height)
+
+# Corner and skew detection run on a pyramid level no larger than this.
+_DETECT_MAX_DIM = 1000
+
+# Unwarped fallbacks are only downscaled to fit this many card sizes, since
+# the card may cover just part of the photo.
+_FALLBACK_MAX_SCALE = 2
+
+
+def rectify(
+    image: np.ndarray | ImageContext,
+    side: str | None = None,
+    exif: int | None = None,
+) -> tuple[np.ndarray, bool]:
+    """Rectify the image to remove perspective distortion.
+
+    Args:
+        image: Decoded BGR image or its :class:`ImageContext` (reused
+            unless the image has to be rotated).
+        side: "front" or "back", enables the structural orientation cues.
+        exif: EXIF orientation tag of the source file, if any.
+
+    Returns:
+        (image, perspective_ok). On success the image is exactly CARD_SIZE.
+    """
+    stage = f"rectify_{side}" if side else "rectify"
+
+    ctx = as_context(image)
 
-def rectify(image: np.ndarray) -> tuple[np.ndarray, bool]:
-    """Rectify the image to remove perspective distortion."""
     # Attempt A: Fix orientation (0, 90, 180, 270)
-    image = _fix_orientation(image)
+    with timed(f"{stage}.orientation"):
+        upright = _fix_orientation(ctx.image, side, exif)
+    if upright is not ctx.image:
+        ctx = ImageContext(upright)
 
     # Attempt B: detect 4 card corners → warpPerspective
-    result = _warp_by_card_contour(image)
+    with timed(f"{stage}.contour"):
+        result = _warp_by_card_contour(ctx)
     if result is not None:
         return result, True
 
-    # Fallback: deskew via Hough lines + crop
-    deskewed = _deskew(image)
-    return deskewed, False
+    # Fallback: deskew via Hough lines + crop (skipped when the deadline is close)
+    image = ctx.image
+    if deadline.allows("deskew"):
+        with timed(f"{stage}.deskew"), deadline.measured("deskew"):
+            image = _deskew(ctx)
+    return _fit_within(image, CARD_SIZE[0] * _FALLBACK_MAX_SCALE,
+                       CARD_SIZE[1] * _FALLBACK_MAX_SCALE), False
 
 
-def _warp_by_card_contour(image: np.ndarray) -> np.ndarray | None:
-    """Find the card contour and apply perspective warp."""
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-    edged = cv2.Canny(blurred, 50, 150)
+def find_card_corners(image: np.ndarray | ImageContext) -> np.ndarray | None:
+    """Locate the card's 4 corners (full-resolution coordinates).
+
+    Edges and contours are computed on a reduced pyramid level and the
+    corners are mapped back, so the cost no longer grows with the photo.
+
+    Returns:
+        float32 array of shape (4, 2), or None if no card-sized quad is found.
+    """
+    ctx = as_context(image)
+    small, scale = ctx.pyramid(_DETECT_MAX_DIM)
+    edged = ctx.edges(_DETECT_MAX_DIM, blur=True)
 
     # Dilate to connect edges
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
@@ -40,62 +88,69 @@ def _warp_by_card_contour(image: np.ndarray) -> np.ndarray | None:
 
     # Find the largest quadrilateral
     contours = sorted(contours, key=cv2.contourArea, reverse=True)
+    h, w = small.shape[:2]
+    image_area = w * h
 
     for contour in contours[:5]:
         peri = cv2.arcLength(contour, True)
         approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
 
         if len(approx) == 4:
-            pts = approx.reshape(4, 2).astype(np.float32)
-            
             # Check if area is large enough (at least 50% of image)
             # This prevents warping internal features like photos or text blocks
             # when the image is already cropped to the card.
-            h, w = image.shape[:2]
-            image_area = w * h
-            contour_area = cv2.contourArea(contour)
-            
-            if contour_area < (image_area * 0.50):
+            if cv2.contourArea(contour) < (image_area * 0.50):
                 continue
 
-            return _four_point_transform(image, pts)
+            return approx.reshape(4, 2).astype(np.float32) / scale
 
     return None
 
 
+def _warp_by_card_contour(ctx: ImageContext) -> np.ndarray | None:
+    """Find the card contour and apply perspective warp."""
+    corners = find_card_corners(ctx)
+    if corners is None:
+        return None
+    return _four_point_transform(ctx.image, corners)
+
+
 def _four_point_transform(image: np.ndarray, pts: np.ndarray) -> np.ndarray:
-    """Apply perspective transform given 4 corner points."""
+    """Warp the quad given by 4 corner points straight to CARD_SIZE."""
     # Order points: top-left, top-right, bottom-right, bottom-left
-    rect = _order_points(pts)
+    rect = order_points(pts)
     tl, tr, br, bl = rect
+    width, height = CARD_SIZE
 
-    # Compute output dimensions
-    width_a = np.linalg.norm(br - bl)
-    width_b = np.linalg.norm(tr - tl)
-    max_width = int(max(width_a, width_b))
-
-    height_a = np.linalg.norm(tr - br)
-    height_b = np.linalg.norm(tl - bl)
-    max_height = int(max(height_a, height_b))
-
-    # Standard INE aspect ratio ~85.6mm x 54mm ≈ 1.585
-    if max_width > 0 and max_height > 0:
-        aspect = max_width / max_height
-        if aspect < 1.0:  # portrait → swap
-            max_width, max_height = max_height, max_width
+    # Warp from the smallest pyramid level that still holds the card at
+    # CARD_SIZE, avoiding aliasing and interpolating fewer source pixels.
+    card_w = max(np.linalg.norm(br - bl), np.linalg.norm(tr - tl))
+    while card_w / 2 >= width:
+        image = cv2.pyrDown(image)
+        rect = rect / 2.0
+        card_w /= 2
 
     dst = np.array([
         [0, 0],
-        [max_width - 1, 0],
-        [max_width - 1, max_height - 1],
-        [0, max_height - 1],
+        [width - 1, 0],
+        [width - 1, height - 1],
+        [0, height - 1],
     ], dtype=np.float32)
 
-    matrix = cv2.getPerspectiveTransform(rect, dst)
-    return cv2.warpPerspective(image, matrix, (max_width, max_height))
+    matrix = cv2.getPerspectiveTransform(rect.astype(np.float32), dst)
+    return cv2.warpPerspective(image, matrix, (width, height), flags=cv2.INTER_LINEAR)
 
 
-def _order_points(pts: np.ndarray) -> np.ndarray:
+def _fit_within(image: np.ndarray, max_w: int, max_h: int) -> np.ndarray:
+    """Downscale (never upscale) preserving aspect so the image fits max_w x max_h."""
+    h, w = image.shape[:2]
+    scale = min(max_w / w, max_h / h)
+    if scale >= 1.0:
+        return image
+    return cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def order_points(pts: np.ndarray) -> np.ndarray:
     """Order 4 points as: top-left, top-right, bottom-right, bottom-left."""
     rect = np.zeros((4, 2), dtype=np.float32)
 
@@ -110,21 +165,27 @@ def _order_points(pts: np.ndarray) -> np.ndarray:
     return rect
 
 
-def _deskew(image: np.ndarray) -> np.ndarray:
-    """Deskew image using Hough line angle detection."""
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-    edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+def _deskew(image: np.ndarray | ImageContext) -> np.ndarray:
+    """Deskew image using Hough line angle detection.
+
+    The angle is measured on a reduced pyramid level (angles are scale
+    invariant); only the final rotation touches the full image.
+    """
+    ctx = as_context(image)
+    image = ctx.image
+    _, scale = ctx.pyramid(_DETECT_MAX_DIM)
+    edges = ctx.edges(_DETECT_MAX_DIM)
 
-    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=80,
-                            minLineLength=100, maxLineGap=10)
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=max(30, int(80 * scale)),
+                            minLineLength=max(30, int(100 * scale)), maxLineGap=10)
 
     if lines is None or len(lines) == 0:
         return image
 
     # Compute median angle
     angles = []
-    for line in lines:
-        x1, y1, x2, y2 = line[0]
+    # (N, 1, 4) on OpenCV 4, (N, 4) on OpenCV 5
+    for x1, y1, x2, y2 in lines.reshape(-1, 4):
         angle = np.degrees(np.arctan2(y2 - y1, x2 - x1))
         if abs(angle) < 45:  # only near-horizontal lines
             angles.append(angle)
@@ -144,21 +205,7 @@ def _deskew(image: np.ndarray) -> np.ndarray:
                           borderMode=cv2.BORDER_REPLICATE)
 
 
-def _fix_orientation(image: np.ndarray) -> np.ndarray:
-    """Fix image orientation using Tesseract OSD."""
-    try:
-        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = pytesseract.image_to_osd(rgb, output_type=Output.DICT)
-        rotate_angle = results["rotate"]
-
-        if rotate_angle == 90:
-            return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
-        elif rotate_angle == 180:
-            return cv2.rotate(image, cv2.ROTATE_180)
-        elif rotate_angle == 270:
-            return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
-
-    except Exception:
-        pass  # OSD failed, assume correct orientation
-
-    return image
+def _fix_orientation(image: np.ndarray, side: str | None = None, exif: int | None = None) -> np.ndarray:
+    """Fix image orientation, falling back to Tesseract OSD only when needed."""
+    rotate, _tier = detect_orientation(image, side=side, exif=exif)
+    return apply_rotation(image, rotate)
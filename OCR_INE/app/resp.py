@@ -0,0 +1,114 @@
+"""Minimal Redis-protocol (RESP2) client used by the cache and job broker.
+
+Only what the service needs: one socket, synchronous request/response and a
+lock so worker threads can share the connection.  Works against Redis,
+Valkey, KeyDB or any local stand-in that speaks RESP.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+from urllib.parse import urlparse
+
+
+class RespError(Exception):
+    """Error reply from the server or a broken connection."""
+
+
+class RespClient:
+    def __init__(self, url: str, timeout: float = 2.0):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"unsupported RESP url scheme '{parsed.scheme}'")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def execute(self, *args):
+        """Send one command and return its decoded reply."""
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._roundtrip(args)
+            except (OSError, EOFError) as e:
+                self._close()
+                raise RespError(f"RESP connection failed: {e}") from e
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        try:
+            if self.password:
+                self._roundtrip(("AUTH", self.password))
+            if self.db:
+                self._roundtrip(("SELECT", self.db))
+        except BaseException:
+            # Never keep a socket that is not authenticated / on the right db.
+            self._close()
+            raise
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _roundtrip(self, args):
+        self._sock.sendall(encode_command(*args))
+        reply = read_reply(self._reader)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+
+def encode_command(*args) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        else:
+            data = str(arg).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+def read_reply(reader):
+    """Read one RESP reply; error replies are returned as RespError."""
+    line = reader.readline()
+    if not line:
+        raise EOFError("connection closed")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode("utf-8")
+    if kind == b"-":
+        return RespError(payload.decode("utf-8"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [read_reply(reader) for _ in range(count)]
+    raise RespError(f"unexpected RESP reply: {line!r}")
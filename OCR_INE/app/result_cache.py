@@ -0,0 +1,144 @@
+"""Content-addressed cache of OCR results (72h by default, per OCR_INE_SPEC §0.3).
+
+Each side is cached under a hash of its image bytes, so a retry that keeps
+the same back photo but sends a new front only recomputes the front.  Full
+responses are also cached under the caller's ``client_request_id``.
+Only parsed results are stored — never images or raw OCR text.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from .config import settings
+from .resp import RespClient, RespError
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(data: bytes) -> str:
+    """Fast, collision-resistant hash of an image payload."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class MemoryCache:
+    """In-process LRU with a size bound and a TTL per entry."""
+
+    def __init__(self, max_entries: int, ttl_s: int):
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """Cache stored in a Redis-protocol server (shared across containers)."""
+
+    def __init__(self, client: RespClient, ttl_s: int, prefix: str = "ocr-ine:"):
+        self.client = client
+        self.ttl_s = ttl_s
+        self.prefix = prefix
+
+    def get(self, key: str) -> dict | None:
+        raw = self.client.execute("GET", self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict) -> None:
+        payload = json.dumps(value, separators=(",", ":"))
+        self.client.execute("SET", self.prefix + key, payload, "EX", self.ttl_s)
+
+
+class ResultCache:
+    """Namespaced result cache with hit/miss counters.
+
+    Backend failures are logged and treated as misses: the cache must never
+    break an extraction.
+    """
+
+    KINDS = ("front", "back", "request")
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._counters = {kind: {"hits": 0, "misses": 0} for kind in self.KINDS}
+        self._errors = 0
+
+    def get(self, kind: str, key: str) -> dict | None:
+        try:
+            value = self.backend.get(f"{kind}:{key}")
+        except RespError as e:
+            logger.warning("Result cache unavailable: %s", e)
+            value = None
+            with self._lock:
+                self._errors += 1
+        with self._lock:
+            self._counters[kind]["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, kind: str, key: str, value: dict) -> None:
+        try:
+            self.backend.set(f"{kind}:{key}", value)
+        except RespError as e:
+            logger.warning("Result cache unavailable: %s", e)
+            with self._lock:
+                self._errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            out: dict = {kind: dict(c) for kind, c in self._counters.items()}
+            out["errors"] = self._errors
+        out["backend"] = type(self.backend).__name__
+        return out
+
+
+_cache: ResultCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache | None:
+    """Return the configured cache, or None when CACHE_BACKEND=none."""
+    global _cache
+    if _cache is None and settings.cache_backend != "none":
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(_build_backend())
+    return _cache
+
+
+def reset_result_cache() -> None:
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def _build_backend():
+    if settings.cache_backend == "redis":
+        return RedisCache(RespClient(settings.redis_url), settings.cache_ttl_s)
+    return MemoryCache(settings.cache_max_entries, settings.cache_ttl_s)
@@ -0,0 +1,100 @@
+"""Field-level retry planning: keep the best value per field across OCR attempts.
+
+Each retry re-OCRs only the ROIs whose fields are still missing or would be
+flagged for review, instead of re-parsing the whole side.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from .confidence import (
+    pattern_score_address,
+    pattern_score_cp,
+    pattern_score_curp,
+    pattern_score_id_ine,
+    pattern_score_name,
+    pattern_score_seccion,
+    score_field,
+)
+from .models import FieldResult
+
+# ROI → {field it yields: pattern scorer}
+FRONT_ROI_FIELDS: dict[str, dict[str, Callable[[str], float]]] = {
+    "apellidos": {"apellido_paterno": pattern_score_name, "apellido_materno": pattern_score_name},
+    "nombre": {"nombre": pattern_score_name},
+    "domicilio": {
+        "domicilio_calle": pattern_score_address,
+        "domicilio_colonia": pattern_score_address,
+        "domicilio_codigo_postal": pattern_score_cp,
+    },
+    "seccion": {"seccional": pattern_score_seccion},
+}
+BACK_ROI_FIELDS: dict[str, dict[str, Callable[[str], float]]] = {
+    "id_ine": {"id_ine": pattern_score_id_ine},
+    "curp": {"curp": pattern_score_curp},
+}
+
+
+class RetryPlan:
+    """Best value seen for each field of a set of ROIs.
+
+    Callers :meth:`offer` whatever an attempt produced; :meth:`pending`
+    then lists only the ROIs with a field that ``score_field`` would still
+    flag for review — missing, badly shaped, or read with low Tesseract
+    confidence.  Image quality and context do not change between attempts,
+    so a field only improves through its pattern and OCR confidence.
+    """
+
+    def __init__(
+        self,
+        roi_fields: dict[str, dict[str, Callable[[str], float]]],
+        quality: float,
+        context: float,
+    ):
+        self._roi_fields = roi_fields
+        self._scorers = {field: scorer for fields in roi_fields.values() for field, scorer in fields.items()}
+        self._quality = quality
+        self._context = context
+        self._best: dict[str, tuple[FieldResult, str | None, float | None]] = {}
+
+    def offer(self, values: dict) -> None:
+        """Keep each planned field of ``values`` that beats the best so far.
+
+        ``values["ocr_confidence"]``, when present, maps fields to
+        Tesseract's confidence for them (see the parsers).
+        """
+        ocr_confidence = values.get("ocr_confidence") or {}
+        for field, value in values.items():
+            scorer = self._scorers.get(field)
+            if scorer is None:
+                continue
+            ocr = ocr_confidence.get(field)
+            scored = score_field(value, scorer(value or ""), self._quality, self._context, ocr)
+            best = self._best.get(field)
+            if best is None or _rank(scored) > _rank(best[0]):
+                self._best[field] = (scored, value, ocr)
+
+    def confidence(self, field: str) -> float:
+        best = self._best.get(field)
+        return best[0].confidence if best else 0.0
+
+    def pending(self) -> list[str]:
+        """ROIs with at least one field still missing or flagged for review."""
+        return [
+            roi for roi, fields in self._roi_fields.items()
+            if any(field not in self._best or self._best[field][0].requires_review for field in fields)
+        ]
+
+    def values(self) -> dict:
+        """Best value per field, plus their ``ocr_confidence`` where known."""
+        values: dict = {field: value for field, (_, value, _) in self._best.items()}
+        ocr_confidence = {field: ocr for field, (_, _, ocr) in self._best.items() if ocr is not None}
+        if ocr_confidence:
+            values["ocr_confidence"] = ocr_confidence
+        return values
+
+
+def _rank(scored: FieldResult) -> tuple[bool, float]:
+    """A read that needs no review beats any that does; then higher confidence wins."""
+    return not scored.requires_review, scored.confidence
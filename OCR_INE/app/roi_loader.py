@@ -2,6 +2,9 @@
 
 import json
 import pathlib
+from functools import lru_cache
+
+from .config import settings
 
 _TEMPLATES_PATH = pathlib.Path(__file__).parent / "templates" / "roi_templates.json"
 
@@ -13,6 +16,8 @@ def _load() -> dict:
 
 TEMPLATES: dict = _load()
 
+PixelBox = tuple[int, int, int, int]
+
 
 def get_front_rois() -> dict[str, list[float]]:
     """Return ROIs for the front side of the INE (same for all models)."""
@@ -33,3 +38,37 @@ def expand_roi(roi: list[float], expand_x: float = 0.03, expand_y: float = 0.02)
         min(1.0, x2 + expand_x),
         min(1.0, y2 + expand_y),
     ]
+
+
+@lru_cache(maxsize=1024)
+def _pixel_box(roi: tuple[float, ...], width: int, height: int) -> PixelBox:
+    x1 = int(roi[0] * width)
+    y1 = int(roi[1] * height)
+    x2 = int(roi[2] * width)
+    y2 = int(roi[3] * height)
+
+    # Ensure valid bounds
+    x1 = max(0, min(x1, width - 1))
+    y1 = max(0, min(y1, height - 1))
+    x2 = max(x1 + 1, min(x2, width))
+    y2 = max(y1 + 1, min(y2, height))
+    return x1, y1, x2, y2
+
+
+def to_pixel_box(roi: list[float], width: int, height: int) -> PixelBox:
+    """Convert a normalised ROI to clamped integer pixels (x1, y1, x2, y2).
+
+    Results are memoised, so template ROIs on canonical-size cards resolve
+    to precomputed boxes.
+    """
+    return _pixel_box(tuple(roi), width, height)
+
+
+# Template ROIs as integer boxes for the canonical rectified card size.
+PIXEL_TEMPLATES: dict[str, dict[str, PixelBox]] = {
+    group: {
+        name: to_pixel_box(roi, settings.card_width, settings.card_height)
+        for name, roi in rois.items()
+    }
+    for group, rois in TEMPLATES.items()
+}
@@ -0,0 +1,48 @@
+"""Single-flight — concurrent identical requests share one computation."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    """Deduplicate in-flight coroutines by key.
+
+    The first caller for a key starts the computation; callers arriving
+    while it runs attach to the same task and receive the same result (or
+    exception).  Each caller awaits the task through ``asyncio.shield``, so
+    a disconnecting client only cancels its own wait, never the shared work.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self._started = 0
+        self._shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Run ``fn()`` once per key at a time.
+
+        Returns:
+            (result, shared) where shared is True if this caller attached to
+            a computation started by someone else.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._started += 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self._shared += 1
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "started": self._started, "shared": self._shared}
@@ -0,0 +1,124 @@
+"""Speculative OCR: several preprocessing variants at once, first good read wins.
+
+Opt-in (``SPECULATIVE_ID_INE``).  The first task runs on the caller's
+thread; the others run on spare cores, as many as the request's share
+(``SPECULATIVE_PER_REQUEST``) and the process-wide slots
+(``SPECULATIVE_SLOTS``) allow — a request never waits for a slot, it just
+speculates less.  Once the caller has its answer the rest are cancelled:
+queued ones never start and running ones skip any OCR they have not begun.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Generic, Iterator, Sequence, TypeVar
+
+from . import deadline
+from .config import settings
+
+T = TypeVar("T")
+
+
+class Race(Generic[T]):
+    """Run ``tasks`` concurrently within the CPU budget; iterate results as they finish.
+
+    Use as a context manager and break out of the loop once a result is
+    good enough; leaving the block cancels whatever is still running.
+    Results come as ``(index, value)``; ``launched`` lists the indices
+    given a slot, so tasks left out can be retried later, and ``started``
+    those that actually began (a queued task cancelled in time never does).
+    """
+
+    def __init__(self, tasks: Sequence[Callable[[], T]]):
+        self._tasks = list(tasks)
+        self._futures: dict[Future, int] = {}
+        self._deadlines: list[deadline.Deadline] = []
+        self.launched: list[int] = []
+        self.started: list[int] = []
+        self._slots = _get_slots()
+
+    def __enter__(self) -> "Race[T]":
+        if not self._tasks:
+            return self
+        self.launched.append(0)
+        extra = min(len(self._tasks) - 1, settings.speculative_per_request)
+        for index in range(1, 1 + extra):
+            if not self._slots.acquire(blocking=False):
+                break
+            self._futures[self._launch(index)] = index
+            self.launched.append(index)
+        return self
+
+    def __iter__(self) -> Iterator[tuple[int, T]]:
+        if not self._tasks:
+            return
+        self.started.append(0)
+        yield 0, self._tasks[0]()
+        for future in as_completed(self._futures):
+            yield self._futures[future], future.result()
+
+    def __exit__(self, *exc) -> None:
+        for child in self._deadlines:
+            child.cancel()
+        for future in self._futures:
+            if future.cancel():
+                self._slots.release()
+
+    def _launch(self, index: int) -> Future:
+        parent = deadline.current()
+        child = deadline.Deadline(parent.remaining_ms() if parent else settings.time_budget_ms)
+        self._deadlines.append(child)
+
+        def run() -> T:
+            self.started.append(index)
+            try:
+                with deadline.running(child):
+                    return self._tasks[index]()
+            finally:
+                self._slots.release()
+
+        # Copy the context so timings land in this run's recorder.
+        ctx = contextvars.copy_context()
+        return _get_executor().submit(ctx.run, run)
+
+
+# ── Shared capacity ──────────────────────────────────────────────────────────
+_executor: ThreadPoolExecutor | None = None
+_slots: threading.BoundedSemaphore | None = None
+_lock = threading.Lock()
+
+
+def slot_count() -> int:
+    """Spare cores speculative tasks may use in this process (0 disables speculation)."""
+    return settings.speculative_slots or max(0, settings.cpus() - 1)
+
+
+def _get_slots() -> threading.BoundedSemaphore:
+    global _slots
+    if _slots is None:
+        with _lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(slot_count())
+    return _slots
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, slot_count()), thread_name_prefix="ocr-spec")
+    return _executor
+
+
+def reset_speculation() -> None:
+    """Drop the shared executor and slots (after a settings change, in tests)."""
+    global _executor, _slots
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
+
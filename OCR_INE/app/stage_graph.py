@@ -0,0 +1,150 @@
+"""Declarative stage graph — run pipeline stages as a DAG on a worker pool."""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from .config import settings
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One node of the graph.
+
+    ``fn`` is called with the results of ``deps`` as positional arguments,
+    in the order they are listed.  A dependency may name another stage or
+    one of the inputs passed to :meth:`StageGraph.run`.
+    """
+    name: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass
+class GraphRun:
+    """Results and per-stage wall-clock timings (ms) of one graph run."""
+    results: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+class StageGraph:
+    """A validated, immutable DAG of stages."""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages: dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"duplicate stage '{stage.name}'")
+            self.stages[stage.name] = stage
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> list[str]:
+        order: list[str] = []
+        state: dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"cycle in stage graph: {' -> '.join(path + (name,))}")
+            state[name] = 1
+            for dep in self.stages[name].deps:
+                if dep in self.stages:
+                    visit(dep, path + (name,))
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, ())
+        return order
+
+    def run(self, inputs: dict[str, Any] | None = None, executor: Executor | None = None) -> GraphRun:
+        """Execute every stage once its dependencies are available.
+
+        Independent stages run concurrently on ``executor``; without one the
+        stages run inline in topological order.  The first stage exception
+        cancels the stages that have not started and is re-raised.
+        """
+        inputs = dict(inputs or {})
+        for stage in self.stages.values():
+            missing = [d for d in stage.deps if d not in self.stages and d not in inputs]
+            if missing:
+                raise ValueError(f"stage '{stage.name}' depends on unknown {missing}")
+
+        run = GraphRun(results=inputs)
+        if executor is None:
+            for name in self.order:
+                self._record(run, name, *self._call(self.stages[name], run.results))
+            return run
+
+        remaining = {
+            name: sum(1 for d in stage.deps if d in self.stages)
+            for name, stage in self.stages.items()
+        }
+        dependents: dict[str, list[str]] = {name: [] for name in self.stages}
+        for name, stage in self.stages.items():
+            for dep in stage.deps:
+                if dep in self.stages:
+                    dependents[dep].append(name)
+
+        running: dict[Future, str] = {}
+
+        def submit(name: str) -> None:
+            ctx = contextvars.copy_context()
+            future = executor.submit(ctx.run, self._call, self.stages[name], run.results)
+            running[future] = name
+
+        for name in self.order:
+            if remaining[name] == 0:
+                submit(name)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    value, elapsed_ms = future.result()
+                except BaseException:
+                    for pending in running:
+                        pending.cancel()
+                    raise
+                self._record(run, name, value, elapsed_ms)
+                for child in dependents[name]:
+                    remaining[child] -= 1
+                    if remaining[child] == 0:
+                        submit(child)
+        return run
+
+    @staticmethod
+    def _call(stage: Stage, results: dict[str, Any]) -> tuple[Any, float]:
+        args = [results[dep] for dep in stage.deps]
+        t0 = time.perf_counter()
+        value = stage.fn(*args)
+        return value, (time.perf_counter() - t0) * 1000
+
+    @staticmethod
+    def _record(run: GraphRun, name: str, value: Any, elapsed_ms: float) -> None:
+        run.results[name] = value
+        run.timings[name] = round(elapsed_ms, 2)
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Return the shared executor used to run stage nodes."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.stage_workers or settings.cpus(),
+                    thread_name_prefix="ocr-stage",
+                )
+    return _executor
@@ -0,0 +1,76 @@
+"""Per-run stage timings collected through a context variable.
+
+Code anywhere in the pipeline wraps work in ``timed(name)``; the durations
+land in the :class:`Recorder` active for the current run (graph nodes copy
+the context, so they share their run's recorder).  Outside a recording the
+cost is one ``perf_counter`` pair and a context-variable lookup.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from .models import Timings
+
+
+class Recorder:
+    """Ordered (name, ms, parent) entries of one pipeline run; safe across stage threads.
+
+    ``parent`` is the enclosing ``timed`` block, if any (e.g. a back ROI
+    inside ``back_attempt_2``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries: list[tuple[str, float, str | None]] = []
+
+    def add(self, name: str, elapsed_ms: float, parent: str | None = None) -> None:
+        with self._lock:
+            self.entries.append((name, round(elapsed_ms, 2), parent))
+
+
+_current: contextvars.ContextVar[Recorder | None] = contextvars.ContextVar("ocr_timings", default=None)
+_parent: contextvars.ContextVar[str | None] = contextvars.ContextVar("ocr_timing_parent", default=None)
+
+
+@contextmanager
+def recording() -> Iterator[Recorder]:
+    """Collect every ``timed`` block run in this context into a new recorder."""
+    recorder = Recorder()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record the wall-clock duration of the block under ``name``."""
+    parent = _parent.get()
+    token = _parent.set(name)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        _parent.reset(token)
+        recorder = _current.get()
+        if recorder is not None:
+            recorder.add(name, elapsed_ms, parent)
+
+
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+
+def server_timing_header(timings: Timings) -> str:
+    """Render top-level stages as a ``Server-Timing`` header (shown by browser devtools)."""
+    metrics = [("queue", timings.queue_ms)]
+    metrics += [(stage.name, stage.ms) for stage in timings.stages if stage.parent is None]
+    metrics.append(("total", timings.total_ms))
+    return ", ".join(f"{_TOKEN_UNSAFE.sub('_', name)};dur={ms}" for name, ms in metrics)
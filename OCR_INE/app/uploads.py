@@ -0,0 +1,44 @@
+"""Validation shared by every endpoint that receives card images."""
+
+from __future__ import annotations
+
+from .config import settings
+from .models import ErrorResponse
+
+ALLOWED_TYPES = {"image/jpeg", "image/png", "image/jpg"}
+MAX_SIZE = settings.max_image_size_mb * 1024 * 1024  # bytes
+MIN_SIZE = 1000  # bytes; anything smaller is not a usable photo
+
+
+class UploadRejected(Exception):
+    """An image failed validation; carries the HTTP status and error body."""
+
+    def __init__(self, status_code: int, error: ErrorResponse):
+        super().__init__(error.message)
+        self.status_code = status_code
+        self.error = error
+
+
+def check_content_type(which: str, content_type: str | None) -> None:
+    """Reject declared content types other than JPEG/PNG (absent is allowed)."""
+    if content_type and content_type not in ALLOWED_TYPES:
+        raise UploadRejected(415, ErrorResponse(
+            error_code="UNSUPPORTED_MEDIA_TYPE",
+            message=f"{which} type '{content_type}' not supported",
+        ))
+
+
+def check_size(which: str, size: int) -> None:
+    """Reject images over MAX_IMAGE_SIZE_MB or too small to be a photo."""
+    if size > MAX_SIZE:
+        raise UploadRejected(422, ErrorResponse(
+            error_code="IMAGE_TOO_LARGE",
+            message=f"{which} exceeds {settings.max_image_size_mb}MB limit",
+            details={"which": which},
+        ))
+    if size < MIN_SIZE:
+        raise UploadRejected(422, ErrorResponse(
+            error_code="IMAGE_TOO_SMALL",
+            message=f"{which} is too small — likely not a valid image",
+            details={"which": which},
+        ))
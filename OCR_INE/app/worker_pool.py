@@ -0,0 +1,215 @@
+"""Bounded worker pool that runs the OCR pipeline off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+from . import deadline, metrics
+from .config import settings
+from .models import OcrResponse
+from .pipeline import process_ine
+
+logger = logging.getLogger(__name__)
+
+
+class PoolBusy(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int, queue_depth: int):
+        super().__init__("OCR worker pool is saturated")
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+
+class WorkerPool:
+    """Run ``process_ine`` on a thread or process pool with a bounded queue.
+
+    At most ``workers`` requests run at once and ``max_queue`` more may wait;
+    anything beyond that is rejected with :class:`PoolBusy` so the caller can
+    answer 503 instead of piling requests up on the event loop.
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = 1, max_queue: int = 0):
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Executor = self._make_executor()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_ms_total = 0
+        self._wait_ms_max = 0
+
+    def _make_executor(self) -> Executor:
+        if self.mode == "process":
+            # spawn: the parent holds threads (event loop, engine pools)
+            ctx = multiprocessing.get_context("spawn")
+            cpus = max(1, settings.cpus() // self.workers)
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                       initializer=_init_process_worker,
+                                       initargs=(cpus, deadline.costs()))
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr-worker")
+
+    async def process(self, front_bytes: bytes, back_bytes: bytes, **options) -> tuple[OcrResponse, int]:
+        """Run the pipeline for one card.
+
+        Returns:
+            (result, wait_ms) where wait_ms is the time spent queued.
+
+        Raises:
+            PoolBusy: if the pool and its queue are full.
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PoolBusy(settings.busy_retry_after_s, self._queued())
+            self._pending += 1
+
+        loop = asyncio.get_running_loop()
+        enqueued = time.monotonic()
+        try:
+            if self.mode == "process":
+                run = await self._run_shared(loop, enqueued, front_bytes, back_bytes, options)
+            else:
+                run = await loop.run_in_executor(
+                    self._executor, _run_timed, front_bytes, back_bytes, options,
+                )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        wait_ms = max(0, int((run.started - enqueued) * 1000))
+        with self._lock:
+            self._completed += 1
+            self._wait_ms_total += wait_ms
+            self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+        if run.result.timings is not None:
+            run.result.timings.queue_ms = wait_ms
+        metrics.record_extraction(run.result, wait_ms, run.pid, run.cpu_s)
+        return run.result, wait_ms
+
+    async def _run_shared(self, loop, enqueued, front_bytes, back_bytes, options):
+        """Hand both images to a child process through one shared-memory block."""
+        size = len(front_bytes) + len(back_bytes)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        try:
+            shm.buf[:len(front_bytes)] = front_bytes
+            shm.buf[len(front_bytes):size] = back_bytes
+            return await loop.run_in_executor(
+                self._executor, _run_from_shared_memory,
+                shm.name, len(front_bytes), len(back_bytes), options,
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def has_capacity(self) -> bool:
+        """True if :meth:`process` would accept a request right now."""
+        with self._lock:
+            return self._pending < self.workers + self.max_queue
+
+    def _queued(self) -> int:
+        return max(0, self._pending - self.workers)
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth and wait times."""
+        with self._lock:
+            completed = self._completed
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": min(self._pending, self.workers),
+                "queue_depth": self._queued(),
+                "completed": completed,
+                "rejected": self._rejected,
+                "wait_ms_avg": round(self._wait_ms_total / completed, 1) if completed else 0.0,
+                "wait_ms_max": self._wait_ms_max,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass
+class _Run:
+    """What a worker hands back: the result (with its timings) plus CPU accounting."""
+    result: OcrResponse
+    started: float
+    pid: int
+    cpu_s: float
+
+
+def _init_process_worker(cpus: int, step_costs: dict[str, float]) -> None:
+    """Child-process start-up: take this worker's CPU share and the parent's step costs.
+
+    Every child sizes its engines, stage threads and speculative slots for
+    ``cpus`` (CPUs / WORKERS) instead of the whole machine, and starts from
+    the costs the parent calibrated rather than calibrating again.
+    """
+    settings.process_cpus = cpus
+    deadline.load_costs(step_costs)
+
+
+def _run_timed(front_bytes, back_bytes, options: dict) -> _Run:
+    started = time.monotonic()
+    result = process_ine(front_bytes, back_bytes, **options)
+    cpu_s = metrics.child_cpu_seconds(include_self=multiprocessing.parent_process() is not None)
+    return _Run(result, started, os.getpid(), cpu_s)
+
+
+def _run_from_shared_memory(name: str, front_len: int, back_len: int, options: dict) -> _Run:
+    """Child-process entry point: read both images straight from shared memory."""
+    shm = shared_memory.SharedMemory(name=name)
+    # The parent owns the block; keep this process's tracker from unlinking it.
+    resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        front = shm.buf[:front_len]
+        back = shm.buf[front_len:front_len + back_len]
+        try:
+            return _run_timed(front, back, options)
+        finally:
+            front.release()
+            back.release()
+    finally:
+        shm.close()
+
+
+_pool: WorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """Return the application-wide worker pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WorkerPool(
+                    mode=settings.worker_mode,
+                    workers=settings.workers or settings.cpus(),
+                    max_queue=settings.worker_queue_size,
+                )
+                logger.info("Worker pool: mode=%s, workers=%d, queue=%d",
+                            _pool.mode, _pool.workers, _pool.max_queue)
+                if _pool.mode == "process" and settings.cache_backend == "memory":
+                    logger.warning("WORKER_MODE=process with CACHE_BACKEND=memory: every worker keeps "
+                                   "its own cache and /health shows none of it; use CACHE_BACKEND=redis")
+    return _pool
+
+
+def shutdown_worker_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
@@ -0,0 +1,95 @@
+"""Benchmark the shared per-image ImageContext against per-stage conversions.
+
+Runs the image-analysis steps of one side — quality, rectification,
+classification and barcode decoding (back), ROI cropping — once with a
+single ``ImageContext`` per image, as the pipeline does, and once with a
+fresh context per step (every step converts and downscales for itself, as
+before the context existed).  Reports the median time and the derived
+buffers allocated (count and MB) for each.
+
+Usage (from OCR_INE/):
+    python -m benchmarks.bench_context [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from dataclasses import asdict
+
+import cv2
+import numpy as np
+
+from app.aligner import crop_roi
+from app.classifier import MODEL_PDF417, MODEL_QR, classify, read_barcodes
+from app.image_context import ImageContext
+from app.pipeline import decode_image
+from app.quality import assess_quality
+from app.rectifier import rectify
+from app.roi_loader import get_back_rois, get_front_rois
+from benchmarks.synthetic import PRESETS, RESOLUTIONS, Degradation, make_pair
+
+
+def _side(image: np.ndarray, side: str, rois: dict, shared: bool) -> list[int]:
+    """Run one side's analysis steps; return the size of every derived buffer."""
+    contexts: list[ImageContext] = []
+    extra: list[int] = []
+
+    def context(img: np.ndarray) -> ImageContext:
+        if shared and contexts and contexts[-1].image is img:
+            return contexts[-1]
+        contexts.append(ImageContext(img))
+        return contexts[-1]
+
+    assess_quality(context(image))
+    rectified, _ = rectify(context(image), side=side)
+    if side == "back":
+        model_id, _ = classify(context(rectified))
+        read_barcodes(context(rectified), model_id)
+    for roi in rois.values():
+        if shared:
+            crop_roi(context(rectified).gray, roi)
+        else:
+            extra.append(cv2.cvtColor(crop_roi(rectified, roi), cv2.COLOR_BGR2GRAY).nbytes)
+    return [n for ctx in contexts for n in ctx.computed.values() if n] + extra
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=list(RESOLUTIONS))
+    args = parser.parse_args()
+
+    print(f"{'case':<32} {'separate ms':>11} {'bufs':>5} {'MB':>6} "
+          f"{'shared ms':>10} {'bufs':>5} {'MB':>6}")
+    for model_id in (MODEL_QR, MODEL_PDF417):
+        for resolution in args.resolutions:
+            degradation = Degradation(**{**asdict(PRESETS["typical"]), "resolution": resolution})
+            front_bytes, back_bytes, _ = make_pair(7, degradation, model_id)
+            for side, raw, rois in (
+                ("front", front_bytes, get_front_rois()),
+                ("back", back_bytes, get_back_rois(model_id)),
+            ):
+                image = decode_image(raw)
+                row = []
+                for shared in (False, True):
+                    buffers = _side(image, side, rois, shared)
+                    ms = _median_ms(lambda: _side(image, side, rois, shared), args.repeat)
+                    row.append(f"{ms:>10.1f} {len(buffers):>5} {sum(buffers) / 1e6:>6.2f}")
+                case = f"{model_id.split('_')[1]}/{resolution}/{side}"
+                print(f"{case:<32} {row[0]:>11} {row[1]}")
+
+
+if __name__ == "__main__":
+    main()
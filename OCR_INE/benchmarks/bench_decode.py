@@ -0,0 +1,67 @@
+"""Benchmark full vs. resolution-aware JPEG decoding.
+
+Usage (from OCR_INE/):
+    python -m benchmarks.bench_decode [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+from app.pipeline import _decode_flag, decode_image
+
+SIZES = [(1280, 960), (2592, 1944), (4000, 3000), (4624, 3472), (8000, 6000)]
+
+
+def _photo(width: int, height: int) -> bytes:
+    """A JPEG with photo-like content (smooth gradients plus sensor noise)."""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = (np.sin(xx / 37.0) + np.cos(yy / 23.0)) * 60 + 128
+    img = np.clip(base[..., None] + rng.normal(0, 12, (height, width, 3)), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(img).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _time_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"decode_target_px={settings.decode_target_px}")
+    print(f"{'input':>11} {'jpeg MB':>8} {'full ms':>8} {'full MB':>8} "
+          f"{'scaled':>11} {'ms':>7} {'MB':>6} {'speedup':>8}")
+    for width, height in SIZES:
+        raw = _photo(width, height)
+        arr = np.frombuffer(raw, dtype=np.uint8)
+
+        full = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        scaled = decode_image(raw)
+        full_ms = _time_ms(lambda: cv2.imdecode(arr, cv2.IMREAD_COLOR), args.repeat)
+        scaled_ms = _time_ms(lambda: decode_image(raw), args.repeat)
+        reduced = "yes" if _decode_flag(raw) != cv2.IMREAD_COLOR else "no"
+
+        print(f"{width:>5}x{height:<5} {len(raw) / 1e6:>8.2f} {full_ms:>8.1f} {full.nbytes / 1e6:>8.1f} "
+              f"{scaled.shape[1]:>5}x{scaled.shape[0]:<5} {scaled_ms:>7.1f} {scaled.nbytes / 1e6:>6.1f} "
+              f"{full_ms / scaled_ms:>7.1f}x  reduced={reduced}")
+
+
+if __name__ == "__main__":
+    main()
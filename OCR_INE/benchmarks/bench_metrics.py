@@ -0,0 +1,84 @@
+"""Measure the overhead of stage timing and metrics instrumentation.
+
+Usage (from OCR_INE/):
+    python -m benchmarks.bench_metrics [--runs 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+
+from PIL import Image
+
+from app import metrics
+from app.pipeline import process_ine
+from app.result_cache import reset_result_cache
+from app.config import settings
+from app.timing import recording, timed
+
+
+def _jpeg(shade: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (856, 540), (shade, shade, shade)).save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _per_call_ns(fn, n: int = 200_000) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def _noop_timed() -> None:
+    with timed("bench"):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    settings.cache_backend = "none"
+    reset_result_cache()
+
+    bare = _per_call_ns(_noop_timed)
+    with recording():
+        active = _per_call_ns(_noop_timed)
+    observe = _per_call_ns(lambda: metrics.stage_seconds.observe(0.012, "bench"))
+
+    front, back = _jpeg(200), _jpeg(190)
+    process_ine(front, back)  # warm up engines and the stage graph
+    pipeline_ms = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        result = process_ine(front, back)
+        pipeline_ms.append((time.perf_counter() - t0) * 1000)
+    entries = result.timings.stages
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        metrics.record_extraction(result, wait_ms=0)
+    record_us = (time.perf_counter() - t0) / 1000 * 1e6
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        metrics.render()
+    render_ms = (time.perf_counter() - t0) / 100 * 1000
+
+    per_request_us = len(entries) * active / 1000 + record_us
+    best_ms = min(pipeline_ms)
+    print(f"timed() without recorder : {bare:8.0f} ns/call")
+    print(f"timed() while recording  : {active:8.0f} ns/call")
+    print(f"histogram observe        : {observe:8.0f} ns/call")
+    print(f"record_extraction        : {record_us:8.1f} us/request ({len(entries)} stage entries)")
+    print(f"/metrics render          : {render_ms:8.2f} ms/scrape")
+    print(f"pipeline (best of {args.runs})     : {best_ms:8.1f} ms/request")
+    print(f"instrumentation overhead : {per_request_us:8.1f} us/request "
+          f"({per_request_us / 10 / best_ms:.4f}% of the pipeline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Per-stage micro-benchmarks on synthetic cards, with a stored baseline.
+
+Times each pipeline stage in isolation — decode, quality, rectify,
+classify, read_barcodes, parse_front, parse_back — and the full
+``process_ine``, for both card models at several photo resolutions.
+``--save`` writes the medians to a baseline file; ``--check`` compares
+against it and exits non-zero when any stage got slower than
+``--threshold`` times its baseline, or when the baseline does not cover
+the current stage set.  Baselines are machine-specific and not versioned:
+record one with ``--save`` on the reference machine, which must have
+Tesseract (without it the OCR stages only time the missing-binary error).
+
+Usage (from OCR_INE/):
+    python -m benchmarks.bench_stages [--repeat 5] [--baseline FILE (--save | --check)] [--threshold 1.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict
+
+import cv2
+import pytesseract
+
+from app import ocr_engine
+from app.back_parser import parse_back
+from app.classifier import MODEL_PDF417, MODEL_QR, classify, read_barcodes
+from app.config import settings
+from app.front_parser import parse_front
+from app.pipeline import decode_image, process_ine
+from app.quality import assess_quality
+from app.rectifier import rectify
+from app.result_cache import reset_result_cache
+from benchmarks.synthetic import PRESETS, RESOLUTIONS, Degradation, make_pair
+
+# Differences below this are timer noise, whatever the ratio says.
+_NOISE_FLOOR_MS = 2.0
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()  # warm-up (lazy imports, OCR engine, caches)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def run_case(model_id: str, resolution: int, repeat: int, seed: int = 7) -> dict[str, float]:
+    """Median ms per stage for one synthetic pair."""
+    degradation = Degradation(**{**asdict(PRESETS["typical"]), "resolution": resolution})
+    front_bytes, back_bytes, _ = make_pair(seed, degradation, model_id)
+    front = decode_image(front_bytes)
+    back = decode_image(back_bytes)
+    rect_front, _ = rectify(front, side="front")
+    rect_back, _ = rectify(back, side="back")
+    detected, bboxes = classify(rect_back)
+
+    return {
+        "decode": _median_ms(lambda: decode_image(back_bytes), repeat),
+        "assess_quality": _median_ms(lambda: assess_quality(back), repeat),
+        "rectify_front": _median_ms(lambda: rectify(front, side="front"), repeat),
+        "rectify_back": _median_ms(lambda: rectify(back, side="back"), repeat),
+        "classify": _median_ms(lambda: classify(rect_back), repeat),
+        "read_barcodes": _median_ms(lambda: read_barcodes(rect_back, detected), repeat),
+        "parse_front": _median_ms(lambda: parse_front(rect_front), repeat),
+        "parse_back": _median_ms(
+            lambda: parse_back(rect_back, model_id=detected, feature_bboxes=bboxes), repeat,
+        ),
+        "process_ine": _median_ms(lambda: process_ine(front_bytes, back_bytes), repeat),
+    }
+
+
+def run_all(repeat: int, resolutions=RESOLUTIONS) -> dict[str, float]:
+    """``{"<model>/<resolution>/<stage>": median_ms}`` over every case."""
+    settings.cache_backend = "none"  # every process_ine call must do the work
+    reset_result_cache()
+    results = {}
+    for model_id in (MODEL_QR, MODEL_PDF417):
+        for resolution in resolutions:
+            for stage, ms in run_case(model_id, resolution, repeat).items():
+                results[f"{model_id}/{resolution}/{stage}"] = ms
+    return results
+
+
+def compare(current: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """Regressions as human-readable lines (empty when everything is within threshold)."""
+    regressions = []
+    for key, ms in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if ms > base * threshold and ms - base > _NOISE_FLOOR_MS:
+            regressions.append(f"{key}: {base:.1f} ms -> {ms:.1f} ms ({ms / base:.2f}x)")
+    return regressions
+
+
+def _machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "tesseract": _tesseract_version(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _tesseract_version() -> str | None:
+    """Version of the Tesseract the OCR stages run, None when it is missing."""
+    if ocr_engine.tesserocr is not None and settings.ocr_engine != "subprocess":
+        return ocr_engine.tesserocr.tesseract_version().splitlines()[0]
+    pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except pytesseract.TesseractNotFoundError:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=list(RESOLUTIONS))
+    parser.add_argument("--baseline", type=pathlib.Path, default=None,
+                        help="baseline file to write (--save) or compare against (--check)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    mode.add_argument("--check", action="store_true", help="fail if any stage regressed")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="allowed slowdown ratio before --check fails")
+    args = parser.parse_args()
+    if (args.save or args.check) and args.baseline is None:
+        parser.error("--save and --check need an explicit --baseline file")
+    if (args.save or args.check) and _tesseract_version() is None:
+        sys.exit("Tesseract is not available: the OCR stages would only time the missing-binary error")
+
+    current = run_all(args.repeat, args.resolutions)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline and args.baseline.exists() else None
+    base_stages = baseline["stages"] if baseline else {}
+
+    print(f"{'case':<48} {'ms':>9} {'baseline':>9} {'ratio':>6}")
+    for key, ms in current.items():
+        base = base_stages.get(key)
+        ratio = f"{ms / base:5.2f}x" if base else ""
+        print(f"{key:<48} {ms:>9.1f} {base if base is not None else '':>9} {ratio:>6}")
+
+    if args.save:
+        args.baseline.write_text(json.dumps(
+            {"machine": _machine(), "repeat": args.repeat, "stages": current}, indent=2,
+        ) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if args.check:
+        if baseline is None:
+            sys.exit(f"No baseline at {args.baseline}; run with --save first")
+        if baseline.get("machine") != _machine():
+            print(f"\nWarning: baseline was recorded on {baseline.get('machine')}")
+        missing = sorted(current.keys() - base_stages.keys())
+        if missing:
+            print(f"\nBaseline has no entry for {len(missing)} case(s), e.g. {missing[0]}; "
+                  f"re-record it with --save")
+            sys.exit(1)
+        regressions = compare(current, base_stages, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than {args.threshold}x baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold}x baseline.")
+
+
+if __name__ == "__main__":
+    main()
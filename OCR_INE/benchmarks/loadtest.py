@@ -0,0 +1,224 @@
+"""Load test — throughput and latency of ``/v1/ine/extract`` across a concurrency ramp.
+
+Drives the FastAPI app in-process over ASGI (default, the app's lifespan
+and worker pool included) or a running service with ``--url``.  At each
+concurrency level, that many closed-loop clients post pairs drawn at random
+from the image mix for ``--duration`` seconds.  Per level it reports
+throughput, latency percentiles, error and 503 rates and how often
+``time_budget_exceeded`` was returned.  Throughput flattening while p95
+climbs marks the concurrency one container can take; size the replicas in
+``render.yaml`` / docker-compose from that.
+
+By default a random suffix is appended after the JPEG end marker of both
+uploads, so the result cache and single-flight never short-circuit a run;
+in-process runs also switch the result cache off.  ``--allow-cache`` keeps
+both.
+
+Usage (from OCR_INE/):
+    python -m benchmarks.loadtest --concurrency 1 2 4 8 --duration 30
+    python -m benchmarks.loadtest --url http://localhost:8001 --images test_images/cropped
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import pathlib
+import random
+import time
+from dataclasses import asdict, dataclass
+
+import httpx
+
+from benchmarks.replay import find_pairs, percentile
+
+EXTRACT_PATH = "/v1/ine/extract"
+
+
+@dataclass
+class Sample:
+    status: int  # 0 when the request never got a response
+    ms: float
+    budget_exceeded: bool = False
+
+
+@dataclass
+class LevelReport:
+    concurrency: int
+    requests: int
+    elapsed_s: float
+    throughput_rps: float  # successful extractions per second
+    p50_ms: float | None
+    p95_ms: float | None
+    p99_ms: float | None
+    error_rate: float  # everything that is neither 200 nor 503
+    rejected_rate: float  # 503 from the worker pool's admission control
+    budget_exceeded_rate: float  # share of 200s carrying time_budget_exceeded
+
+
+def load_mix(images: pathlib.Path | None, synthetic: int) -> list[tuple[bytes, bytes]]:
+    """Image pairs to draw requests from."""
+    if images is not None:
+        pairs = [(p.front.read_bytes(), p.back.read_bytes()) for p in find_pairs(images)]
+        if not pairs:
+            raise SystemExit(f"No <id>_front/<id>_back pairs found in {images}")
+        return pairs
+
+    from benchmarks.synthetic import PRESETS, make_pair
+
+    presets = ["clean", "typical", "harsh"]
+    return [make_pair(seed, PRESETS[presets[seed % len(presets)]])[:2] for seed in range(synthetic)]
+
+
+def summarise(concurrency: int, samples: list[Sample], elapsed_s: float) -> LevelReport:
+    ok = [s for s in samples if s.status == 200]
+    latencies = [s.ms for s in ok]
+    total = len(samples) or 1
+
+    def pct(q):
+        value = percentile(latencies, q)
+        return round(value, 1) if value is not None else None
+
+    return LevelReport(
+        concurrency=concurrency,
+        requests=len(samples),
+        elapsed_s=round(elapsed_s, 2),
+        throughput_rps=round(len(ok) / elapsed_s, 3) if elapsed_s else 0.0,
+        p50_ms=pct(50),
+        p95_ms=pct(95),
+        p99_ms=pct(99),
+        error_rate=round(sum(s.status not in (200, 503) for s in samples) / total, 4),
+        rejected_rate=round(sum(s.status == 503 for s in samples) / total, 4),
+        budget_exceeded_rate=round(sum(s.budget_exceeded for s in ok) / len(ok), 4) if ok else 0.0,
+    )
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    mix: list[tuple[bytes, bytes]],
+    concurrency: int,
+    duration_s: float,
+    unique: bool = True,
+    api_key: str | None = None,
+) -> LevelReport:
+    """``concurrency`` closed-loop clients posting for ``duration_s`` seconds."""
+    samples: list[Sample] = []
+    headers = {"X-Api-Key": api_key} if api_key else {}
+    deadline = time.perf_counter() + duration_s
+
+    async def client_loop(rng: random.Random) -> None:
+        while True:  # at least one request per client
+            front, back = rng.choice(mix)
+            if unique:
+                front += os.urandom(8)
+                back += os.urandom(8)  # results are also cached per side
+            files = {
+                "front_image": ("front.jpg", front, "image/jpeg"),
+                "back_image": ("back.jpg", back, "image/jpeg"),
+            }
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(EXTRACT_PATH, files=files, headers=headers)
+            except httpx.HTTPError:
+                samples.append(Sample(status=0, ms=(time.perf_counter() - t0) * 1000))
+            else:
+                ms = (time.perf_counter() - t0) * 1000
+                exceeded = r.status_code == 200 and "time_budget_exceeded" in r.json().get("warnings", [])
+                samples.append(Sample(status=r.status_code, ms=ms, budget_exceeded=exceeded))
+                if r.status_code == 503:
+                    # Honour admission control like a well-behaved client would.
+                    await asyncio.sleep(min(float(r.headers.get("Retry-After", 1)), 1.0))
+            if time.perf_counter() >= deadline:
+                break
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client_loop(random.Random(i)) for i in range(concurrency)))
+    return summarise(concurrency, samples, time.perf_counter() - t0)
+
+
+@contextlib.asynccontextmanager
+async def open_client(url: str | None, timeout_s: float):
+    """HTTP client for ``url``, or for the app in-process with its lifespan running."""
+    timeout = httpx.Timeout(timeout_s)
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+async def run_ramp(args) -> list[LevelReport]:
+    mix = load_mix(args.images, args.synthetic)
+    if args.url is None and not args.allow_cache:
+        from app.config import settings
+        from app.result_cache import reset_result_cache
+
+        settings.cache_backend = "none"  # measure the pipeline, not the cache
+        reset_result_cache()
+    reports = []
+    async with open_client(args.url, args.timeout) as client:
+        # One request first, so engine start-up is not billed to level 1.
+        await run_level(client, mix[:1], 1, 0.0, api_key=args.api_key)
+        for concurrency in args.concurrency:
+            report = await run_level(client, mix, concurrency, args.duration,
+                                     unique=not args.allow_cache, api_key=args.api_key)
+            _print_level(report)
+            reports.append(report)
+    return reports
+
+
+def _print_header() -> None:
+    print(f"{'conc':>4} {'reqs':>6} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7} {'503':>7} {'budget':>7}")
+
+
+def _print_level(r: LevelReport) -> None:
+    def ms(v):
+        return f"{'-':>8}" if v is None else f"{v:>8.0f}"
+
+    print(f"{r.concurrency:>4} {r.requests:>6} {r.throughput_rps:>7.2f} {ms(r.p50_ms)} {ms(r.p95_ms)} "
+          f"{ms(r.p99_ms)} {r.error_rate:>7.1%} {r.rejected_rate:>7.1%} {r.budget_exceeded_rate:>7.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="target service (default: the app in-process)")
+    parser.add_argument("--images", type=pathlib.Path, default=None,
+                        help="directory of <id>_front/<id>_back pairs (default: synthetic cards)")
+    parser.add_argument("--synthetic", type=int, default=6, help="synthetic pairs to generate")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--allow-cache", action="store_true",
+                        help="send identical bytes again (measures cache hits too)")
+    parser.add_argument("--json", type=pathlib.Path, default=None, help="write the per-level report here")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's per-request logs")
+    args = parser.parse_args()
+    if not args.verbose:
+        for name in ("app", "httpx"):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    _print_header()
+    reports = asyncio.run(run_ramp(args))
+    best = max(reports, key=lambda r: r.throughput_rps)
+    print(f"\nPeak throughput {best.throughput_rps:.2f} req/s at concurrency {best.concurrency}")
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(
+            {"target": args.url or "in-process", "levels": [asdict(r) for r in reports]}, indent=2,
+        ) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Offline replay — run ``process_ine`` over a directory of card pairs in parallel.
+
+Pairs are found as ``<id>_front.jpg`` / ``<id>_back.jpg`` (``.jpeg``/``.png``
+also accepted); a ``<id>_truth.json`` next to them (the format written by
+``benchmarks.synthetic``) enables accuracy scoring.  The report gives,
+overall and per detected ``model_id`` and per quality grade:
+
+* per field: exact-match rate, review rate, and silent-error rate (wrong
+  but not flagged for review);
+* latency p50 / p95 / p99.
+
+Results are written as JSON (aggregates + one row per pair) and CSV (one
+row per pair) with stable ordering, so the reports of two builds diff
+cleanly.
+
+Usage (from OCR_INE/):
+    python -m benchmarks.replay test_images/synthetic --workers 4 \\
+        --json reports/replay.json --csv reports/replay.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import pathlib
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from app.models import BeneficiarioFields, DomicilioFields
+
+FIELDS = [f"beneficiarios.{name}" for name in BeneficiarioFields.model_fields] + [
+    f"domicilio.{name}" for name in DomicilioFields.model_fields
+]
+
+_PAIR = re.compile(r"^(?P<id>.+)_front\.(?P<ext>jpe?g|png)$", re.IGNORECASE)
+_GRADES = ("poor", "fair", "good")  # worst first; anything else is "unknown"
+
+
+@dataclass
+class Pair:
+    item_id: str
+    front: pathlib.Path
+    back: pathlib.Path
+    truth: pathlib.Path | None
+
+
+@dataclass
+class Row:
+    """Outcome of one replayed pair."""
+    item_id: str
+    ms: float = 0.0
+    model_id: str | None = None
+    expected_model_id: str | None = None
+    quality_grade: str = "unknown"
+    attempts: int = 0
+    warnings: list[str] = field(default_factory=list)
+    # field -> {"value", "expected", "match", "review"}; "match" is None without truth
+    fields: dict[str, dict] = field(default_factory=dict)
+    error: str | None = None
+
+
+def find_pairs(directory: pathlib.Path) -> list[Pair]:
+    pairs = []
+    for front in sorted(directory.iterdir()):
+        match = _PAIR.match(front.name)
+        if match is None:
+            continue
+        item_id = match["id"]
+        back = next((p for p in (directory / f"{item_id}_back.{ext}" for ext in ("jpg", "jpeg", "png"))
+                     if p.exists()), None)
+        if back is None:
+            continue
+        truth = directory / f"{item_id}_truth.json"
+        pairs.append(Pair(item_id, front, back, truth if truth.exists() else None))
+    return pairs
+
+
+# ── Running ──────────────────────────────────────────────────────────────────
+def _init_worker() -> None:
+    from app.config import settings
+    from app.result_cache import reset_result_cache
+
+    settings.cache_backend = "none"  # replays measure the pipeline, not the cache
+    reset_result_cache()
+
+
+def replay_pair(pair: Pair) -> Row:
+    """Run the pipeline on one pair (in a worker process) and score it."""
+    from app.pipeline import process_ine
+
+    row = Row(item_id=pair.item_id)
+    truth = json.loads(pair.truth.read_text()) if pair.truth else None
+    try:
+        front, back = pair.front.read_bytes(), pair.back.read_bytes()
+        t0 = time.perf_counter()
+        result = process_ine(front, back)
+        row.ms = round((time.perf_counter() - t0) * 1000, 1)
+    except Exception as e:
+        row.error = f"{type(e).__name__}: {e}"
+        return row
+    score(row, result.model_dump(), truth)
+    return row
+
+
+def score(row: Row, result: dict, truth: dict | None) -> None:
+    """Fill ``row`` from a serialised OcrResponse and optional ground truth."""
+    row.model_id = result["model_id"]
+    row.attempts = result["attempts"]
+    row.warnings = result["warnings"]
+    row.quality_grade = _worst_grade(
+        result["quality"]["front"]["quality_grade"], result["quality"]["back"]["quality_grade"],
+    )
+    if truth:
+        row.expected_model_id = truth.get("model_id")
+    for name in FIELDS:
+        group, key = name.split(".")
+        got = result[group][key]
+        expected = (truth or {}).get(group, {}).get(key)
+        row.fields[name] = {
+            "value": got["value"],
+            "expected": expected,
+            "match": None if expected is None else _normalise(got["value"]) == _normalise(expected),
+            "review": got["requires_review"],
+        }
+
+
+def run(pairs: list[Pair], workers: int) -> list[Row]:
+    if workers <= 1:
+        _init_worker()
+        return [replay_pair(pair) for pair in pairs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(replay_pair, pairs))
+
+
+def _normalise(value: str | None) -> str:
+    return " ".join((value or "").upper().split())
+
+
+def _worst_grade(*grades: str) -> str:
+    known = [g for g in grades if g in _GRADES]
+    return min(known, key=_GRADES.index) if known else "unknown"
+
+
+# ── Report ───────────────────────────────────────────────────────────────────
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile (``q`` in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def aggregate(rows: list[Row]) -> dict:
+    """Accuracy and latency for one group of rows."""
+    ok = [r for r in rows if r.error is None]
+    latencies = [r.ms for r in ok]
+    fields = {}
+    for name in FIELDS:
+        outcomes = [r.fields[name] for r in ok]
+        scored = [o for o in outcomes if o["match"] is not None]
+        fields[name] = {
+            "evaluated": len(scored),
+            "exact_match": _rate(sum(o["match"] for o in scored), len(scored)),
+            "review": _rate(sum(o["review"] for o in outcomes), len(outcomes)),
+            "silent_error": _rate(sum(not o["match"] and not o["review"] for o in scored), len(scored)),
+        }
+    with_model = [r for r in ok if r.expected_model_id]
+    return {
+        "count": len(rows),
+        "errors": len(rows) - len(ok),
+        "model_accuracy": _rate(sum(r.model_id == r.expected_model_id for r in with_model), len(with_model)),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else None,
+        },
+        "fields": fields,
+    }
+
+
+def build_report(rows: list[Row], wall_s: float, workers: int) -> dict:
+    rows = sorted(rows, key=lambda r: r.item_id)
+    by_model: dict[str, list[Row]] = {}
+    by_grade: dict[str, list[Row]] = {}
+    for row in rows:
+        by_model.setdefault(row.model_id or "error", []).append(row)
+        by_grade.setdefault(row.quality_grade, []).append(row)
+    return {
+        "run": {
+            "pairs": len(rows),
+            "workers": workers,
+            "wall_s": round(wall_s, 2),
+            "throughput_per_s": round(len(rows) / wall_s, 3) if wall_s else None,
+        },
+        "overall": aggregate(rows),
+        "by_model_id": {key: aggregate(group) for key, group in sorted(by_model.items())},
+        "by_quality_grade": {key: aggregate(group) for key, group in sorted(by_grade.items())},
+        "items": [asdict(row) for row in rows],
+    }
+
+
+def write_csv(rows: list[Row], path: pathlib.Path) -> None:
+    header = ["item_id", "model_id", "expected_model_id", "quality_grade", "ms", "attempts", "error"]
+    for name in FIELDS:
+        header += [f"{name}.match", f"{name}.review"]
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in sorted(rows, key=lambda r: r.item_id):
+            line = [row.item_id, row.model_id, row.expected_model_id, row.quality_grade,
+                    row.ms, row.attempts, row.error or ""]
+            for name in FIELDS:
+                outcome = row.fields.get(name, {})
+                match = outcome.get("match")
+                line += ["" if match is None else int(match), int(outcome.get("review", False))]
+            writer.writerow(line)
+
+
+def _rate(n: int, total: int) -> float | None:
+    return round(n / total, 4) if total else None
+
+
+def _print_summary(report: dict) -> None:
+    run_info, overall = report["run"], report["overall"]
+    print(f"{run_info['pairs']} pairs, {run_info['workers']} workers, {run_info['wall_s']} s "
+          f"({run_info['throughput_per_s']} pairs/s), {overall['errors']} errors")
+    print(f"\n{'field':<32} {'evaluated':>9} {'exact':>7} {'review':>7} {'silent':>7}")
+    for name, stats in overall["fields"].items():
+        print(f"{name:<32} {stats['evaluated']:>9} {_pct(stats['exact_match'])} "
+              f"{_pct(stats['review'])} {_pct(stats['silent_error'])}")
+    print(f"\n{'group':<40} {'n':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for title, groups in (("model_id", report["by_model_id"]), ("quality", report["by_quality_grade"])):
+        for key, stats in groups.items():
+            lat = stats["latency_ms"]
+            print(f"{title + '=' + key:<40} {stats['count']:>4} {_ms(lat['p50'])} {_ms(lat['p95'])} {_ms(lat['p99'])}")
+
+
+def _pct(rate: float | None) -> str:
+    return f"{'-':>7}" if rate is None else f"{rate * 100:>6.1f}%"
+
+
+def _ms(value: float | None) -> str:
+    return f"{'-':>8}" if value is None else f"{value:>8.1f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", type=pathlib.Path)
+    parser.add_argument("--workers", type=int, default=1, help="parallel worker processes")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N pairs")
+    parser.add_argument("--json", type=pathlib.Path, default=None, help="write the full report here")
+    parser.add_argument("--csv", type=pathlib.Path, default=None, help="write one row per pair here")
+    args = parser.parse_args()
+
+    pairs = find_pairs(args.directory)[:args.limit]
+    if not pairs:
+        raise SystemExit(f"No <id>_front/<id>_back pairs found in {args.directory}")
+
+    t0 = time.perf_counter()
+    rows = run(pairs, args.workers)
+    report = build_report(rows, time.perf_counter() - t0, args.workers)
+
+    _print_summary(report)
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    if args.csv:
+        args.csv.parent.mkdir(parents=True, exist_ok=True)
+        write_csv(rows, args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Synthetic INE card generator for benchmarks, replay and load tests.
+
+Renders the fields into the ``roi_templates.json`` regions of a canonical
+card, draws the back-side codes, then "photographs" the card: background,
+perspective, rotation, blur, glare, sensor noise and JPEG compression at a
+chosen resolution.  Every pair comes with its ground truth.
+
+QR codes are real (OpenCV's encoder).  No PDF417 encoder is available
+without extra dependencies, so the 2017-2018 back gets a structurally
+faithful PDF417 symbol — start/stop patterns, row indicators and 17-module
+codewords of 4 bars and 4 spaces — that is not decodable.
+
+Usage (from OCR_INE/):
+    python -m benchmarks.synthetic --out test_images/synthetic --count 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+from dataclasses import asdict, dataclass
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.classifier import MODEL_PDF417, MODEL_QR
+from app.curp_utils import curp_check_digit, extract_fecha_nacimiento, extract_sexo
+from app.roi_loader import get_back_rois, get_front_rois
+
+# Cards are drawn at twice the canonical size so large photos keep detail.
+RENDER_SIZE = (2024, 1276)
+
+_NOMBRES = ["JUAN CARLOS", "MARIA GUADALUPE", "JOSE LUIS", "ANA SOFIA", "LUIS FERNANDO", "ROSA ELENA"]
+_APELLIDOS = ["HERNANDEZ", "GARCIA", "MARTINEZ", "LOPEZ", "GONZALEZ", "PEREZ", "RODRIGUEZ", "SANCHEZ"]
+_CALLES = ["AV REFORMA 100", "C JUAREZ 123", "C HIDALGO 45 INT 2", "AV INDEPENDENCIA 890"]
+_COLONIAS = ["COL CENTRO", "COL DEL VALLE", "COL OBRERA", "FRACC LAS AMERICAS"]
+_MUNICIPIOS = ["TOLUCA, MEX.", "PUEBLA, PUE.", "MORELIA, MICH.", "OAXACA DE JUAREZ, OAX."]
+_ESTADOS = ["DF", "MC", "PL", "MN", "OC", "JC"]
+
+
+@dataclass(frozen=True)
+class Degradation:
+    """How the card is photographed."""
+    resolution: int = 2048  # long side of the photo (px)
+    coverage: float = 0.88  # card width / photo width (card must fill >50% of the frame)
+    perspective: float = 0.03  # max corner jitter, fraction of card width
+    skew_deg: float = 2.0  # max in-plane tilt
+    rotate: int = 0  # quarter-turn applied to the whole photo (0/90/180/270)
+    blur: float = 0.6  # Gaussian sigma at photo resolution
+    glare: float = 0.0  # peak brightness of a specular highlight (0..1)
+    noise: float = 3.0  # sensor noise std (grey levels)
+    jpeg_quality: int = 88
+
+
+PRESETS: dict[str, Degradation] = {
+    "clean": Degradation(perspective=0.0, skew_deg=0.0, blur=0.0, noise=0.0, jpeg_quality=95),
+    "typical": Degradation(),
+    "harsh": Degradation(perspective=0.07, skew_deg=5.0, blur=1.8, glare=0.6, noise=6.0, jpeg_quality=60),
+    "rotated": Degradation(rotate=90),
+}
+
+RESOLUTIONS = (1280, 2048, 4000)
+
+
+@dataclass
+class CardData:
+    model_id: str
+    nombre: str
+    apellido_paterno: str
+    apellido_materno: str
+    calle: str
+    colonia: str
+    codigo_postal: str
+    seccional: str
+    curp: str
+    id_ine: str
+
+
+def random_card(rng: np.random.Generator, model_id: str | None = None) -> CardData:
+    paterno, materno = rng.choice(_APELLIDOS, size=2, replace=False)
+    nombre = str(rng.choice(_NOMBRES))
+    sexo = str(rng.choice(["H", "M"]))
+    yy, mm, dd = int(rng.integers(50, 100)), int(rng.integers(1, 13)), int(rng.integers(1, 29))
+    consonants = "".join(rng.choice(list("BCDFGHJKLMNPQRSTVWXZ"), size=3))
+    curp = (
+        f"{paterno[0]}{_first_vowel(paterno)}{materno[0]}{nombre[0]}"
+        f"{yy:02d}{mm:02d}{dd:02d}{sexo}{rng.choice(_ESTADOS)}{consonants}"
+        f"{rng.choice(list('0123456789ABCDEF'))}"
+    )
+    curp += curp_check_digit(curp)
+    return CardData(
+        model_id=model_id or str(rng.choice([MODEL_QR, MODEL_PDF417])),
+        nombre=nombre,
+        apellido_paterno=str(paterno),
+        apellido_materno=str(materno),
+        calle=str(rng.choice(_CALLES)),
+        colonia=str(rng.choice(_COLONIAS)),
+        codigo_postal=f"{int(rng.integers(1000, 99999)):05d}",
+        seccional=f"{int(rng.integers(1, 9999)):04d}",
+        curp=curp,
+        id_ine="".join(rng.choice(list("0123456789"), size=18)),
+    )
+
+
+def ground_truth(card: CardData) -> dict:
+    """Expected values, shaped like the OcrResponse field groups."""
+    return {
+        "model_id": card.model_id,
+        "beneficiarios": {
+            "nombre": card.nombre,
+            "apellido_paterno": card.apellido_paterno,
+            "apellido_materno": card.apellido_materno,
+            "curp": card.curp,
+            "fecha_nacimiento": extract_fecha_nacimiento(card.curp),
+            "sexo": extract_sexo(card.curp),
+            "id_ine": card.id_ine,
+        },
+        "domicilio": {
+            "calle": card.calle,
+            "colonia": card.colonia,
+            "codigo_postal": card.codigo_postal,
+            "seccional": card.seccional,
+        },
+    }
+
+
+# ── Rendering ────────────────────────────────────────────────────────────────
+def render_front(card: CardData) -> np.ndarray:
+    """Upright, flat front at RENDER_SIZE (BGR)."""
+    w, h = RENDER_SIZE
+    img = Image.new("RGB", (w, h), (232, 226, 214))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, w, int(h * 0.1)), fill=(150, 40, 90))  # header band
+    draw.ellipse((int(w * 0.04), int(h * 0.18), int(w * 0.31), int(h * 0.78)), fill=(95, 110, 140))  # photo
+
+    rois = get_front_rois()
+    _draw_lines(draw, rois["apellidos"], [card.apellido_paterno, card.apellido_materno])
+    _draw_lines(draw, rois["nombre"], [card.nombre])
+    municipio = _MUNICIPIOS[sum(map(ord, card.curp)) % len(_MUNICIPIOS)]
+    _draw_lines(draw, rois["domicilio"], [card.calle, f"{card.colonia} {card.codigo_postal}", municipio])
+    _draw_lines(draw, rois["seccion"], [card.seccional])
+    return cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+
+
+def render_back(card: CardData) -> np.ndarray:
+    """Upright, flat back at RENDER_SIZE (BGR) for the card's model."""
+    w, h = RENDER_SIZE
+    img = Image.new("RGB", (w, h), (236, 232, 224))
+    draw = ImageDraw.Draw(img)
+    rois = get_back_rois(card.model_id)
+    mrz_roi = next(roi for name, roi in rois.items() if "mrz" in name or "fallback" in name)
+
+    _draw_lines(draw, rois["back_curp"], [card.curp], font_scale=0.6)
+    _draw_lines(draw, mrz_roi, [
+        f"IDMEX<{card.id_ine}<<<<<",
+        f"{card.curp[4:10]}{card.curp[10]}<<<<<<MEX<<<",
+        f"{card.apellido_paterno}<{card.apellido_materno}<<{card.nombre.replace(' ', '<')}",
+    ], font_scale=0.85, mono=True)
+    out = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+
+    if card.model_id == MODEL_QR:
+        # Two QR codes in the band above the CURP line, as on 2019+ cards.
+        size = int(h * 0.21)
+        for x, payload in ((int(w * 0.02), f"https://qr.ine.mx/{card.id_ine}"), (int(w * 0.80), card.curp)):
+            qr = cv2.QRCodeEncoder.create().encode(payload)
+            qr = cv2.resize(qr, (size, size), interpolation=cv2.INTER_NEAREST)
+            y = int(h * 0.02)
+            out[y:y + size, x:x + size] = cv2.cvtColor(qr, cv2.COLOR_GRAY2BGR)
+    else:
+        # Wide PDF417 symbol along the bottom edge (2017-2018 cards).
+        rng = np.random.default_rng(int(card.id_ine[:9]))
+        x0, x1, y0, y1 = int(w * 0.08), int(w * 0.92), int(h * 0.83), int(h * 0.97)
+        columns = 10
+        module = (x1 - x0) / (17 * (columns + 2) + 17 + 18 + 4)
+        symbol = _pdf417_like(rng, rows=max(3, round((y1 - y0) / (3 * module))), columns=columns)
+        symbol = cv2.resize(symbol, (x1 - x0, y1 - y0), interpolation=cv2.INTER_NEAREST)
+        out[y0:y1, x0:x1] = cv2.cvtColor(symbol, cv2.COLOR_GRAY2BGR)
+    return out
+
+
+def _draw_lines(draw: ImageDraw.ImageDraw, roi: list[float], lines: list[str],
+                font_scale: float = 0.8, mono: bool = False) -> None:
+    w, h = RENDER_SIZE
+    x1, y1, x2, y2 = roi[0] * w, roi[1] * h, roi[2] * w, roi[3] * h
+    line_h = (y2 - y1) / len(lines)
+    size = int(line_h * font_scale)
+    font = _font(size, mono)
+    # Shrink until the longest line fits the ROI width.
+    while size > 10 and max(draw.textlength(line, font=font) for line in lines) > (x2 - x1) * 0.97:
+        size -= 2
+        font = _font(size, mono)
+    for i, line in enumerate(lines):
+        draw.text((x1 + 4, y1 + i * line_h + (line_h - size) / 2), line, fill=(25, 25, 30), font=font)
+
+
+def _font(size: int, mono: bool = False) -> ImageFont.FreeTypeFont:
+    name = "DejaVuSansMono-Bold.ttf" if mono else "DejaVuSans-Bold.ttf"
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _pdf417_like(rng: np.random.Generator, rows: int, columns: int) -> np.ndarray:
+    """Grey image of a PDF417-shaped symbol (one pixel per module, 3 px rows)."""
+    start = [8, 1, 1, 1, 1, 1, 1, 3]
+    stop = [7, 1, 1, 3, 1, 1, 1, 2, 1]
+    lines = []
+    for _ in range(rows):
+        widths = list(start)
+        for _ in range(columns + 2):  # left indicator, data codewords, right indicator
+            widths += _codeword_widths(rng)
+        widths += stop
+        row = np.concatenate([
+            np.full(width, 0 if i % 2 == 0 else 255, dtype=np.uint8) for i, width in enumerate(widths)
+        ])
+        lines += [row] * 3
+    symbol = np.vstack(lines)
+    return np.pad(symbol, 2, constant_values=255)  # quiet zone
+
+
+def _codeword_widths(rng: np.random.Generator) -> list[int]:
+    """4 bars + 4 spaces, each 1..6 modules wide, 17 modules in total."""
+    while True:
+        widths = rng.integers(1, 7, size=8)
+        if widths.sum() == 17:
+            return widths.tolist()
+
+
+def _first_vowel(word: str) -> str:
+    return next((c for c in word[1:] if c in "AEIOU"), "X")
+
+
+# ── Photographing ────────────────────────────────────────────────────────────
+def photograph(card_img: np.ndarray, degradation: Degradation, rng: np.random.Generator) -> bytes:
+    """Place the flat card in a photo with the given degradations; returns JPEG bytes."""
+    d = degradation
+    out_w = d.resolution
+    out_h = int(round(out_w * 3 / 4))
+    ch, cw = card_img.shape[:2]
+
+    # Target quad: centred, scaled to coverage, tilted and jittered.
+    target_w = out_w * d.coverage
+    target_h = target_w * ch / cw
+    cx, cy = out_w / 2, out_h / 2
+    quad = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=np.float32) * [target_w / 2, target_h / 2]
+    angle = np.radians(rng.uniform(-d.skew_deg, d.skew_deg))
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]], dtype=np.float32)
+    quad = quad @ rotation.T + [cx, cy]
+    quad += rng.uniform(-1, 1, size=(4, 2)) * d.perspective * target_w
+    src = np.array([[0, 0], [cw, 0], [cw, ch], [0, ch]], dtype=np.float32)
+
+    photo = _background(out_w, out_h, rng)
+    matrix = cv2.getPerspectiveTransform(src, quad.astype(np.float32))
+    warped = cv2.warpPerspective(card_img, matrix, (out_w, out_h), flags=cv2.INTER_AREA)
+    mask = cv2.warpPerspective(np.full((ch, cw), 255, np.uint8), matrix, (out_w, out_h))
+    photo[mask > 127] = warped[mask > 127]
+
+    img = photo.astype(np.float32)
+    if d.glare > 0:
+        gx, gy = rng.uniform(0.3, 0.7) * out_w, rng.uniform(0.3, 0.7) * out_h
+        yy, xx = np.mgrid[0:out_h, 0:out_w].astype(np.float32)
+        radius = out_w * 0.12
+        img += (d.glare * 255 * np.exp(-((xx - gx) ** 2 + (yy - gy) ** 2) / (2 * radius ** 2)))[..., None]
+    if d.blur > 0:
+        img = cv2.GaussianBlur(img, (0, 0), d.blur)
+    if d.noise > 0:
+        img += rng.normal(0, d.noise, img.shape).astype(np.float32)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+
+    if d.rotate:
+        img = np.ascontiguousarray(np.rot90(img, k=-(d.rotate // 90)))
+
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, d.jpeg_quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+def _background(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Dark, low-frequency textured table top (keeps the card edge detectable)."""
+    small = rng.uniform(40, 90, size=(max(2, height // 64), max(2, width // 64), 3)).astype(np.float32)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC).astype(np.uint8)
+
+
+# ── Pairs ────────────────────────────────────────────────────────────────────
+def make_pair(seed: int, degradation: Degradation = PRESETS["typical"],
+              model_id: str | None = None) -> tuple[bytes, bytes, dict]:
+    """Render and photograph one card. Returns (front_jpeg, back_jpeg, truth)."""
+    rng = np.random.default_rng(seed)
+    card = random_card(rng, model_id)
+    front = photograph(render_front(card), degradation, rng)
+    back = photograph(render_back(card), degradation, rng)
+    return front, back, ground_truth(card)
+
+
+def write_dataset(out_dir: pathlib.Path, count: int, preset: str = "typical",
+                  resolution: int | None = None, seed: int = 0) -> list[str]:
+    """Write ``<id>_front.jpg``, ``<id>_back.jpg`` and ``<id>_truth.json`` files."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    degradation = PRESETS[preset]
+    if resolution:
+        degradation = Degradation(**{**asdict(degradation), "resolution": resolution})
+    ids = []
+    for i in range(count):
+        item_id = f"synthetic_{preset}_{seed + i:04d}"
+        front, back, truth = make_pair(seed + i, degradation)
+        (out_dir / f"{item_id}_front.jpg").write_bytes(front)
+        (out_dir / f"{item_id}_back.jpg").write_bytes(back)
+        (out_dir / f"{item_id}_truth.json").write_text(json.dumps(truth, indent=2, ensure_ascii=False))
+        ids.append(item_id)
+    return ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic INE card pairs with ground truth.")
+    parser.add_argument("--out", type=pathlib.Path, default=pathlib.Path("test_images/synthetic"))
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="typical")
+    parser.add_argument("--resolution", type=int, default=None, help="long side of the photos (px)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ids = write_dataset(args.out, args.count, args.preset, args.resolution, args.seed)
+    print(f"Wrote {len(ids)} pairs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 import io
+import socketserver
+import threading
 
 import numpy as np
 import pytest
 from PIL import Image
 
+from app.resp import RespError, read_reply
+
 
 @pytest.fixture
 def white_card_front() -> bytes:
@@ -39,6 +43,80 @@ def sample_back_array() -> np.ndarray:
     return np.ones((540, 856, 3), dtype=np.uint8) * 255
 
 
+@pytest.fixture
+def resp_server():
+    """A local in-memory stand-in speaking the Redis protocol.
+
+    Yields the ``redis://`` URL to connect to.
+    """
+    store: dict[bytes, bytes] = {}
+    lock = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            while True:
+                try:
+                    command = read_reply(self.rfile)
+                except (EOFError, RespError):
+                    return
+                with lock:
+                    reply = _resp_execute(store, [bytes(c) for c in command])
+                self.wfile.write(reply)
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def _resp_execute(store: dict, command: list[bytes]) -> bytes:
+    name = command[0].upper()
+    args = command[1:]
+    if name == b"PING":
+        return b"+PONG\r\n"
+    if name == b"GET":
+        return _bulk(store.get(args[0]))
+    if name == b"SET":
+        store[args[0]] = args[1]  # expiry options are accepted and ignored
+        return b"+OK\r\n"
+    if name == b"DEL":
+        removed = sum(1 for key in args if store.pop(key, None) is not None)
+        return b":%d\r\n" % removed
+    if name in (b"LPUSH", b"RPUSH"):
+        items = store.setdefault(args[0], [])
+        for value in args[1:]:
+            if name == b"LPUSH":
+                items.insert(0, value)
+            else:
+                items.append(value)
+        return b":%d\r\n" % len(items)
+    if name == b"RPOPLPUSH":
+        source = store.get(args[0])
+        if not source:
+            return b"$-1\r\n"
+        value = source.pop()
+        store.setdefault(args[1], []).insert(0, value)
+        return _bulk(value)
+    if name == b"LREM":
+        items = store.get(args[0], [])
+        removed = items.count(args[2])
+        store[args[0]] = [item for item in items if item != args[2]]
+        return b":%d\r\n" % removed
+    if name == b"LRANGE":
+        items = store.get(args[0], [])
+        stop = int(args[2])
+        selected = items[int(args[1]):None if stop == -1 else stop + 1]
+        return b"*%d\r\n" % len(selected) + b"".join(_bulk(item) for item in selected)
+    return b"-ERR unknown command '%s'\r\n" % name
+
+
+def _bulk(value: bytes | None) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
 def _make_jpeg(width: int, height: int, color: tuple = (255, 255, 255)) -> bytes:
     """Generate a JPEG image as bytes."""
     img = Image.new("RGB", (width, height), color)
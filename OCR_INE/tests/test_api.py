@@ -88,3 +88,29 @@ async def test_extract_rejects_unsupported_type():
             },
         )
     assert r.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_extract_timings_are_opt_in():
+    def files(height: int) -> dict:
+        # A distinct size per request keeps both sides out of the result cache
+        return {
+            "front_image": ("front.jpg", _make_jpeg(856, height), "image/jpeg"),
+            "back_image": ("back.jpg", _make_jpeg(855, height), "image/jpeg"),
+        }
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        plain = await c.post("/v1/ine/extract", files=files(541))
+        detailed = await c.post("/v1/ine/extract?timings=true", files=files(542))
+
+    assert "timings" not in plain.json()
+    assert "decode_front;dur=" in plain.headers["Server-Timing"]
+
+    timings = detailed.json()["timings"]
+    stages = {(s["name"], s["parent"]) for s in timings["stages"]}
+    assert ("rectify_front.orientation", "rectify_front") in stages
+    assert ("front_nombre", None) in stages
+    assert ("back_attempt_1", "back_ocr") in stages
+    assert ("back_roi.id_ine", "back_attempt_1") in stages
+    assert timings["total_ms"] == detailed.json()["processing_ms"]
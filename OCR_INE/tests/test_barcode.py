@@ -0,0 +1,86 @@
+"""Tests for the barcode-first back path."""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from app import deadline, pipeline
+from app.classifier import MODEL_QR, BarcodeValue, parse_payload, read_barcodes
+from app.config import settings
+from app.deadline import Deadline
+from app.models import QualitySide
+from benchmarks import synthetic
+
+CURP = "PELJ000101HDFRPNA3"  # valid check digit
+ID_INE = "123456789012345678"
+GOOD = QualitySide(blur=0.9, glare=0.0, exposure=0.9)
+
+
+def test_parse_payload_finds_identifiers():
+    assert parse_payload(f"https://qr.ine.mx/{ID_INE}") == {"id_ine": BarcodeValue(ID_INE, True)}
+    assert parse_payload(CURP) == {"curp": BarcodeValue(CURP, True)}
+    assert parse_payload(f"{CURP}|{ID_INE}") == {
+        "curp": BarcodeValue(CURP, True), "id_ine": BarcodeValue(ID_INE, False),
+    }
+    assert parse_payload("https://www.ine.mx/credencial") == {}
+
+
+def test_unknown_layouts_are_not_verified():
+    assert parse_payload(f"https://example.com/track/{ID_INE}") == {"id_ine": BarcodeValue(ID_INE, False)}
+    assert parse_payload("PELJ000101HDFRPNA1") == {"curp": BarcodeValue("PELJ000101HDFRPNA1", False)}
+
+
+def test_reads_both_qr_codes_of_a_back():
+    card = synthetic.random_card(np.random.default_rng(0), MODEL_QR)
+    back = cv2.resize(synthetic.render_back(card), (settings.card_width, settings.card_height),
+                      interpolation=cv2.INTER_AREA)
+
+    assert read_barcodes(back, MODEL_QR) == {
+        "id_ine": BarcodeValue(card.id_ine, True), "curp": BarcodeValue(card.curp, True),
+    }
+
+
+def test_decoded_id_ine_skips_retries_and_cross_checks(monkeypatch):
+    calls = []
+
+    def fake_parse_back(image, attempt=1, model_id=None, feature_bboxes=None, fields=None):
+        calls.append(attempt)
+        return {"id_ine": "IDMEX12", "curp": "PELJ000101HDFRPNA9", "warnings": []}
+
+    monkeypatch.setattr(pipeline, "parse_back", fake_parse_back)
+    image = np.full((100, 160, 3), 255, dtype=np.uint8)
+
+    with deadline.running(Deadline(60_000)):
+        out = pipeline._stage_back_ocr((image, True), (MODEL_QR, []), GOOD, {
+            "id_ine": BarcodeValue(ID_INE, True), "curp": BarcodeValue(CURP, True),
+        })
+
+    assert calls == [1]
+    assert out["attempts"] == 1
+    assert out["best_back"]["id_ine"] == ID_INE
+    assert out["best_back"]["curp"] == CURP
+    assert out["best_back"]["ocr_confidence"] == {"id_ine": 1.0, "curp": 1.0}
+    assert out["warnings"] == ["id_ine_barcode_mismatch", "curp_barcode_mismatch"]
+
+
+def test_unverified_barcode_only_cross_checks(monkeypatch):
+    calls = []
+
+    def fake_parse_back(image, attempt=1, model_id=None, feature_bboxes=None, fields=None):
+        calls.append(attempt)
+        return {"id_ine": "IDMEX12", "curp": CURP, "ocr_confidence": {"id_ine": 0.4, "curp": 0.9},
+                "warnings": []}
+
+    monkeypatch.setattr(pipeline, "parse_back", fake_parse_back)
+    image = np.full((100, 160, 3), 255, dtype=np.uint8)
+
+    with deadline.running(Deadline(60_000)):
+        out = pipeline._stage_back_ocr((image, True), (MODEL_QR, []), GOOD, {
+            "id_ine": BarcodeValue("A1B2C3D4E5F6G7H8I9", False),
+        })
+
+    assert len(calls) > 1  # retries still run
+    assert out["best_back"]["id_ine"] == "IDMEX12"
+    assert out["best_back"]["ocr_confidence"]["id_ine"] != 1.0
+    assert "id_ine_barcode_mismatch" in out["warnings"]
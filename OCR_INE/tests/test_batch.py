@@ -0,0 +1,190 @@
+"""Tests for the batch extraction endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import worker_pool
+from app.batch import BatchItem, Entry, items_from_archive, run_batch
+from app.config import settings
+from app.main import app
+from app.models import OcrResponse
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    def fake_process_ine(front_bytes, back_bytes, **options):
+        return OcrResponse(model_id="MODEL_TEST", processing_ms=len(front_bytes))
+
+    monkeypatch.setattr(worker_pool, "process_ine", fake_process_ine)
+
+
+async def _post(**kwargs) -> list[dict]:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        r = await c.post("/v1/ine/extract-batch", **kwargs)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in r.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_multipart_batch_streams_one_line_per_pair(fake_pipeline, white_card_front, white_card_back):
+    files = [
+        ("front.a", ("a_front.jpg", white_card_front, "image/jpeg")),
+        ("back.a", ("a_back.jpg", white_card_back, "image/jpeg")),
+        ("front.b", ("b_front.jpg", white_card_front + b"\0", "image/jpeg")),
+        ("back.b", ("b_back.jpg", white_card_back, "image/jpeg")),
+        ("front.c", ("c_front.jpg", white_card_front, "image/jpeg")),
+    ]
+    lines = {line["item_id"]: line for line in await _post(files=files)}
+
+    assert set(lines) == {"a", "b", "c"}
+    assert lines["a"]["status"] == "ok"
+    assert lines["a"]["result"]["model_id"] == "MODEL_TEST"
+    assert lines["b"]["result"]["processing_ms"] == len(white_card_front) + 1
+    assert lines["c"]["status"] == "error"
+    assert lines["c"]["error"]["error_code"] == "MISSING_IMAGE"
+
+
+@pytest.mark.asyncio
+async def test_zip_archive_batch(fake_pipeline, white_card_front, white_card_back, tiny_image):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("cards/001_front.jpg", white_card_front)
+        zf.writestr("cards/001_back.jpg", white_card_back)
+        zf.writestr("cards/002_front.jpg", tiny_image)
+        zf.writestr("cards/002_back.jpg", white_card_back)
+        zf.writestr("README.txt", "ignored")
+
+    lines = {line["item_id"]: line for line in await _post(
+        files={"archive": ("batch.zip", buf.getvalue(), "application/zip")},
+    )}
+
+    assert lines["001"]["status"] == "ok"
+    assert lines["002"]["error"]["error_code"] == "IMAGE_TOO_SMALL"
+
+
+@pytest.mark.asyncio
+async def test_tar_archive_batch(fake_pipeline, white_card_front, white_card_back):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in (("x_front.png", white_card_front), ("x_back.png", white_card_back)):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+
+    lines = await _post(files={"archive": ("batch.tar.gz", buf.getvalue(), "application/gzip")})
+
+    assert [(line["item_id"], line["status"]) for line in lines] == [("x", "ok")]
+
+
+def _tar_gz(members: dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def test_tar_members_are_read_in_one_pass():
+    members = {f"{i:03d}_{side}.jpg": bytes([i]) * 1500 for i in range(20) for side in ("front", "back")}
+    fileobj = io.BytesIO(_tar_gz(members))
+
+    items = items_from_archive(fileobj)
+    fileobj.close()  # every image was already copied out in stream order
+
+    assert len(items) == 20
+    assert all(item.front.read() == members[f"{item.item_id}_front.jpg"] for item in items)
+    assert all(item.back.read() == members[f"{item.item_id}_back.jpg"] for item in items)
+
+
+@pytest.mark.parametrize("setting, value, limit", [
+    ("batch_max_items", 2, "at most 2 pairs"),
+    ("batch_max_archive_mb", 0, "at most 0MB of images"),
+])
+@pytest.mark.asyncio
+async def test_archive_limits(monkeypatch, setting, value, limit):
+    monkeypatch.setattr(settings, setting, value)
+    archive = _tar_gz({f"{i}_{side}.jpg": b"x" * 1500 for i in range(3) for side in ("front", "back")})
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        r = await c.post("/v1/ine/extract-batch", files={"archive": ("batch.tar.gz", archive, "application/gzip")})
+
+    assert r.status_code == 422
+    assert r.json()["error_code"] == "INVALID_BATCH"
+    assert limit in r.json()["message"]
+
+
+@pytest.mark.asyncio
+async def test_rejects_unknown_archive_format():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        r = await c.post("/v1/ine/extract-batch", files={"archive": ("x.rar", b"not an archive", "application/octet-stream")})
+
+    assert r.status_code == 415
+    assert r.json()["error_code"] == "UNSUPPORTED_MEDIA_TYPE"
+
+
+@pytest.mark.asyncio
+async def test_run_batch_bounds_concurrency_and_reads_lazily():
+    running = 0
+    peak = 0
+    loaded = 0  # images read
+    done = 0  # pairs processed
+
+    def entry() -> Entry:
+        def read() -> bytes:
+            nonlocal loaded
+            loaded += 1
+            assert loaded - 2 * done <= 2 * 2  # at most `concurrency` pairs held at once
+            return b"x" * 2000
+        return Entry(size=2000, content_type="image/jpeg", read=read)
+
+    async def process(front_bytes, back_bytes):
+        nonlocal running, peak, done
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        done += 1
+        return OcrResponse()
+
+    items = (BatchItem(str(i), entry(), entry()) for i in range(10))
+    lines = [json.loads(line) async for line in run_batch(items, process, concurrency=2)]
+
+    assert len(lines) == 10
+    assert all(line["status"] == "ok" for line in lines)
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_run_batch_stops_for_a_stalled_reader():
+    done = 0
+
+    async def process(front_bytes, back_bytes):
+        nonlocal done
+        done += 1
+        return OcrResponse()
+
+    def entry() -> Entry:
+        return Entry(size=2000, content_type="image/jpeg", read=lambda: b"x" * 2000)
+
+    items = (BatchItem(str(i), entry(), entry()) for i in range(20))
+    stream = run_batch(items, process, concurrency=2)
+    await stream.__anext__()
+    await asyncio.sleep(0.2)  # the reader stalls after one line
+
+    # One line delivered, `concurrency` queued and `concurrency` waiting to queue.
+    assert done <= 1 + 2 * 2
+    await stream.aclose()
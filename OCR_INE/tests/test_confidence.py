@@ -27,6 +27,15 @@ class TestScoreField:
         assert result.confidence < 0.65
         assert result.requires_review is True
 
+    def test_shaky_ocr_read_needs_review(self):
+        result = score_field("A" * 18, 1.0, 0.9, 1.0, ocr_confidence=0.45)
+        assert result.requires_review is True
+
+    def test_solid_ocr_read_with_odd_length_is_accepted(self):
+        result = score_field("A" * 17, 0.8, 0.5, 1.0, ocr_confidence=0.95)
+        assert result.confidence >= 0.8
+        assert result.requires_review is False
+
 
 class TestPatternScores:
     def test_name_good(self):
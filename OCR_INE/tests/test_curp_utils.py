@@ -1,13 +1,29 @@
 """Tests for CURP validation and field derivation."""
 
 from app.curp_utils import (
+    curp_check_digit,
     extract_fecha_nacimiento,
     extract_sexo,
     find_curp_in_text,
+    has_valid_check_digit,
     is_valid_curp,
 )
 
 
+class TestCheckDigit:
+    def test_check_digit(self):
+        assert curp_check_digit("PELJ000101HDFRPNA") == "3"
+
+    def test_valid_check_digit(self):
+        assert has_valid_check_digit("PELJ000101HDFRPNA3")
+
+    def test_wrong_check_digit(self):
+        assert not has_valid_check_digit("PELJ000101HDFRPNA1")
+
+    def test_bad_format(self):
+        assert not has_valid_check_digit("PELJ001301HDFRPNA3")
+
+
 class TestIsValidCurp:
     def test_valid_curp(self):
         assert is_valid_curp("PELJ000101HDFRPNA1")
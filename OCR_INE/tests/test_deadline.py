@@ -0,0 +1,183 @@
+"""Tests for request deadlines and their propagation into the pipeline."""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+import pytesseract
+from httpx import ASGITransport, AsyncClient
+
+from app import deadline, extractor, pipeline, worker_pool
+from app.classifier import MODEL_QR
+from app.config import settings
+from app.deadline import Deadline
+from app.main import app
+from app.models import OcrResponse
+from app.ocr_engine import EnginePool, OcrTimeout, _SubprocessEngine
+from app.result_cache import reset_result_cache
+from app.roi_loader import get_back_rois, to_pixel_box
+
+
+@pytest.fixture(autouse=True)
+def _fresh_costs():
+    deadline.reset_costs()
+    yield
+    deadline.reset_costs()
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(settings, "cache_backend", "none")
+    reset_result_cache()
+    yield
+    reset_result_cache()
+
+
+class _RecordingEngine:
+    backend = "fake"
+
+    def __init__(self):
+        self.timeouts: list[float] = []
+
+    def image_to_string(self, image, psm, whitelist, timeout=0):
+        self.timeouts.append(timeout)
+        return "ABC"
+
+    def orientation(self, image, timeout=0):
+        return 0
+
+    def close(self):
+        pass
+
+
+def test_deadline_allows_only_what_fits():
+    d = Deadline(1000)
+    deadline.observe("cheap", 10)
+    deadline.observe("dear", 5000)
+
+    assert 900 < d.remaining_ms() <= 1000
+    assert d.allows("cheap")
+    assert not d.exceeded
+    assert not d.allows("dear")
+    assert d.exceeded
+
+
+def test_allows_without_a_run_deadline():
+    deadline.observe("dear", 1e9)
+    assert deadline.allows("dear")
+
+
+def test_observed_costs_move_towards_measurements():
+    deadline.observe("step", 100)
+    for _ in range(30):
+        deadline.observe("step", 10)
+    assert deadline.expected_ms("step") == pytest.approx(10, abs=1)
+
+
+def test_calibrate_seeds_every_step():
+    costs = deadline.calibrate()
+    assert set(costs) >= {"back_attempt_2", "back_attempt_3", "front_attempt_2", "front_attempt_3", "denoise", "deskew", "osd"}
+
+
+def test_calibration_cards_have_text_in_every_roi():
+    rois = get_back_rois(MODEL_QR)
+    card = deadline._text_card(settings.card_width, settings.card_height, rois.values(), to_pixel_box)
+
+    for roi in rois.values():
+        x1, y1, x2, y2 = to_pixel_box(roi, card.shape[1], card.shape[0])
+        assert (card[y1:y2, x1:x2] < 100).mean() > 0.02  # OCR has something to read
+
+
+def test_ocr_gets_remaining_time_as_timeout(monkeypatch):
+    engine = _RecordingEngine()
+    monkeypatch.setattr(extractor, "get_engine_pool", lambda lang="spa": EnginePool(lambda: engine, 1))
+    roi = np.full((20, 80, 3), 255, dtype=np.uint8)
+
+    assert extractor.ocr_region(roi) == "ABC"
+    with deadline.running(Deadline(2000)):
+        extractor.ocr_region(roi)
+    with deadline.running(Deadline(0)) as expired:
+        assert extractor.ocr_region(roi) == ""
+
+    assert engine.timeouts[0] == 0  # no deadline, no timeout
+    assert 1.5 < engine.timeouts[1] <= 2.0
+    assert len(engine.timeouts) == 2  # skipped once the deadline passed
+    assert expired.exceeded
+
+
+def test_hung_tesseract_is_killed(tmp_path, monkeypatch):
+    hung = tmp_path / "tesseract"
+    hung.write_text("#!/bin/sh\nsleep 5\n")
+    hung.chmod(0o755)
+    monkeypatch.setattr(pytesseract.pytesseract, "tesseract_cmd", str(hung))
+
+    t0 = time.perf_counter()
+    with pytest.raises(OcrTimeout):
+        _SubprocessEngine("spa", None).image_to_string(np.zeros((10, 10), np.uint8), 7, "A", timeout=0.2)
+    assert time.perf_counter() - t0 < 2
+
+
+def test_denoise_is_dropped_when_time_is_short(monkeypatch):
+    calls = []
+    monkeypatch.setattr(extractor.cv2, "fastNlMeansDenoising", lambda img, h: calls.append(h) or img)
+    gray = np.full((20, 80), 200, dtype=np.uint8)
+    deadline.observe("denoise", 500)
+
+    with deadline.running(Deadline(5000)):
+        extractor._preprocess(gray, attempt=3)
+    with deadline.running(Deadline(100)) as short:
+        extractor._preprocess(gray, attempt=3)
+
+    assert len(calls) == 1
+    assert short.exceeded
+
+
+def test_retries_skipped_when_they_do_not_fit(monkeypatch, no_cache, white_card_front, white_card_back):
+    attempts = []
+
+    def fake_parse_back(image, attempt=1, model_id=None, feature_bboxes=None, fields=None):
+        attempts.append(attempt)
+        return {"id_ine": None, "curp": None, "warnings": []}
+
+    monkeypatch.setattr(pipeline, "parse_back", fake_parse_back)
+    deadline.observe("back_attempt_2", 1e9)
+
+    result = pipeline.process_ine(white_card_front, white_card_back)
+
+    assert attempts == [1]
+    assert result.attempts == 1
+    assert "time_budget_exceeded" in result.warnings
+
+
+def test_expired_deadline_still_answers(no_cache, white_card_front, white_card_back):
+    result = pipeline.process_ine(white_card_front, white_card_back, run_deadline=Deadline(0))
+
+    assert result.attempts == 0
+    assert "time_budget_exceeded" in result.warnings
+
+
+@pytest.mark.asyncio
+async def test_deadline_header_is_capped_by_budget(monkeypatch, white_card_front, white_card_back):
+    budgets = []
+
+    def fake_process_ine(front_bytes, back_bytes, run_deadline=None):
+        budgets.append(run_deadline.budget_ms)
+        return OcrResponse(model_id="MODEL_TEST")
+
+    monkeypatch.setattr(worker_pool, "process_ine", fake_process_ine)
+    files = {
+        "front_image": ("f.jpg", white_card_front, "image/jpeg"),
+        "back_image": ("b.jpg", white_card_back, "image/jpeg"),
+    }
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        for header in ("1500", str(settings.time_budget_ms * 10), None, "0"):
+            headers = {"X-Deadline-Ms": header} if header else {}
+            r = await c.post("/v1/ine/extract", files=files, headers=headers)
+            if header == "0":
+                assert r.status_code == 422
+            else:
+                assert r.status_code == 200
+
+    assert budgets == [1500, settings.time_budget_ms, settings.time_budget_ms]
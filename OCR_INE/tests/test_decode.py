@@ -0,0 +1,42 @@
+"""Tests for resolution-aware image decoding."""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.pipeline import _decode_flag, decode_image
+
+
+def _encode(ext: str, width: int, height: int) -> bytes:
+    img = np.full((height, width, 3), 200, dtype=np.uint8)
+    cv2.rectangle(img, (width // 4, height // 4), (width // 2, height // 2), (30, 30, 30), -1)
+    ok, buf = cv2.imencode(ext, img)
+    assert ok
+    return buf.tobytes()
+
+
+def test_large_jpeg_decodes_reduced():
+    img = decode_image(_encode(".jpg", 4000, 3000))
+
+    assert img.shape == (1500, 2000, 3)
+    assert max(img.shape[:2]) >= settings.decode_target_px
+
+
+def test_small_jpeg_decodes_full_size():
+    raw = _encode(".jpg", 1280, 960)
+
+    assert _decode_flag(raw) == cv2.IMREAD_COLOR
+    assert decode_image(raw).shape == (960, 1280, 3)
+
+
+def test_png_is_never_reduced():
+    img = decode_image(_encode(".png", 4000, 3000))
+
+    assert img.shape == (3000, 4000, 3)
+
+
+def test_garbage_falls_back_to_full_decode():
+    assert _decode_flag(b"not an image") == cv2.IMREAD_COLOR
+    assert decode_image(b"not an image") is None
@@ -0,0 +1,95 @@
+"""Tests for the fixed-font glyph-template recognizer."""
+
+from __future__ import annotations
+
+import time
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from app import back_parser, glyph_ocr
+from app.classifier import MODEL_QR
+from app.config import settings
+from benchmarks import synthetic
+
+
+@pytest.fixture(autouse=True)
+def _fresh_templates(monkeypatch):
+    # The synthetic cards print their fixed-font fields in DejaVu Sans Mono, so it stands in for OCR-B.
+    monkeypatch.setattr(settings, "fixed_font_path", "DejaVuSansMono-Bold.ttf")
+    glyph_ocr.reset_templates()
+    yield
+    glyph_ocr.reset_templates()
+
+
+def _text_image(lines: list[str], font_name: str = "DejaVuSansMono-Bold.ttf", size: int = 28) -> np.ndarray:
+    font = ImageFont.truetype(font_name, size)
+    img = Image.new("RGB", (40 + size * max(map(len, lines)), 20 + int(size * 1.6) * len(lines)), (240, 236, 228))
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((16, 10 + int(size * 1.6) * i), line, fill=(25, 25, 30), font=font)
+    return cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+
+
+def test_reads_fixed_font_lines_in_milliseconds():
+    lines = ["IDMEX<123456789012345678<<<<<", "850101H<<<<<<MEX<<<"]
+    image = _text_image(lines)
+    glyph_ocr.recognise(image)  # templates are rendered on first use
+
+    t0 = time.perf_counter()
+    read = glyph_ocr.recognise(image)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    assert read is not None
+    assert read.text == "\n".join(lines)
+    assert read.confidence("IDMEX<123456789012345678<<<<<") > 0.8
+    assert elapsed_ms < 50
+
+
+def test_reads_a_tightly_cropped_line():
+    image = _text_image(["IDMEX<123456789012345678<<<<<"])
+    ys, _ = np.nonzero(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) < 128)
+
+    read = glyph_ocr.recognise(image[ys.min():ys.max() + 1])
+
+    assert read is not None
+    assert read.text == "IDMEX<123456789012345678<<<<<"
+
+
+def test_unsure_on_another_font():
+    assert glyph_ocr.recognise(_text_image(["SECCION 0234"], font_name="DejaVuSerif.ttf")) is None
+
+
+def test_unloadable_font_disables_recognizer(monkeypatch):
+    monkeypatch.setattr(settings, "fixed_font_path", "/nonexistent/ocrb.ttf")
+    assert glyph_ocr.recognise(_text_image(["12345"])) is None
+
+
+def test_off_without_a_configured_font(monkeypatch):
+    monkeypatch.setattr(settings, "fixed_font_path", "")
+    monkeypatch.setattr(settings, "fixed_font_rois", "id_ine")
+
+    assert not glyph_ocr.enabled_for("id_ine")
+    assert glyph_ocr.recognise(_text_image(["12345"])) is None
+
+
+def test_back_mrz_skips_tesseract_when_glyphs_are_clear(monkeypatch):
+    monkeypatch.setattr(settings, "fixed_font_rois", "id_ine")
+    card = synthetic.random_card(np.random.default_rng(3), MODEL_QR)
+    back = cv2.resize(synthetic.render_back(card), (settings.card_width, settings.card_height),
+                      interpolation=cv2.INTER_AREA)
+    tesseract_rois = []
+
+    def fake_read_region(roi_image, attempt=1, psm=7, whitelist="", lang="spa"):
+        tesseract_rois.append(psm)
+        return back_parser.OcrRead("", [])
+
+    monkeypatch.setattr(back_parser, "read_region", fake_read_region)
+
+    result = back_parser.parse_back(back, model_id=MODEL_QR, feature_bboxes=[])
+
+    assert result["id_ine"] == card.id_ine
+    assert tesseract_rois == [6]  # only the CURP ROI went to Tesseract
+    assert result["ocr_confidence"]["id_ine"] > 0.6
@@ -0,0 +1,38 @@
+"""Tests for the shared per-image analysis context."""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from app.image_context import ImageContext, as_context
+from app.quality import assess_quality
+from app.rectifier import find_card_corners
+
+
+def test_buffers_are_computed_once(sample_back_array):
+    ctx = ImageContext(cv2.resize(sample_back_array, (2400, 1500)))
+
+    assess_quality(ctx)
+    find_card_corners(ctx)
+    find_card_corners(ctx)
+    level, scale = ctx.pyramid(1000)
+
+    assert ctx.gray is ctx.gray
+    assert set(ctx.computed) == {
+        ("gray",), ("downscaled", 1024), ("histogram", 1024), ("pyramid", 1), ("pyramid", 2), ("edges", 1000, True),
+    }
+    assert level.shape == (375, 600) and scale == 0.25
+
+
+def test_downscale_keeps_small_images():
+    image = np.full((100, 160, 3), 200, dtype=np.uint8)
+    ctx = as_context(image)
+
+    assert as_context(ctx) is ctx
+    assert ctx.downscaled(1024)[0] is ctx.gray
+    assert ctx.downscaled(80)[0].shape == (50, 80)
+
+
+def test_quality_matches_plain_array(sample_front_array):
+    assert assess_quality(ImageContext(sample_front_array)) == assess_quality(sample_front_array)
@@ -0,0 +1,267 @@
+"""Tests for the asynchronous job API and its brokers."""
+
+from __future__ import annotations
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import jobs, main, worker_pool
+from app.config import settings
+from app.jobs import JobRunner, RedisBroker, SqliteBroker
+from app.models import OcrResponse
+from app.resp import RespClient
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_broker(request, tmp_path):
+    """Factory for each broker backend, sharing one store per test."""
+    created = []
+
+    def make(lease_s: int = 300, max_attempts: int = 3):
+        if request.param == "sqlite":
+            broker = SqliteBroker(str(tmp_path / "jobs.sqlite3"), lease_s, max_attempts, ttl_s=3600)
+        else:
+            url = request.getfixturevalue("resp_server")
+            broker = RedisBroker(RespClient(url), lease_s, max_attempts, ttl_s=3600)
+        created.append(broker)
+        return broker
+
+    yield make
+    for broker in created:
+        broker.close()
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    def fake_process_ine(front_bytes, back_bytes, **options):
+        return OcrResponse(model_id="MODEL_TEST")
+
+    monkeypatch.setattr(worker_pool, "process_ine", fake_process_ine)
+
+
+def test_lease_complete_deletes_payload(make_broker):
+    broker = make_broker()
+    job_id = broker.submit(b"front", b"back", "http://example.test/hook")
+    assert broker.get(job_id)["status"] == "queued"
+
+    lease = broker.lease()
+    assert (lease.job_id, lease.front, lease.back, lease.attempts) == (job_id, b"front", b"back", 1)
+    assert broker.get(job_id)["status"] == "running"
+    assert broker.lease() is None
+
+    broker.complete(job_id, {"model_id": "MODEL_TEST"})
+    job = broker.get(job_id)
+    assert job["status"] == "done"
+    assert job["result"] == {"model_id": "MODEL_TEST"}
+    assert job["callback_url"] == "http://example.test/hook"
+    assert not broker.has_payload(job_id)
+
+
+def test_expired_lease_is_redelivered(make_broker):
+    broker = make_broker(lease_s=0)
+    job_id = broker.submit(b"front", b"back")
+
+    first = broker.lease()
+    second = broker.lease()  # the first worker never finished
+
+    assert first.job_id == second.job_id == job_id
+    assert second.attempts == 2
+
+
+def test_expired_leases_stop_at_max_attempts(make_broker):
+    broker = make_broker(lease_s=0, max_attempts=2)
+    job_id = broker.submit(b"front", b"back")
+
+    assert broker.lease().attempts == 1
+    assert broker.lease().attempts == 2
+    assert broker.lease() is None  # the second worker never finished either
+
+    job = broker.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"]["error_code"] == "JOB_LEASE_EXPIRED"
+    assert not broker.has_payload(job_id)
+
+
+def test_failures_requeue_until_attempts_exhausted(make_broker):
+    broker = make_broker(max_attempts=2)
+    job_id = broker.submit(b"front", b"back")
+    error = {"error_code": "OCR_INTERNAL_ERROR", "message": "boom"}
+
+    broker.lease()
+    assert broker.fail(job_id, error) == "queued"
+    assert broker.lease().attempts == 2
+    assert broker.fail(job_id, error) == "failed"
+
+    job = broker.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == error
+    assert not broker.has_payload(job_id)
+    assert broker.lease() is None
+
+
+def test_brokers_share_one_queue(make_broker):
+    producer, worker_a, worker_b = make_broker(), make_broker(), make_broker()
+    ids = {producer.submit(b"f%d" % i, b"b") for i in range(4)}
+
+    leased = [worker_a.lease(), worker_b.lease(), worker_a.lease(), worker_b.lease()]
+
+    assert {lease.job_id for lease in leased} == ids
+    assert worker_a.lease() is None
+
+
+class _BusyPool:
+    """Worker pool stand-in: reports ``free`` capacity, rejects the first ``busy`` calls."""
+
+    def __init__(self, free: bool, busy: int = 0):
+        self.free = free
+        self.busy = busy
+
+    def has_capacity(self) -> bool:
+        return self.free
+
+    async def process(self, front, back):
+        if self.busy:
+            self.busy -= 1
+            raise worker_pool.PoolBusy(retry_after=0, queue_depth=1)
+        return OcrResponse(model_id="MODEL_TEST"), 0
+
+
+@pytest.mark.asyncio
+async def test_runner_does_not_lease_while_pool_is_full(monkeypatch, make_broker):
+    broker = make_broker()
+    job_id = broker.submit(b"front", b"back")
+    pool = _BusyPool(free=False)
+    monkeypatch.setattr(jobs, "get_worker_pool", lambda: pool)
+
+    assert not await JobRunner(broker).run_once()
+    assert broker.get(job_id)["status"] == "queued"
+
+
+@pytest.mark.asyncio
+async def test_runner_renews_lease_while_waiting(monkeypatch, make_broker):
+    broker = make_broker(lease_s=60)
+    job_id = broker.submit(b"front", b"back")
+    pool = _BusyPool(free=True, busy=2)
+    monkeypatch.setattr(jobs, "get_worker_pool", lambda: pool)
+    renewed = []
+    renew = broker.renew
+    monkeypatch.setattr(broker, "renew", lambda jid: (renewed.append(jid), renew(jid)))
+
+    assert await JobRunner(broker).run_once()
+    assert renewed == [job_id, job_id]
+    assert broker.get(job_id)["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_runner_gives_up_after_one_lease_of_waiting(monkeypatch, make_broker):
+    broker = make_broker(lease_s=0)
+    job_id = broker.submit(b"front", b"back")
+    pool = _BusyPool(free=True, busy=1)
+    monkeypatch.setattr(jobs, "get_worker_pool", lambda: pool)
+
+    assert await JobRunner(broker).run_once()
+    job = broker.get(job_id)
+    assert job["status"] == "queued"
+    assert job["error"]["error_code"] == "SERVICE_BUSY"
+
+
+@pytest.mark.asyncio
+async def test_job_api_roundtrip(monkeypatch, tmp_path, fake_pipeline, white_card_front, white_card_back):
+    broker = SqliteBroker(str(tmp_path / "jobs.sqlite3"), lease_s=300, max_attempts=3, ttl_s=3600)
+    monkeypatch.setattr(main, "get_job_broker", lambda: broker)
+    monkeypatch.setattr(settings, "job_callback_hosts", "example.test")
+    monkeypatch.setattr(jobs, "_resolve", lambda host, port: ["93.184.216.34"])
+    notified = []
+
+    async def fake_notify(job):
+        notified.append(job)
+        return True
+
+    monkeypatch.setattr(jobs, "notify_callback", fake_notify)
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        r = await c.post(
+            "/v1/ine/jobs",
+            files={
+                "front_image": ("front.jpg", white_card_front, "image/jpeg"),
+                "back_image": ("back.jpg", white_card_back, "image/jpeg"),
+            },
+            data={"callback_url": "http://example.test/hook"},
+        )
+        assert r.status_code == 202
+        job_id = r.json()["job_id"]
+        assert r.json()["status"] == "queued"
+
+        assert await JobRunner(broker).run_once()
+
+        r = await c.get(f"/v1/ine/jobs/{job_id}")
+        missing = await c.get("/v1/ine/jobs/does-not-exist")
+
+    broker.close()
+    assert r.status_code == 200
+    assert r.json()["status"] == "done"
+    assert r.json()["result"]["model_id"] == "MODEL_TEST"
+    assert [job["job_id"] for job in notified] == [job_id]
+    assert missing.status_code == 404
+    assert missing.json()["error_code"] == "JOB_NOT_FOUND"
+
+
+@pytest.mark.parametrize("hosts, url, address, error_code", [
+    ("", "https://example.test/hook", "93.184.216.34", "CALLBACKS_DISABLED"),
+    ("example.test", "file:///etc/passwd", "93.184.216.34", "INVALID_CALLBACK_URL"),
+    ("example.test", "https://other.test/hook", "93.184.216.34", "INVALID_CALLBACK_URL"),
+    ("example.test", "http://example.test/hook", "127.0.0.1", "INVALID_CALLBACK_URL"),
+    ("example.test", "http://example.test/hook", "10.0.0.7", "INVALID_CALLBACK_URL"),
+    ("example.test", "http://example.test/hook", "169.254.169.254", "INVALID_CALLBACK_URL"),
+])
+@pytest.mark.asyncio
+async def test_job_rejects_unsafe_callback(monkeypatch, tmp_path, white_card_front, white_card_back,
+                                           hosts, url, address, error_code):
+    broker = SqliteBroker(str(tmp_path / "jobs.sqlite3"), lease_s=300, max_attempts=3, ttl_s=3600)
+    monkeypatch.setattr(main, "get_job_broker", lambda: broker)
+    monkeypatch.setattr(settings, "job_callback_hosts", hosts)
+    monkeypatch.setattr(jobs, "_resolve", lambda host, port: [address])
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        r = await c.post(
+            "/v1/ine/jobs",
+            files={
+                "front_image": ("front.jpg", white_card_front, "image/jpeg"),
+                "back_image": ("back.jpg", white_card_back, "image/jpeg"),
+            },
+            data={"callback_url": url},
+        )
+
+    broker.close()
+    assert r.status_code == 422
+    assert r.json()["error_code"] == error_code
+
+
+@pytest.mark.asyncio
+async def test_notify_skips_targets_that_became_private(monkeypatch):
+    monkeypatch.setattr(settings, "job_callback_hosts", "example.test")
+    monkeypatch.setattr(jobs, "_resolve", lambda host, port: ["192.168.1.5"])
+
+    sent = await jobs.notify_callback({"job_id": "j1", "callback_url": "http://example.test/hook"})
+
+    assert sent is False
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_off_by_default(white_card_front, white_card_back):
+    assert jobs.get_job_broker() is None
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        r = await c.post(
+            "/v1/ine/jobs",
+            files={
+                "front_image": ("front.jpg", white_card_front, "image/jpeg"),
+                "back_image": ("back.jpg", white_card_back, "image/jpeg"),
+            },
+        )
+
+    assert r.status_code == 404
+    assert r.json()["error_code"] == "JOBS_DISABLED"
@@ -0,0 +1,59 @@
+"""Tests for the load-test tool."""
+
+from __future__ import annotations
+
+import pytest
+
+from app import worker_pool
+from app.models import OcrResponse
+from benchmarks.loadtest import Sample, open_client, run_level, summarise
+
+
+def test_summarise_rates_and_percentiles():
+    samples = [Sample(200, float(ms)) for ms in range(1, 9)] + [
+        Sample(200, 9.0, budget_exceeded=True),
+        Sample(503, 1.0),
+        Sample(500, 1.0),
+        Sample(0, 60000.0),
+    ]
+
+    report = summarise(4, samples, elapsed_s=3.0)
+
+    assert report.requests == 12
+    assert report.throughput_rps == 3.0
+    assert report.p50_ms == 5.0 and report.p99_ms == 9.0
+    assert report.rejected_rate == round(1 / 12, 4)
+    assert report.error_rate == round(2 / 12, 4)
+    assert report.budget_exceeded_rate == round(1 / 9, 4)
+
+
+@pytest.mark.asyncio
+async def test_level_against_app_in_process(monkeypatch, white_card_front, white_card_back):
+    def fake_process_ine(front_bytes, back_bytes, **options):
+        return OcrResponse(model_id="MODEL_TEST", warnings=["time_budget_exceeded"])
+
+    monkeypatch.setattr(worker_pool, "process_ine", fake_process_ine)
+
+    async with open_client(None, timeout_s=10) as client:
+        report = await run_level(client, [(white_card_front, white_card_back)], concurrency=2, duration_s=0.2)
+
+    assert report.requests >= 2
+    assert report.error_rate == 0.0
+    assert report.budget_exceeded_rate == 1.0
+
+
+@pytest.mark.asyncio
+async def test_level_sends_unique_bytes_for_both_sides(monkeypatch, white_card_front, white_card_back):
+    sent = []
+
+    def fake_process_ine(front_bytes, back_bytes, **options):
+        sent.append((front_bytes, back_bytes))
+        return OcrResponse(model_id="MODEL_TEST")
+
+    monkeypatch.setattr(worker_pool, "process_ine", fake_process_ine)
+
+    async with open_client(None, timeout_s=10) as client:
+        await run_level(client, [(white_card_front, white_card_back)], concurrency=2, duration_s=0.2)
+
+    assert len(sent) >= 2
+    assert len({front for front, _ in sent}) == len({back for _, back in sent}) == len(sent)
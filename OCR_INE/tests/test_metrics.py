@@ -0,0 +1,98 @@
+"""Tests for stage timing and the Prometheus exposition."""
+
+from __future__ import annotations
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import metrics
+from app.main import app
+from app.metrics import Counter, Histogram
+from app.models import OcrResponse, StageTiming, Timings
+from app.timing import recording, server_timing_header, timed
+
+
+def test_timed_records_nesting_only_inside_recording():
+    with timed("outside"):
+        pass
+    with recording() as recorder:
+        with timed("attempt"):
+            with timed("roi"):
+                pass
+
+    assert [(name, parent) for name, _, parent in recorder.entries] == [("roi", "attempt"), ("attempt", None)]
+
+
+def test_server_timing_lists_top_level_stages():
+    timings = Timings(total_ms=120, queue_ms=3, stages=[
+        StageTiming(name="decode_front", ms=10.5),
+        StageTiming(name="back_roi.id_ine", ms=40.0, parent="back_attempt_1"),
+        StageTiming(name="back_attempt_1", ms=60.0, parent="back_ocr"),
+        StageTiming(name="back_ocr", ms=61.0),
+    ])
+
+    assert server_timing_header(timings) == (
+        "queue;dur=3, decode_front;dur=10.5, back_ocr;dur=61.0, total;dur=120"
+    )
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        hist.observe(value, "ocr")
+
+    lines = hist.render()
+
+    assert 'test_seconds_bucket{stage="ocr",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="ocr",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="ocr",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="ocr"} 3' in lines
+
+
+def test_counter_escapes_labels_and_starts_at_zero():
+    assert Counter("plain_total", "Plain.").render()[-1] == "plain_total 0"
+
+    counter = Counter("test_total", "Test.", ("warning",))
+    counter.inc(2, 'say "hi"')
+    assert counter.render()[-1] == 'test_total{warning="say \\"hi\\""} 2'
+
+
+def test_record_extraction_counts_model_warnings_and_retries():
+    before_retries = metrics.retries_total.value()
+    before_budget = metrics.budget_exceeded_total.value()
+    result = OcrResponse(
+        model_id="MODEL_TEST_METRICS", attempts=5, warnings=["time_budget_exceeded"],
+        timings=Timings(stages=[
+            StageTiming(name="decode_front", ms=4.0),
+            StageTiming(name="back_attempt_1", ms=60.0, parent="back_ocr"),  # includes a speculative race
+            StageTiming(name="back_roi.id_ine", ms=20.0, parent="back_attempt_2"),
+            StageTiming(name="back_attempt_2", ms=30.0, parent="back_ocr"),
+            StageTiming(name="back_attempt_3", ms=30.0, parent="back_ocr"),
+        ]),
+    )
+
+    metrics.record_extraction(result, wait_ms=0)
+
+    assert metrics.extractions_total.value("MODEL_TEST_METRICS") == 1
+    assert metrics.retries_total.value() == before_retries + 2
+    assert metrics.budget_exceeded_total.value() == before_budget + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_stage_histograms(white_card_front, white_card_back):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        # Trailing bytes keep both sides out of the result cache
+        await c.post("/v1/ine/extract", files={
+            "front_image": ("front.jpg", white_card_front + b"metrics", "image/jpeg"),
+            "back_image": ("back.jpg", white_card_back + b"metrics", "image/jpeg"),
+        })
+        r = await c.get("/metrics")
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for stage in ("decode_front", "rectify_back.orientation", "rectify_front.contour",
+                  "classify.qr", "front_nombre", "back_attempt_1", "back_roi.id_ine"):
+        assert f'ocr_ine_stage_duration_seconds_count{{stage="{stage}"}}' in r.text
+    assert "ocr_ine_ocr_child_cpu_seconds_total" in r.text
+    assert "ocr_ine_queue_depth" in r.text
@@ -0,0 +1,121 @@
+"""Tests for multi-ROI montage OCR."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import back_parser, extractor, pipeline
+from app.classifier import MODEL_QR
+from app.config import settings
+from app.extractor import OcrRead
+from app.ocr_engine import EnginePool, Word, _words
+from app.result_cache import reset_result_cache
+
+CURP = "PELJ000101HDFRPNA1"
+
+
+class _BandEngine:
+    """Reports one word per band of dark rows, named by its order."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def image_to_data(self, image, psm, whitelist, timeout=0):
+        self.calls += 1
+        dark = (image < 128).any(axis=1)
+        words, top = [], None
+        for y, is_dark in enumerate([*dark, False]):
+            if is_dark and top is None:
+                top = y
+            elif not is_dark and top is not None:
+                words.append(Word(f"W{len(words)}", 10, top, 50, y - top, 90.0, (1, 1, len(words) + 1)))
+                top = None
+        return words
+
+
+def _crop_with_text_lines(lines: int) -> np.ndarray:
+    crop = np.full((30 * lines + 10, 200, 3), 255, dtype=np.uint8)
+    for i in range(lines):
+        crop[10 + 30 * i:25 + 30 * i, 20:150] = 0
+    return crop
+
+
+@pytest.fixture
+def montage_on(monkeypatch):
+    monkeypatch.setattr(settings, "ocr_montage", True)
+    monkeypatch.setattr(settings, "cache_backend", "none")
+    reset_result_cache()
+    yield
+    reset_result_cache()
+
+
+def test_one_call_and_words_map_back_to_their_crop(monkeypatch):
+    engine = _BandEngine()
+    monkeypatch.setattr(extractor, "get_engine_pool", lambda lang="spa": EnginePool(lambda: engine, 1))
+
+    reads = extractor.ocr_montage(
+        {"a": _crop_with_text_lines(1), "b": _crop_with_text_lines(2), "empty": np.empty((0, 0, 3), np.uint8)},
+        attempt=2,
+        whitelist="W0123456789",
+    )
+
+    assert engine.calls == 1
+    assert {name: read.text for name, read in reads.items()} == {"a": "W0", "b": "W1\nW2", "empty": ""}
+    assert reads["b"].confidence() == 0.9
+
+
+def test_words_keep_only_recognised_word_rows():
+    data = {
+        "level": [4, 5, 5], "block_num": [1, 1, 1], "par_num": [1, 1, 1], "line_num": [1, 1, 1],
+        "left": [0, 5, 40], "top": [0, 2, 2], "width": [90, 30, 30], "height": [20, 15, 15],
+        "conf": [-1, 91.5, -1], "text": ["", "ABC", " "],
+    }
+    assert _words(data) == [Word("ABC", 5, 2, 30, 15, 91.5, (1, 1, 1))]
+
+
+def test_back_rois_keep_their_own_ocr_settings(montage_on, monkeypatch):
+    calls = []
+
+    def fake_read_region(roi_image, attempt=1, psm=7, whitelist="", lang="spa"):
+        calls.append((psm, "<" in whitelist))
+        if psm == 7:
+            return OcrRead("IDMEX1234567890123<<", [Word("IDMEX1234567890123<<", 0, 0, 90, 20, 88.0, (1, 1, 1))])
+        return OcrRead(f"CURP {CURP}", [])
+
+    monkeypatch.setattr(back_parser, "read_region", fake_read_region)
+    monkeypatch.setattr(back_parser, "ocr_montage", lambda *a, **k: pytest.fail("montage across OCR settings"))
+    back = np.full((settings.card_height, settings.card_width, 3), 255, dtype=np.uint8)
+
+    result = back_parser.parse_back(back, model_id=MODEL_QR, feature_bboxes=[])
+
+    # id_ine: one line, MRZ whitelist with '<'; CURP: block, no '<'.
+    assert sorted(calls) == [(6, False), (7, True)]
+    assert result["id_ine"] == "IDMEX1234567890123"
+    assert result["curp"] == CURP
+    assert result["ocr_confidence"] == {"id_ine": 0.88}
+
+
+def test_back_montage_groups_rois_by_ocr_settings(montage_on, monkeypatch):
+    calls = []
+    monkeypatch.setattr(back_parser, "_ROI_OCR", {"id_ine": (6, "AB<"), "curp": (6, "AB<")})
+
+    def fake_montage(crops, attempt=1, psm=6, whitelist=""):
+        calls.append((sorted(crops), whitelist))
+        return {name: OcrRead("", []) for name in crops}
+
+    monkeypatch.setattr(back_parser, "ocr_montage", fake_montage)
+    monkeypatch.setattr(back_parser, "read_region", lambda *a, **k: pytest.fail("per-ROI OCR for a shared group"))
+    back = np.full((settings.card_height, settings.card_width, 3), 255, dtype=np.uint8)
+
+    back_parser.parse_back(back, model_id=MODEL_QR, feature_bboxes=[])
+
+    assert calls == [(["curp", "id_ine"], "AB<")]
+
+
+def test_pipeline_uses_one_front_node(montage_on, white_card_front, white_card_back):
+    result = pipeline.process_ine(white_card_front, white_card_back)
+
+    names = {stage.name for stage in result.timings.stages}
+    assert "front_rois" in names
+    assert not any(name.startswith("front_nombre") for name in names)
@@ -0,0 +1,128 @@
+"""Tests for the Tesseract engine pool."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app import extractor, ocr_engine
+from app.ocr_engine import EnginePool, EngineUnavailable
+
+
+class _FakeEngine:
+    backend = "fake"
+
+    def __init__(self, text: str = "ABC123"):
+        self.text = text
+        self.calls: list[tuple[int, str]] = []
+
+    def image_to_string(self, image, psm, whitelist, timeout=0):
+        self.calls.append((psm, whitelist, timeout))
+        return self.text
+
+    def orientation(self, image, timeout=0):
+        return 0
+
+    def close(self):
+        pass
+
+
+class TestEnginePool:
+    def test_reuses_engine(self):
+        created = []
+        pool = EnginePool(lambda: created.append(_FakeEngine()) or created[-1], size=2)
+
+        with pool.borrow() as first:
+            pass
+        with pool.borrow() as second:
+            pass
+
+        assert first is second
+        assert len(created) == 1
+
+    def test_never_exceeds_size(self):
+        created = []
+        lock = threading.Lock()
+        in_use = 0
+        peak = 0
+
+        def factory():
+            engine = _FakeEngine()
+            created.append(engine)
+            return engine
+
+        pool = EnginePool(factory, size=2)
+
+        def worker():
+            nonlocal in_use, peak
+            with pool.borrow():
+                with lock:
+                    in_use += 1
+                    peak = max(peak, in_use)
+                time.sleep(0.01)
+                with lock:
+                    in_use -= 1
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(created) == 2
+        assert peak <= 2
+        assert pool.stats()["idle"] == 2
+
+    def test_borrow_timeout(self):
+        pool = EnginePool(_FakeEngine, size=1)
+        with pool.borrow():
+            with pytest.raises(EngineUnavailable):
+                with pool.borrow(timeout=0.01):
+                    pass
+
+    def test_factory_failure_releases_slot(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise EngineUnavailable("boom")
+            return _FakeEngine()
+
+        pool = EnginePool(factory, size=1)
+        with pytest.raises(EngineUnavailable):
+            with pool.borrow():
+                pass
+        with pool.borrow() as engine:
+            assert isinstance(engine, _FakeEngine)
+
+
+class TestOcrRegion:
+    def test_uses_pooled_engine(self, monkeypatch):
+        engine = _FakeEngine(text=" abc<12 \n")
+        pool = EnginePool(lambda: engine, size=1)
+        monkeypatch.setattr(extractor, "get_engine_pool", lambda lang="spa": pool)
+
+        roi = np.full((20, 80, 3), 255, dtype=np.uint8)
+        assert extractor.ocr_region(roi, psm=7) == "ABC<12"
+        assert engine.calls[0][0] == 7
+
+    def test_engine_unavailable_returns_empty(self, monkeypatch):
+        def factory():
+            raise EngineUnavailable("no tessdata")
+
+        monkeypatch.setattr(extractor, "get_engine_pool", lambda lang="spa": EnginePool(factory, 1))
+
+        roi = np.full((20, 80, 3), 255, dtype=np.uint8)
+        assert extractor.ocr_region(roi) == ""
+
+
+def test_get_engine_pool_is_cached():
+    ocr_engine.reset_engine_pools()
+    try:
+        assert ocr_engine.get_engine_pool("spa") is ocr_engine.get_engine_pool("spa")
+    finally:
+        ocr_engine.reset_engine_pools()
@@ -0,0 +1,88 @@
+"""Tests for tiered orientation detection."""
+
+from __future__ import annotations
+
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app import orientation
+from app.orientation import apply_rotation, detect_orientation, exif_orientation
+
+# Rotation that produces an image needing `rotate` degrees clockwise to upright.
+_INVERSE = {0: 0, 90: 270, 180: 180, 270: 90}
+
+
+@pytest.fixture(autouse=True)
+def no_osd(monkeypatch):
+    """Structural tiers must decide without falling back to Tesseract."""
+    monkeypatch.setattr(orientation, "_osd_orientation", lambda image: None)
+
+
+def _back_card() -> np.ndarray:
+    img = np.full((638, 1012, 3), 255, dtype=np.uint8)
+    qr = cv2.QRCodeEncoder.create().encode("IDMEX1234567890")
+    qr = cv2.resize(qr, (200, 200), interpolation=cv2.INTER_NEAREST)
+    img[60:260, 406:606] = cv2.cvtColor(qr, cv2.COLOR_GRAY2BGR)
+    cv2.putText(img, "IDMEX1234567890<<0123456789", (60, 400),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    return img
+
+
+def _front_card() -> np.ndarray:
+    img = np.full((638, 1012, 3), 235, dtype=np.uint8)
+    cv2.ellipse(img, (170, 330), (120, 170), 0, 0, 360, (90, 110, 140), -1)
+    for y in range(110, 600, 45):
+        cv2.putText(img, "C JUAREZ 123 COL CENTRO 78000", (360, y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (20, 20, 20), 2)
+    return img
+
+
+@pytest.mark.parametrize("rotate", [0, 90, 180, 270])
+def test_back_orientation_from_qr_position(rotate):
+    image = apply_rotation(_back_card(), _INVERSE[rotate])
+    assert detect_orientation(image, side="back") == (rotate, "structure")
+
+
+@pytest.mark.parametrize("rotate", [0, 90, 180, 270])
+def test_front_orientation_from_text_layout(rotate):
+    image = apply_rotation(_front_card(), _INVERSE[rotate])
+    assert detect_orientation(image, side="front") == (rotate, "structure")
+
+
+def test_blank_image_is_inconclusive():
+    image = np.full((540, 856, 3), 255, dtype=np.uint8)
+    assert detect_orientation(image, side="front") == (0, "none")
+
+
+def test_exif_rotation_already_applied():
+    image = np.full((540, 856, 3), 255, dtype=np.uint8)
+    assert detect_orientation(image, side="back", exif=6) == (0, "exif")
+
+
+def test_exif_rotation_still_corrects_upside_down_card():
+    image = apply_rotation(_back_card(), 180)
+    assert detect_orientation(image, side="back", exif=6) == (180, "structure")
+    assert detect_orientation(_back_card(), side="back", exif=6) == (0, "exif")
+
+
+def test_reads_exif_orientation_tag():
+    img = Image.new("RGB", (64, 32), (200, 200, 200))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", exif=exif)
+
+    assert exif_orientation(buf.getvalue()) == 6
+    assert exif_orientation(b"not an image") is None
+
+
+def test_tier_stats_are_recorded():
+    before = orientation.stats.snapshot()["structure"]["attempts"]
+    detect_orientation(_back_card(), side="back")
+    after = orientation.stats.snapshot()["structure"]
+    assert after["attempts"] == before + 1
+    assert after["hits"] >= 1
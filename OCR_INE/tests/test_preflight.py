@@ -0,0 +1,64 @@
+"""Tests for the preflight capture check."""
+
+from __future__ import annotations
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.classifier import MODEL_QR
+from app.main import app
+from benchmarks import synthetic
+
+
+async def _preflight(image: bytes, side: str):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        return await c.post(
+            "/v1/ine/preflight",
+            files={"image": ("side.jpg", image, "image/jpeg")},
+            data={"side": side},
+        )
+
+
+@pytest.mark.asyncio
+async def test_back_reports_quality_contour_and_model():
+    _, back, _ = synthetic.make_pair(3, synthetic.PRESETS["typical"], MODEL_QR)
+
+    r = await _preflight(back, "back")
+
+    assert r.status_code == 200
+    data = r.json()
+    assert data["usable"] is True
+    assert data["card_detected"] is True
+    assert data["model_id"] == MODEL_QR
+    assert data["quality"]["quality_grade"] in ("good", "fair")
+    tl, tr, br, bl = data["card_corners"]
+    assert tl[0] < tr[0] and tl[1] < bl[1] and 0.0 <= br[0] <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_front_has_no_model():
+    front, _, _ = synthetic.make_pair(3, synthetic.PRESETS["clean"])
+
+    data = (await _preflight(front, "front")).json()
+
+    assert data["side"] == "front"
+    assert data["model_id"] is None
+    assert data["warnings"] == []
+
+
+@pytest.mark.asyncio
+async def test_blank_photo_asks_for_a_retake(white_card_back):
+    data = (await _preflight(white_card_back, "back")).json()
+
+    assert data["usable"] is False
+    assert data["warnings"][:2] == ["retake_photo", "back_low_blur"]
+    assert "back_perspective_failed" in data["warnings"]
+
+
+@pytest.mark.asyncio
+async def test_rejects_unknown_side(white_card_back):
+    r = await _preflight(white_card_back, "left")
+
+    assert r.status_code == 422
+    assert r.json()["error_code"] == "INVALID_SIDE"
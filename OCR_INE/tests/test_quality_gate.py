@@ -0,0 +1,62 @@
+"""Tests for the downscaled quality check and the early-rejection gate."""
+
+from __future__ import annotations
+
+import cv2
+import pytest
+
+from app import pipeline
+from app.config import settings
+from app.pipeline import decode_image
+from app.quality import assess_quality, gate_warnings
+from app.result_cache import reset_result_cache
+from benchmarks import synthetic
+
+
+@pytest.fixture
+def gate_on(monkeypatch):
+    monkeypatch.setattr(settings, "quality_gate", True)
+    monkeypatch.setattr(settings, "cache_backend", "none")
+    reset_result_cache()
+    yield
+    reset_result_cache()
+
+
+def test_blur_score_does_not_depend_on_photo_resolution():
+    scores = []
+    for resolution in (1280, 4000):
+        degradation = synthetic.Degradation(**{**synthetic.asdict(synthetic.PRESETS["clean"]), "resolution": resolution})
+        _, back, _ = synthetic.make_pair(1, degradation)
+        scores.append(assess_quality(decode_image(back)).blur)
+    assert scores[0] > 0.5 and scores[1] > 0.5
+
+
+def test_gate_rejects_only_unreadable_captures():
+    _, back, _ = synthetic.make_pair(2, synthetic.PRESETS["harsh"])
+    image = decode_image(back)
+
+    assert gate_warnings(assess_quality(image), "back") == []
+    assert gate_warnings(assess_quality(cv2.GaussianBlur(image, (0, 0), 8)), "back") == ["back_low_blur"]
+
+
+def test_blank_photos_get_a_retake_response(gate_on, white_card_front, white_card_back, monkeypatch):
+    monkeypatch.setattr(pipeline, "rectify", lambda *a, **k: pytest.fail("rectified an unreadable capture"))
+
+    result = pipeline.process_ine(white_card_front, white_card_back)
+
+    assert result.warnings == [
+        "retake_photo",
+        "front_low_blur", "front_high_glare", "front_bad_exposure",
+        "back_low_blur", "back_high_glare", "back_bad_exposure",
+    ]
+    assert result.quality.back.quality_grade == "poor"
+    assert result.beneficiarios.id_ine.value is None
+
+
+def test_readable_pair_passes_the_gate(gate_on):
+    front, back, _ = synthetic.make_pair(0, synthetic.PRESETS["typical"])
+
+    result = pipeline.process_ine(front, back)
+
+    assert "retake_photo" not in result.warnings
+    assert {stage.name for stage in result.timings.stages} >= {"quality_gate", "rectify_front", "rectify_back"}
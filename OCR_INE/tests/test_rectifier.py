@@ -0,0 +1,53 @@
+"""Tests for downscale-first rectification."""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+
+from app import orientation
+from app.rectifier import CARD_SIZE, find_card_corners, rectify
+from app.roi_loader import PIXEL_TEMPLATES, TEMPLATES, to_pixel_box
+
+
+@pytest.fixture(autouse=True)
+def no_osd(monkeypatch):
+    monkeypatch.setattr(orientation, "_osd_orientation", lambda image: None)
+
+
+def _photo_with_card(width: int, height: int, corners: np.ndarray) -> np.ndarray:
+    """A dark background with a light card quad at ``corners``."""
+    photo = np.full((height, width, 3), 40, dtype=np.uint8)
+    cv2.fillConvexPoly(photo, corners.astype(np.int32), (225, 225, 225))
+    return photo
+
+
+def test_warps_large_photo_to_canonical_size():
+    corners = np.array([[300, 300], [3700, 450], [3600, 2700], [250, 2550]], dtype=np.float32)
+    photo = _photo_with_card(4000, 3000, corners)
+
+    found = find_card_corners(photo)
+    assert found is not None
+    # Corners are detected on a reduced level and mapped back to full size
+    for corner in corners:
+        assert np.min(np.linalg.norm(found - corner, axis=1)) < 20
+
+    rectified, ok = rectify(photo)
+    assert ok is True
+    assert rectified.shape[:2] == (CARD_SIZE[1], CARD_SIZE[0])
+
+
+def test_fallback_is_bounded():
+    photo = np.full((3000, 4000, 3), 230, dtype=np.uint8)
+    rectified, ok = rectify(photo)
+    assert ok is False
+    h, w = rectified.shape[:2]
+    assert w <= CARD_SIZE[0] * 2 and h <= CARD_SIZE[1] * 2
+
+
+def test_pixel_templates_match_crop_boxes():
+    w, h = CARD_SIZE
+    for group, rois in TEMPLATES.items():
+        for name, roi in rois.items():
+            assert PIXEL_TEMPLATES[group][name] == to_pixel_box(roi, w, h)
@@ -0,0 +1,82 @@
+"""Tests for the offline replay harness."""
+
+from __future__ import annotations
+
+import csv
+import json
+
+from app.config import settings
+from app.models import FieldResult, OcrResponse
+from app.result_cache import reset_result_cache
+from benchmarks import replay
+from benchmarks.synthetic import write_dataset
+
+
+def _row(item_id, ms, grade="good", **values):
+    result = OcrResponse(model_id="MODEL_QRHD_2019_PRESENT")
+    result.quality.front.quality_grade = grade
+    result.quality.back.quality_grade = "good"
+    for name, (value, review) in values.items():
+        setattr(result.beneficiarios, name, FieldResult(value=value, requires_review=review))
+    truth = {"model_id": "MODEL_QRHD_2019_PRESENT", "beneficiarios": {"nombre": "JUAN", "curp": "X"}}
+    row = replay.Row(item_id=item_id, ms=ms)
+    replay.score(row, result.model_dump(), truth)
+    return row
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+
+    assert replay.percentile(values, 50) == 50
+    assert replay.percentile(values, 99) == 99
+    assert replay.percentile([7.0], 95) == 7.0
+    assert replay.percentile([], 50) is None
+
+
+def test_aggregate_rates():
+    rows = [
+        _row("a", 10, nombre=("juan ", False), curp=("X", False)),
+        _row("b", 20, nombre=("JUAN", True), curp=("Y", False)),  # silent CURP error
+        _row("c", 30, nombre=("PEDRO", True), curp=("X", True)),
+    ]
+
+    stats = replay.aggregate(rows)
+
+    assert stats["model_accuracy"] == 1.0
+    assert stats["fields"]["beneficiarios.nombre"] == {
+        "evaluated": 3, "exact_match": 0.6667, "review": 0.6667, "silent_error": 0.0,
+    }
+    assert stats["fields"]["beneficiarios.curp"]["silent_error"] == 0.3333
+    assert stats["fields"]["beneficiarios.sexo"]["evaluated"] == 0
+    assert stats["latency_ms"]["p50"] == 20
+
+
+def test_report_groups_by_model_and_worst_grade():
+    rows = [_row("b", 20, grade="poor"), _row("a", 10), replay.Row(item_id="c", error="boom")]
+
+    report = replay.build_report(rows, wall_s=1.0, workers=2)
+
+    assert [item["item_id"] for item in report["items"]] == ["a", "b", "c"]
+    assert report["overall"]["errors"] == 1
+    assert set(report["by_quality_grade"]) == {"good", "poor", "unknown"}
+    assert report["by_model_id"]["MODEL_QRHD_2019_PRESENT"]["count"] == 2
+
+
+def test_replay_directory_end_to_end(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_backend", settings.cache_backend)  # the run disables it
+    write_dataset(tmp_path / "cards", count=1, resolution=1280)
+    pairs = replay.find_pairs(tmp_path / "cards")
+    assert len(pairs) == 1 and pairs[0].truth is not None
+
+    try:
+        rows = replay.run(pairs, workers=1)
+    finally:
+        reset_result_cache()
+    replay.write_csv(rows, tmp_path / "out.csv")
+    report = replay.build_report(rows, wall_s=1.0, workers=1)
+
+    assert rows[0].error is None and rows[0].ms > 0
+    assert report["overall"]["fields"]["beneficiarios.curp"]["evaluated"] == 1
+    json.dumps(report)  # serialisable
+    with (tmp_path / "out.csv").open() as f:
+        assert [line["item_id"] for line in csv.DictReader(f)] == [pairs[0].item_id]
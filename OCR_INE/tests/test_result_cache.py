@@ -0,0 +1,159 @@
+"""Tests for the content-addressed result cache."""
+
+from __future__ import annotations
+
+import io
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+
+from app import main, pipeline, result_cache, worker_pool
+from app.models import OcrResponse
+from app.resp import RespClient, RespError
+from app.result_cache import MemoryCache, RedisCache, ResultCache, content_key
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = ResultCache(MemoryCache(max_entries=16, ttl_s=60))
+    monkeypatch.setattr(pipeline, "get_result_cache", lambda: cache)
+    monkeypatch.setattr(main, "get_result_cache", lambda: cache)
+    return cache
+
+
+def _jpeg(color: tuple) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (856, 540), color).save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+class TestMemoryCache:
+    def test_lru_eviction(self):
+        cache = MemoryCache(max_entries=2, ttl_s=60)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+
+        assert cache.get("a") == {"v": 1}
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self, monkeypatch):
+        cache = MemoryCache(max_entries=2, ttl_s=10)
+        cache.set("a", {"v": 1})
+        now = time.monotonic()
+        monkeypatch.setattr(result_cache.time, "monotonic", lambda: now + 11)
+        assert cache.get("a") is None
+
+
+def test_redis_backend_roundtrip(resp_server):
+    cache = ResultCache(RedisCache(RespClient(resp_server), ttl_s=60))
+    assert cache.get("back", "abc") is None
+    cache.set("back", "abc", {"fields": {"id_ine": "X" * 18}})
+    assert cache.get("back", "abc") == {"fields": {"id_ine": "X" * 18}}
+    assert cache.stats()["back"] == {"hits": 1, "misses": 1}
+
+
+def test_redis_backend_down_is_a_miss():
+    cache = ResultCache(RedisCache(RespClient("redis://127.0.0.1:1/0", timeout=0.2), ttl_s=60))
+    assert cache.get("front", "abc") is None
+    cache.set("front", "abc", {})
+    assert cache.stats()["errors"] == 2
+
+
+def test_failed_auth_does_not_leave_a_connection(resp_server):
+    client = RespClient(resp_server.replace("redis://", "redis://:secret@"))
+
+    for _ in range(2):  # the stand-in rejects AUTH, so every call must handshake again
+        with pytest.raises(RespError):
+            client.execute("PING")
+        assert client._sock is None
+
+
+def test_same_back_reuses_cached_side(monkeypatch, fresh_cache):
+    calls = []
+    real_parse_back = pipeline.parse_back
+
+    def counting_parse_back(*args, **kwargs):
+        calls.append(1)
+        return real_parse_back(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "parse_back", counting_parse_back)
+    back = _jpeg((200, 200, 200))
+
+    first = pipeline.process_ine(_jpeg((210, 210, 210)), back)
+    back_calls = len(calls)
+    second = pipeline.process_ine(_jpeg((190, 190, 190)), back)
+
+    assert back_calls > 0
+    assert len(calls) == back_calls
+    assert second.attempts == first.attempts
+    assert second.quality.back == first.quality.back
+    assert fresh_cache.stats()["back"]["hits"] == 1
+    assert fresh_cache.stats()["front"]["hits"] == 0
+
+
+def test_content_key_is_stable():
+    assert content_key(b"abc") == content_key(memoryview(b"abc"))
+    assert content_key(b"abc") != content_key(b"abd")
+
+
+@pytest.mark.asyncio
+async def test_client_request_id_is_idempotent(monkeypatch, fresh_cache):
+    files = {
+        "front_image": ("front.jpg", _jpeg((200, 200, 200)), "image/jpeg"),
+        "back_image": ("back.jpg", _jpeg((201, 201, 201)), "image/jpeg"),
+    }
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        first = await c.post("/v1/ine/extract", files=files, data={"client_request_id": "req-1"})
+        second = await c.post("/v1/ine/extract", files=files, data={"client_request_id": "req-1"})
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert fresh_cache.stats()["request"] == {"hits": 1, "misses": 1}
+    # Stored as the JSON body itself, so every backend replays the same bytes.
+    assert fresh_cache.get("request", "req-1")["result"] == first.json()
+
+
+@pytest.mark.asyncio
+async def test_client_request_id_reused_with_other_images_conflicts(fresh_cache):
+    def files(shade):
+        return {
+            "front_image": ("front.jpg", _jpeg((shade, shade, shade)), "image/jpeg"),
+            "back_image": ("back.jpg", _jpeg((201, 201, 201)), "image/jpeg"),
+        }
+
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        first = await c.post("/v1/ine/extract", files=files(200), data={"client_request_id": "req-1"})
+        other = await c.post("/v1/ine/extract", files=files(120), data={"client_request_id": "req-1"})
+
+    assert first.status_code == 200
+    assert other.status_code == 409
+    assert other.json()["error_code"] == "CLIENT_REQUEST_ID_CONFLICT"
+
+
+@pytest.mark.asyncio
+async def test_budget_cut_results_are_not_replayed(monkeypatch, fresh_cache):
+    calls = []
+
+    def fake_process_ine(front_bytes, back_bytes, **options):
+        calls.append(1)
+        return OcrResponse(model_id="MODEL_TEST", warnings=["time_budget_exceeded"])
+
+    monkeypatch.setattr(worker_pool, "process_ine", fake_process_ine)
+    files = {
+        "front_image": ("front.jpg", _jpeg((200, 200, 200)), "image/jpeg"),
+        "back_image": ("back.jpg", _jpeg((201, 201, 201)), "image/jpeg"),
+    }
+    transport = ASGITransport(app=main.app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        for _ in range(2):
+            r = await c.post("/v1/ine/extract", files=files, data={"client_request_id": "req-1"})
+            assert r.status_code == 200
+
+    assert len(calls) == 2
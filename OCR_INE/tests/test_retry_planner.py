@@ -0,0 +1,127 @@
+"""Tests for field-level retry planning."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import deadline, pipeline
+from app.classifier import MODEL_QR
+from app.deadline import Deadline
+from app.extractor import OcrRead
+from app.models import QualitySide
+from app.ocr_engine import Word
+from app.retry_planner import BACK_ROI_FIELDS, FRONT_ROI_FIELDS, RetryPlan
+
+CURP = "PELJ000101HDFRPNA1"
+ID_INE = "IDMEX1234567890123"
+GOOD = QualitySide(blur=0.9, glare=0.0, exposure=0.9)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_costs():
+    deadline.reset_costs()
+    yield
+    deadline.reset_costs()
+
+
+def test_plan_keeps_best_value_per_field():
+    plan = RetryPlan(BACK_ROI_FIELDS, quality=0.9, context=1.0)
+
+    plan.offer({"id_ine": "IDMEX12", "curp": CURP, "warnings": []})
+    assert plan.pending() == ["id_ine"]
+
+    plan.offer({"id_ine": ID_INE})
+    plan.offer({"id_ine": None})
+    assert plan.pending() == []
+    assert plan.values() == {"id_ine": ID_INE, "curp": CURP}
+
+
+def test_plan_retries_roi_while_any_field_is_weak():
+    plan = RetryPlan({"apellidos": FRONT_ROI_FIELDS["apellidos"]}, quality=0.9, context=1.0)
+
+    plan.offer({"apellido_paterno": "PEREZ", "apellido_materno": ""})
+    assert plan.pending() == ["apellidos"]
+
+    plan.offer({"apellido_paterno": "", "apellido_materno": "LOPEZ"})
+    assert plan.pending() == []
+    assert plan.values() == {"apellido_paterno": "PEREZ", "apellido_materno": "LOPEZ"}
+
+
+def test_ocr_confidence_drives_the_stop_condition():
+    plan = RetryPlan(BACK_ROI_FIELDS, quality=0.5, context=1.0)
+
+    plan.offer({"id_ine": ID_INE, "curp": CURP, "ocr_confidence": {"id_ine": 0.4, "curp": 0.92}})
+    assert plan.pending() == ["id_ine"]  # right shape, shaky read
+
+    plan.offer({"id_ine": ID_INE[:-1], "ocr_confidence": {"id_ine": 0.96}})
+    assert plan.pending() == []  # one char short, but read solidly
+    assert plan.values() == {
+        "id_ine": ID_INE[:-1], "curp": CURP, "ocr_confidence": {"id_ine": 0.96, "curp": 0.92},
+    }
+
+
+def test_read_confidence_uses_the_words_of_the_value():
+    read = OcrRead("IDMEX 1234 <<", [
+        Word("IDMEX", 0, 0, 10, 10, 90.0, (1, 1, 1)),
+        Word("1234", 20, 0, 10, 10, 50.0, (1, 1, 1)),
+        Word("<<", 40, 0, 10, 10, 10.0, (1, 1, 1)),
+    ])
+    assert read.confidence("IDMEX") == 0.9
+    assert read.confidence("IDMEX1234") == 0.7
+    assert read.confidence("ZZZ") == 0.5  # no match: every word
+    assert OcrRead("", []).confidence() is None
+
+
+def test_back_retries_only_weak_fields(monkeypatch):
+    calls = []
+
+    def fake_parse_back(image, attempt=1, model_id=None, feature_bboxes=None, fields=None):
+        calls.append((attempt, sorted(fields)))
+        found = {"id_ine": "IDMEX12" if attempt == 1 else ID_INE, "curp": CURP}
+        return {**{f: found[f] for f in fields}, "warnings": []}
+
+    monkeypatch.setattr(pipeline, "parse_back", fake_parse_back)
+    image = np.full((100, 160, 3), 255, dtype=np.uint8)
+
+    with deadline.running(Deadline(60_000)):
+        out = pipeline._stage_back_ocr((image, True), (MODEL_QR, []), GOOD)
+
+    assert calls == [(1, ["curp", "id_ine"]), (2, ["id_ine"])]
+    assert out["attempts"] == 2
+    assert out["best_back"] == {"id_ine": ID_INE, "curp": CURP}
+
+
+def test_front_roi_retries_until_fields_are_good(monkeypatch):
+    calls = []
+    answers = {
+        "nombre": [{"nombre": ""}, {"nombre": "J"}, {"nombre": "JUAN"}],
+        "seccion": [{"seccional": "0123"}],
+    }
+
+    def fake_parse_front_roi(image, roi_name, attempt=1):
+        calls.append((roi_name, attempt))
+        return answers[roi_name][attempt - 1]
+
+    monkeypatch.setattr(pipeline, "parse_front_roi", fake_parse_front_roi)
+    rectified = (np.full((100, 160, 3), 255, dtype=np.uint8), True)
+
+    assert pipeline._stage_front_roi("nombre")(rectified, GOOD) == {"nombre": "JUAN"}
+    assert pipeline._stage_front_roi("seccion")(rectified, GOOD) == {"seccional": "0123"}
+    assert calls == [("nombre", 1), ("nombre", 2), ("nombre", 3), ("seccion", 1)]
+
+
+def test_front_retry_skipped_when_it_does_not_fit(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        pipeline, "parse_front_roi",
+        lambda image, roi_name, attempt=1: calls.append(attempt) or {"nombre": ""},
+    )
+    deadline.observe("front_attempt_2", 1e9)
+    rectified = (np.full((100, 160, 3), 255, dtype=np.uint8), True)
+
+    with deadline.running(Deadline(5000)) as run_deadline:
+        pipeline._stage_front_roi("nombre")(rectified, GOOD)
+
+    assert calls == [1]
+    assert run_deadline.exceeded
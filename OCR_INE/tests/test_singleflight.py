@@ -0,0 +1,81 @@
+"""Tests for single-flight deduplication."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_run():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return object()
+
+    first = asyncio.create_task(flight.do("pair", compute))
+    second = asyncio.create_task(flight.do("pair", compute))
+    await asyncio.sleep(0)
+    release.set()
+    (r1, shared1), (r2, shared2) = await asyncio.gather(first, second)
+
+    assert calls == 1
+    assert r1 is r2
+    assert (shared1, shared2) == (False, True)
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_run():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return "done"
+
+    leaver = asyncio.create_task(flight.do("pair", compute))
+    stayer = asyncio.create_task(flight.do("pair", compute))
+    await asyncio.sleep(0)
+
+    leaver.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await stayer == ("done", True)
+    assert leaver.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_caller():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("pipeline failed")
+
+    results = await asyncio.gather(
+        flight.do("pair", compute), flight.do("pair", compute), return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_new_run_after_completion():
+    flight = SingleFlight()
+
+    async def compute():
+        return 1
+
+    await flight.do("pair", compute)
+    _, shared = await flight.do("pair", compute)
+    assert shared is False
+    assert flight.stats()["started"] == 2
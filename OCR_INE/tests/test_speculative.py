@@ -0,0 +1,132 @@
+"""Tests for speculative id_ine OCR."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app import deadline, extractor, pipeline, speculative
+from app.classifier import MODEL_QR
+from app.config import settings
+from app.deadline import Deadline
+from app.models import QualitySide
+from app.ocr_engine import EnginePool
+from app.speculative import Race
+
+ID_INE = "IDMEX1234567890123"
+GOOD = QualitySide(blur=0.9, glare=0.0, exposure=0.9)
+
+
+@pytest.fixture
+def spare_cores(monkeypatch):
+    monkeypatch.setattr(settings, "speculative_slots", 2)
+    monkeypatch.setattr(settings, "speculative_per_request", 2)
+    speculative.reset_speculation()
+    deadline.reset_costs()
+    yield
+    speculative.reset_speculation()
+    deadline.reset_costs()
+
+
+def test_first_good_result_cancels_the_rest(spare_cores):
+    release = threading.Event()
+    ran = []
+
+    def slow():
+        release.wait(2)
+        ran.append("slow")
+        return "slow"
+
+    with Race([lambda: "inline", lambda: "quick", slow]) as race:
+        seen = []
+        for index, value in race:
+            seen.append(value)
+            if value == "quick":
+                break
+    release.set()
+
+    assert seen == ["inline", "quick"]
+    assert race.launched == [0, 1, 2]
+
+
+def test_request_budget_limits_extra_variants(spare_cores, monkeypatch):
+    monkeypatch.setattr(settings, "speculative_per_request", 1)
+
+    with Race([lambda: 0, lambda: 1, lambda: 2]) as race:
+        values = [value for _, value in race]
+
+    assert race.launched == [0, 1]
+    assert values == [0, 1]
+
+
+def test_no_spare_cores_runs_only_the_first(monkeypatch):
+    monkeypatch.setattr(settings, "speculative_slots", 0)
+    monkeypatch.setattr(settings, "process_cpus", 1)
+    speculative.reset_speculation()
+    try:
+        with Race([lambda: 0, lambda: 1]) as race:
+            values = [value for _, value in race]
+    finally:
+        speculative.reset_speculation()
+
+    assert race.launched == [0]
+    assert values == [0]
+
+
+def test_cancelled_variant_skips_its_ocr(spare_cores, monkeypatch):
+    calls = []
+
+    class Engine:
+        def image_to_string(self, image, psm, whitelist, timeout=0):
+            calls.append(psm)
+            return "X"
+
+    monkeypatch.setattr(extractor, "get_engine_pool", lambda lang="spa": EnginePool(Engine, 1))
+    roi = np.full((20, 80, 3), 255, dtype=np.uint8)
+    started, done = threading.Event(), threading.Event()
+
+    def late_ocr():
+        started.set()
+        time.sleep(0.2)
+        try:
+            return extractor.ocr_region(roi)
+        finally:
+            done.set()
+
+    with deadline.running(Deadline(10_000)) as parent:
+        with Race([lambda: started.wait(2) and "first", late_ocr]) as race:
+            next(iter(race))
+        assert done.wait(2)
+
+    assert calls == []
+    assert not parent.exceeded
+
+
+def test_back_ocr_takes_first_good_variant(spare_cores, monkeypatch):
+    monkeypatch.setattr(settings, "speculative_id_ine", True)
+    calls = []
+
+    def fake_parse_back(image, attempt=1, model_id=None, feature_bboxes=None, fields=None):
+        calls.append((attempt, sorted(fields)))
+        if attempt == 3 and fields == ["id_ine"]:
+            time.sleep(0.5)
+        found = {"id_ine": ID_INE if attempt == 2 else "IDMEX12", "curp": None}
+        return {**{f: found[f] for f in fields}, "warnings": []}
+
+    monkeypatch.setattr(pipeline, "parse_back", fake_parse_back)
+    image = np.full((100, 160, 3), 255, dtype=np.uint8)
+
+    t0 = time.perf_counter()
+    with deadline.running(Deadline(60_000)):
+        out = pipeline._stage_back_ocr((image, True), (MODEL_QR, []), GOOD)
+    elapsed = time.perf_counter() - t0
+
+    assert out["best_back"]["id_ine"] == ID_INE
+    assert elapsed < 0.4  # did not wait for attempt 3
+    assert (1, ["curp", "id_ine"]) in calls and (2, ["id_ine"]) in calls
+    # Later retries re-read only the CURP; id_ine already ran every variant.
+    assert all(fields == ["curp"] for attempt, fields in calls if attempt > 1 and fields != ["id_ine"])
+    assert out["attempts"] == len(calls)  # every OCR pass: raced variants plus the CURP retries
@@ -0,0 +1,80 @@
+"""Tests for the stage-graph executor."""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.pipeline import process_ine
+from app.stage_graph import Stage, StageGraph
+
+
+def _sleepy(value, delay=0.1):
+    def run(*_deps):
+        time.sleep(delay)
+        return value
+    return run
+
+
+class TestStageGraph:
+    def test_passes_dependencies_in_order(self):
+        graph = StageGraph([
+            Stage("a", lambda x: x + 1, ("x",)),
+            Stage("b", lambda x: x * 10, ("x",)),
+            Stage("c", lambda a, b: (a, b), ("a", "b")),
+        ])
+        run = graph.run({"x": 2})
+        assert run.results["c"] == (3, 20)
+        assert set(run.timings) == {"a", "b", "c"}
+
+    def test_independent_stages_overlap(self):
+        graph = StageGraph([
+            Stage("left", _sleepy("L")),
+            Stage("right", _sleepy("R")),
+            Stage("join", lambda l, r: l + r, ("left", "right")),
+        ])
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            t0 = time.perf_counter()
+            run = graph.run(executor=executor)
+            elapsed = time.perf_counter() - t0
+
+        assert run.results["join"] == "LR"
+        assert elapsed < 0.18
+        assert run.timings["left"] >= 90
+
+    def test_rejects_cycles(self):
+        with pytest.raises(ValueError, match="cycle"):
+            StageGraph([
+                Stage("a", lambda b: b, ("b",)),
+                Stage("b", lambda a: a, ("a",)),
+            ])
+
+    def test_rejects_unknown_dependency(self):
+        graph = StageGraph([Stage("a", lambda x: x, ("x",))])
+        with pytest.raises(ValueError, match="unknown"):
+            graph.run({})
+
+    def test_stage_error_propagates(self):
+        def boom():
+            raise RuntimeError("stage failed")
+
+        graph = StageGraph([
+            Stage("a", boom),
+            Stage("b", lambda a: a, ("a",)),
+        ])
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with pytest.raises(RuntimeError, match="stage failed"):
+                graph.run(executor=executor)
+
+
+def test_process_ine_decode_failure():
+    result = process_ine(b"not an image" * 200, b"not an image" * 200)
+    assert result.warnings == ["image_decode_failed"]
+
+
+def test_process_ine_runs_graph(white_card_front, white_card_back):
+    result = process_ine(white_card_front, white_card_back)
+    assert result.attempts >= 1
+    assert "id_ine_not_found" in result.warnings
@@ -0,0 +1,87 @@
+"""Tests for the synthetic card generator and the stage benchmark check."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.classifier import MODEL_PDF417, MODEL_QR, classify
+from app.curp_utils import is_valid_curp
+from app.pipeline import decode_image
+from app.rectifier import CARD_SIZE, rectify
+from benchmarks import bench_stages
+from benchmarks.bench_stages import compare
+from benchmarks.synthetic import PRESETS, Degradation, make_pair, write_dataset
+
+SMALL = Degradation(resolution=1280)
+
+
+def test_pairs_are_deterministic_per_seed():
+    assert make_pair(1, SMALL) == make_pair(1, SMALL)
+    assert make_pair(1, SMALL)[2] != make_pair(2, SMALL)[2]
+
+
+def test_truth_is_well_formed():
+    _, _, truth = make_pair(3, SMALL, MODEL_QR)
+
+    assert truth["model_id"] == MODEL_QR
+    assert is_valid_curp(truth["beneficiarios"]["curp"])
+    assert len(truth["beneficiarios"]["id_ine"]) == 18
+    assert len(truth["domicilio"]["codigo_postal"]) == 5
+
+
+@pytest.mark.parametrize("model_id", [MODEL_QR, MODEL_PDF417])
+def test_back_is_rectified_and_classified(model_id):
+    _, back, _ = make_pair(5, SMALL, model_id)
+
+    rectified, perspective_ok = rectify(decode_image(back), side="back")
+
+    assert perspective_ok
+    assert rectified.shape[:2] == (CARD_SIZE[1], CARD_SIZE[0])
+    assert classify(rectified)[0] == model_id
+
+
+def test_resolution_sets_photo_size():
+    front, _, _ = make_pair(1, PRESETS["clean"])
+
+    assert decode_image(front).shape[1] == PRESETS["clean"].resolution
+
+
+def test_write_dataset_uses_pair_naming(tmp_path):
+    ids = write_dataset(tmp_path, count=1, resolution=1280)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"{ids[0]}_back.jpg", f"{ids[0]}_front.jpg", f"{ids[0]}_truth.json",
+    ]
+    assert json.loads((tmp_path / f"{ids[0]}_truth.json").read_text())["beneficiarios"]["curp"]
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"a": 10.0, "b": 100.0, "c": 1.0}
+    current = {"a": 11.0, "b": 140.0, "c": 2.5, "new": 5.0}
+
+    regressions = compare(current, baseline, threshold=1.25)
+
+    # "c" is 2.5x but within the noise floor; "new" has no baseline.
+    assert len(regressions) == 1 and regressions[0].startswith("b:")
+
+
+def test_check_needs_an_explicit_baseline(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["bench_stages", "--check"])
+
+    with pytest.raises(SystemExit) as exc:
+        bench_stages.main()
+
+    assert exc.value.code == 2  # argparse usage error, before any stage runs
+
+
+def test_save_refuses_to_time_a_missing_tesseract(monkeypatch, tmp_path):
+    monkeypatch.setattr(bench_stages, "_tesseract_version", lambda: None)
+    monkeypatch.setattr(bench_stages, "run_all", lambda *a: pytest.fail("stages should not run"))
+    monkeypatch.setattr("sys.argv", ["bench_stages", "--save", "--baseline", str(tmp_path / "b.json")])
+
+    with pytest.raises(SystemExit, match="Tesseract is not available"):
+        bench_stages.main()
+
+    assert not (tmp_path / "b.json").exists()
@@ -0,0 +1,122 @@
+"""Tests for the bounded OCR worker pool."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import deadline, main, worker_pool
+from app.config import settings
+from app.models import OcrResponse
+from app.worker_pool import PoolBusy, WorkerPool
+
+
+@pytest.fixture
+def blocking_pipeline(monkeypatch):
+    """Replace process_ine with a stub that blocks until released."""
+    release = threading.Event()
+
+    def fake_process_ine(front_bytes, back_bytes, **options):
+        release.wait(timeout=5)
+        return OcrResponse(model_id="MODEL_TEST")
+
+    monkeypatch.setattr(worker_pool, "process_ine", fake_process_ine)
+    yield release
+    release.set()
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_runs_pipeline(white_card_front, white_card_back):
+    pool = WorkerPool(mode="thread", workers=1, max_queue=0)
+    try:
+        result, wait_ms = await pool.process(white_card_front, white_card_back)
+    finally:
+        pool.shutdown()
+
+    assert isinstance(result, OcrResponse)
+    assert wait_ms >= 0
+    assert pool.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full(blocking_pipeline):
+    pool = WorkerPool(mode="thread", workers=1, max_queue=1)
+    try:
+        first = asyncio.create_task(pool.process(b"f", b"b"))
+        second = asyncio.create_task(pool.process(b"f", b"b"))
+        await asyncio.sleep(0.05)
+
+        assert pool.stats()["queue_depth"] == 1
+        with pytest.raises(PoolBusy):
+            await pool.process(b"f", b"b")
+
+        blocking_pipeline.set()
+        await asyncio.gather(first, second)
+    finally:
+        pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_process_pool_reads_shared_memory(white_card_front, white_card_back):
+    pool = WorkerPool(mode="process", workers=1, max_queue=0)
+    try:
+        result, _ = await pool.process(white_card_front, white_card_back)
+    finally:
+        pool.shutdown()
+
+    assert isinstance(result, OcrResponse)
+    assert "image_decode_failed" not in result.warnings
+
+
+def test_process_workers_get_a_cpu_share_and_the_parent_costs(monkeypatch):
+    monkeypatch.setattr(settings, "process_cpus", 8)
+    pool = WorkerPool(mode="process", workers=4, max_queue=0)
+    try:
+        cpus, step_costs = pool._executor._initargs
+    finally:
+        pool.shutdown()
+    assert cpus == 2
+    assert step_costs == deadline.costs()
+
+    # What a child runs at start-up: no second calibration, pools sized for its share.
+    worker_pool._init_process_worker(cpus, {**step_costs, "osd": 42.0})
+    try:
+        assert settings.cpus() == 2
+        assert deadline.expected_ms("osd") == 42.0
+    finally:
+        deadline.reset_costs()
+
+
+@pytest.mark.asyncio
+async def test_extract_returns_503_when_saturated(monkeypatch, blocking_pipeline, white_card_front):
+    pool = WorkerPool(mode="thread", workers=1, max_queue=0)
+    monkeypatch.setattr(main, "get_worker_pool", lambda: pool)
+
+    def files(back: bytes) -> dict:
+        return {
+            "front_image": ("front.jpg", white_card_front, "image/jpeg"),
+            "back_image": ("back.jpg", back, "image/jpeg"),
+        }
+
+    transport = ASGITransport(app=main.app)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://test") as c:
+            running = asyncio.create_task(c.post("/v1/ine/extract", files=files(white_card_front)))
+            await asyncio.sleep(0.05)
+            # A different pair, so single-flight does not attach it to the first
+            r = await c.post("/v1/ine/extract", files=files(white_card_front + b"\0"))
+            blocking_pipeline.set()
+            await running
+    finally:
+        pool.shutdown()
+
+    assert r.status_code == 503
+    assert r.headers["Retry-After"]
+    assert r.json()["error_code"] == "SERVICE_BUSY"